@@ -0,0 +1,32 @@
+"""
+The requests of find_by_llm over all the verses with numbers: fixed batches of 10 verses against batches packed up to
+TOKEN_BUDGET (estimated) tokens. Tokens are estimated locally (llm_pipeline.estimate_tokens); the prefix tokens are
+those of the instructions and the example, the same in all the requests (so the provider can cache them).
+
+    python -m benchmarks.batch_packing
+"""
+from chatgpt import PROMPT_PREFIX, get_prompt
+from find_by_llm import TOKEN_BUDGET, get_batches
+from llm_pipeline import estimate_tokens, split_into_batches
+from programmatic import get_verses_with_numbers
+
+FIXED_BATCH_SIZE = 10  # as in find_by_llm before packing
+
+
+def main():
+    verses = get_verses_with_numbers()
+    prefix_tokens = estimate_tokens(PROMPT_PREFIX)
+    print(f"{len(verses)} verses, prefix of {prefix_tokens} tokens, token budget {TOKEN_BUDGET}")
+    for name, batches in [(f'fixed {FIXED_BATCH_SIZE} verses', split_into_batches(verses, FIXED_BATCH_SIZE)),
+                          ('packed', get_batches(verses))]:
+        prompts = [get_prompt(batch) for batch in batches]
+        assert all(prompt.startswith(PROMPT_PREFIX) for prompt in prompts)
+        assert [verse for batch in batches for verse in batch] == verses
+        prompt_tokens = sum(estimate_tokens(prompt) for prompt in prompts)
+        print(f"{name}: {len(batches)} requests, {prompt_tokens:,} prompt tokens "
+              f"({len(batches) * prefix_tokens:,} of them in the shared prefix), "
+              f"{min(map(len, batches))}-{max(map(len, batches))} verses per request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Time of the docs build (create_docs_data) into an empty directory, against a re-build with unchanged
+inputs (which re-renders, but writes no file), and a re-build after a change to one verse.
+
+    python -m benchmarks.build_output
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from bible_types import VerseAndNumericHebrews
+from create_docs_data import write_docs_data
+from programmatic_nikud import GetHebrewNumbers, get_verses_with_numbers
+
+
+def time_build(verses_and_numeric_hebrews, directory: Path):
+    start = time.perf_counter()
+    output = write_docs_data(verses_and_numeric_hebrews, directory)
+    return time.perf_counter() - start, output
+
+
+def main():
+    verses = get_verses_with_numbers(with_nikud=True, remove_punctuations=False)
+    verses_and_numeric_hebrews = [VerseAndNumericHebrews(verse, GetHebrewNumbers(verse.text).get())
+                                  for verse in verses]
+    changed = list(verses_and_numeric_hebrews)
+    verse = changed[1000].verse
+    changed[1000] = VerseAndNumericHebrews(verse._replace(text=verse.text + ' '), changed[1000].numeric_hebrews)
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        for name, items in [('first build', verses_and_numeric_hebrews),
+                            ('unchanged', verses_and_numeric_hebrews),
+                            ('one verse changed', changed)]:
+            build_time, output = time_build(items, directory)
+            num_written = sum(artifact.is_written for artifact in output.artifacts.values())
+            print(f"{name}: {build_time:.2f}s, {num_written} of {len(output.artifacts)} files written")
+        print(output.get_size_report())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Transferred bytes and rows touched by typical searches of the docs page: the inline page (all the rows in
+docs/index.html, each query parses the numbers of every row), against the sharded page of create_docs_data
+(the shell, the numeric index, and the shards of the rows shown; a query bisects the sorted numbers).
+
+    python -m benchmarks.docs_data
+"""
+import bisect
+import json
+import tempfile
+from pathlib import Path
+
+from bible_types import VerseAndNumericHebrews
+from create_docs_data import DATA_DIRECTORY, INDEX_FILE_NAME, SCRIPT_FILE_NAME, get_searchable_numbers, \
+    write_docs_data
+from create_verses_html import create_html_of_verses_with_numbers
+from programmatic_nikud import GetHebrewNumbers, get_verses_with_numbers
+
+PAGE_SIZE = 100  # as in docs/search.js
+
+QUERIES = {
+    '7': (7, 7),
+    '40': (40, 40),
+    '1000': (1000, 1000),
+    '1-10': (1, 10),
+    '100-1000': (100, 1000),
+    'all': (0, 100000000),
+}
+
+
+def get_inline_matches(verse_htmls, low, high):
+    """The rows shown and the count, as the search script of the inline page computes them."""
+    rows, count = [], 0
+    for row, verse_html in enumerate(verse_htmls):
+        matched = [number for number in get_searchable_numbers(verse_html) if low <= number <= high]
+        if matched:
+            rows.append(row)
+        count += len(matched)
+    return rows, count
+
+
+def get_sharded_matches(index, low, high):
+    start = bisect.bisect_left(index['values'], low)
+    end = bisect.bisect_right(index['values'], high)
+    return sorted(set(index['rows'][start:end])), end - start
+
+
+def main():
+    verses = get_verses_with_numbers(with_nikud=True, remove_punctuations=False)
+    verses_and_numeric_hebrews = [VerseAndNumericHebrews(verse, GetHebrewNumbers(verse.text).get())
+                                  for verse in verses]
+    verse_htmls = [verse_and_numeric_hebrews.render(('html',))['html']
+                   for verse_and_numeric_hebrews in verses_and_numeric_hebrews]
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        create_html_of_verses_with_numbers(verses_and_numeric_hebrews, file_name=directory / 'inline.html')
+        inline_bytes = (directory / 'inline.html').stat().st_size
+        output = write_docs_data(verses_and_numeric_hebrews, directory)
+        index = json.loads((directory / output.artifacts[f'{DATA_DIRECTORY}/{INDEX_FILE_NAME}'].file).read_text())
+        shell_bytes = sum(output.artifacts[name].size
+                          for name in ['index.html', SCRIPT_FILE_NAME, f'{DATA_DIRECTORY}/{INDEX_FILE_NAME}'])
+        shard_bytes = [(directory / shard['file']).stat().st_size for shard in index['shards']]
+
+    shard_first_rows = [shard['first_row'] for shard in index['shards']]
+    print(f"{len(verse_htmls)} rows, {len(index['values'])} numbers, {len(shard_bytes)} shards")
+    print(f"inline page: {inline_bytes:,} bytes; shell + script + index: {shell_bytes:,} bytes, "
+          f"shards: {sum(shard_bytes):,} bytes")
+    print(f"{'query':>10} {'matches':>8} {'rows':>6} | {'inline bytes':>12} {'rows touched':>12} | "
+          f"{'sharded bytes':>13} {'all rows bytes':>14} {'rows touched':>12}")
+    for name, (low, high) in QUERIES.items():
+        inline_rows, inline_count = get_inline_matches(verse_htmls, low, high)
+        rows, count = get_sharded_matches(index, low, high)
+        assert (rows, count) == (inline_rows, inline_count), f"Different matches for {name}"
+
+        def get_bytes(shown_rows):
+            shards = {bisect.bisect_right(shard_first_rows, row) - 1 for row in shown_rows}
+            return shell_bytes + sum(shard_bytes[shard] for shard in shards)
+
+        print(f"{name:>10} {count:>8} {len(rows):>6} | {inline_bytes:>12,} {len(verse_htmls):>12} | "
+              f"{get_bytes(rows[:PAGE_SIZE]):>13,} {get_bytes(rows):>14,} {count + min(len(rows), PAGE_SIZE):>12}")
+
+
+if __name__ == "__main__":
+    main()
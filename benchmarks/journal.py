@@ -0,0 +1,64 @@
+"""
+I/O of a full run of find_by_llm (the stored LLM results, replayed in batches of BATCH_SIZE verses, without the LLM
+calls): re-writing the whole json after every batch, against appending to the journal and compacting at the end.
+
+Write amplification is the bytes written over the size of the final json.
+
+    python -m benchmarks.journal
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from verses_to_matches import FILE_NAME, VersesToNumericsJournal, load_or_create_verses_to_numerics
+
+BATCH_SIZE = 10  # as in find_by_llm before its batches were packed by tokens
+
+
+def dump_verses_to_numerics_reference(file_name, verses_to_numerics):
+    """The dump of find_by_llm before the journal (json.dump into the file, no rename, no fsync)."""
+    json_obj = [[k._asdict()] + [x.to_dict() for x in v] for k, v in verses_to_numerics.items()]
+    with open(file_name, 'w') as file:
+        json.dump(json_obj, file, ensure_ascii=False, indent=4)
+
+
+def run_with_rewrites(items, directory: Path) -> int:
+    file_name = directory / 'rewrites.json'
+    verses_to_numerics = {}
+    bytes_written = 0
+    for start in range(0, len(items), BATCH_SIZE):
+        verses_to_numerics.update(items[start:start + BATCH_SIZE])
+        dump_verses_to_numerics_reference(file_name, verses_to_numerics)
+        bytes_written += os.path.getsize(file_name)
+    return bytes_written
+
+
+def run_with_journal(items, directory: Path) -> int:
+    with VersesToNumericsJournal(directory / 'journal.json', directory / 'journal.jsonl') as journal:
+        for verse, numeric_hebrews in items:
+            journal.append(verse, numeric_hebrews)
+    return journal.bytes_written
+
+
+def main():
+    items = list(load_or_create_verses_to_numerics(FILE_NAME).items())
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        results = {}
+        for name, run in [('rewrite after each batch', run_with_rewrites), ('journal + compaction', run_with_journal)]:
+            start = time.perf_counter()
+            bytes_written = run(items, directory)
+            results[name] = time.perf_counter() - start, bytes_written
+        final_size = os.path.getsize(directory / 'journal.json')
+        assert (directory / 'journal.json').read_bytes() == (directory / 'rewrites.json').read_bytes()
+        assert load_or_create_verses_to_numerics(directory / 'journal.json', directory / 'journal.jsonl') == dict(items)
+    print(f"{len(items)} verses in batches of {BATCH_SIZE}, final json {final_size:,} bytes")
+    for name, (run_time, bytes_written) in results.items():
+        print(f"{name}: {run_time:.2f}s, {bytes_written:,} bytes written "
+              f"(write amplification x{bytes_written / final_size:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Wall time and throughput of find_by_llm against the local stub server (llm_stub), one request at a time and at
+different concurrency levels, with a fixed latency per request and a fraction of failed (retried) requests. The
+metrics of the runs (llm_metrics) give the latency of the requests and the tokens and cost of a full run (as estimated
+by the stub).
+
+    python -m benchmarks.llm_pipeline
+"""
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from find_by_llm import find_numbers_of_verses_with_client
+from llm_metrics import LLMMetrics
+from llm_pipeline import RateLimiter
+from llm_stub import StubServer
+from programmatic import get_verses_with_numbers
+from verses_to_matches import VersesToNumericsJournal
+
+LATENCY = 0.5  # seconds per request
+ERROR_RATE = 0.05
+CONCURRENCY_LEVELS = (1, 4, 16, 32)
+
+
+def run(verses, concurrency: int, directory: Path):
+    file_name, journal_file_name = directory / f'{concurrency}.json', directory / f'{concurrency}.jsonl'
+    metrics = LLMMetrics(log_file_name=directory / f'{concurrency}.batches.jsonl')
+    with StubServer(latency=LATENCY, error_rate=ERROR_RATE) as server:
+        with VersesToNumericsJournal(file_name, journal_file_name) as journal, \
+                contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            asyncio.run(find_numbers_of_verses_with_client(verses, journal, server.base_url, 'stub',
+                                                           concurrency=concurrency, rate_limiter=RateLimiter(10 ** 6),
+                                                           base_delay=0.1, metrics=metrics))
+            run_time = time.perf_counter() - start
+    assert list(journal.verses_to_numerics) == verses
+    return run_time, metrics
+
+
+def main():
+    verses = get_verses_with_numbers()
+    print(f"{len(verses)} verses, stub latency {LATENCY}s, error rate {ERROR_RATE:.0%}")
+    with tempfile.TemporaryDirectory() as directory:
+        for concurrency in CONCURRENCY_LEVELS:
+            run_time, metrics = run(verses, concurrency, Path(directory))
+            counters, latency = metrics.counters, metrics.request_latency
+            print(f"concurrency {concurrency}: {run_time:.1f}s, {len(verses) / run_time:.1f} verses/s "
+                  f"({counters['requests']} requests, {counters['retries']} retried), "
+                  f"request latency p50 {latency.quantile(0.5)}s p90 {latency.quantile(0.9)}s, "
+                  f"batch latency p90 {metrics.batch_latency.quantile(0.9)}s")
+    print(f"tokens of a full run: {counters['prompt_tokens']:,} prompt, {counters['completion_tokens']:,} completion, "
+          f"${metrics.cost:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark of VerseAndNumericHebrews.map_numeric_hebrews over every verse with numbers,
+against the reference greedy allocator (a boolean coverage array, re-scanned for each candidate span).
+
+    python -m benchmarks.map_numeric_hebrews
+"""
+import time
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from bible_types import NumericHebrew, Verse, VerseAndNumericHebrews
+from lexicon import Category, lookup
+from programmatic_nikud import GetHebrewNumbers, get_verses_with_numbers
+from utils import find_all_start_indices
+from verses_to_matches import load_or_create_verses_to_numerics
+
+
+def map_numeric_hebrews_reference(verse_and_numeric_hebrews: VerseAndNumericHebrews, show_only_one_match: bool = True) \
+        -> List[Tuple[Union[NumericHebrew, str], List[int]]]:
+    text = verse_and_numeric_hebrews.verse.text
+    is_covered = np.zeros(len(text), dtype=bool)
+    # by id, so that equal numeric hebrews are placed separately
+    id_to_numeric_hebrew = {}
+    numeric_hebrew_to_indices = {}
+    numeric_hebrew_to_all_indices = {}
+    for numeric_hebrew in verse_and_numeric_hebrews.numeric_hebrews:
+        id_to_numeric_hebrew[id(numeric_hebrew)] = numeric_hebrew
+        if numeric_hebrew.has_span and text[numeric_hebrew.start:numeric_hebrew.end] == numeric_hebrew.quote:
+            all_start_indices = [numeric_hebrew.start]
+        else:
+            all_start_indices = list(find_all_start_indices(text, numeric_hebrew.quote))
+        numeric_hebrew_to_all_indices[id(numeric_hebrew)] = all_start_indices
+        numeric_hebrew_to_indices[id(numeric_hebrew)] = []
+
+    while any(numeric_hebrew_to_all_indices.values()):
+        for numeric_hebrew_id, all_start_indices in numeric_hebrew_to_all_indices.items():
+            remaining_indices = all_start_indices.copy()
+            for start_index in all_start_indices:
+                remaining_indices.remove(start_index)
+                len_quote = len(id_to_numeric_hebrew[numeric_hebrew_id].quote)
+                if not any(is_covered[start_index:start_index + len_quote]):
+                    numeric_hebrew_to_indices[numeric_hebrew_id].append(start_index)
+                    is_covered[start_index:start_index + len_quote] = True
+                    break
+            numeric_hebrew_to_all_indices[numeric_hebrew_id] = remaining_indices
+        if show_only_one_match:
+            break
+    keyword_to_indices = {}
+    start_index = 0
+    for token in text.split(' '):
+        entry = lookup(token) if token else None
+        if entry is not None and entry.category & Category.MALEH_NUMBER \
+                and not any(is_covered[start_index:start_index + len(token)]):
+            keyword_to_indices.setdefault(token, []).append(start_index)
+            is_covered[start_index:start_index + len(token)] = True
+        start_index += len(token) + 1
+    return [(id_to_numeric_hebrew[numeric_hebrew_id], indices)
+            for numeric_hebrew_id, indices in numeric_hebrew_to_indices.items()] + list(keyword_to_indices.items())
+
+
+def get_all_verses_and_numeric_hebrews() -> List[VerseAndNumericHebrews]:
+    verses = get_verses_with_numbers(with_nikud=True, remove_punctuations=False)
+    programmatic = [VerseAndNumericHebrews(verse, GetHebrewNumbers(verse.text).get()) for verse in verses]
+    by_llm = [VerseAndNumericHebrews(verse, numeric_hebrews)
+              for verse, numeric_hebrews in load_or_create_verses_to_numerics().items()]
+    return programmatic + by_llm
+
+
+def get_chapters_and_numeric_hebrews(verses_and_numeric_hebrews: List[VerseAndNumericHebrews]) \
+        -> List[VerseAndNumericHebrews]:
+    """
+    Each chapter as one long verse, with the numeric hebrews of all its verses (many repeated quotes).
+    """
+    chapters = {}
+    for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+        verse = verse_and_numeric_hebrews.verse
+        texts, numeric_hebrews = chapters.setdefault((verse.book, verse.chapter), ([], []))
+        texts.append(verse.text)
+        numeric_hebrews.extend(verse_and_numeric_hebrews.numeric_hebrews)
+    return [VerseAndNumericHebrews(Verse(book, chapter, '', ' '.join(texts)), numeric_hebrews)
+            for (book, chapter), (texts, numeric_hebrews) in chapters.items()]
+
+
+def time_mapping(map_function, verses_and_numeric_hebrews, show_only_one_match: bool, repeats: int = 5):
+    """The best time of `repeats` runs, and the mappings."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        mappings = [map_function(verse_and_numeric_hebrews, show_only_one_match)
+                    for verse_and_numeric_hebrews in verses_and_numeric_hebrews]
+        times.append(time.perf_counter() - start)
+    return min(times), mappings
+
+
+def main():
+    verses_and_numeric_hebrews = get_all_verses_and_numeric_hebrews()
+    chapters_and_numeric_hebrews = get_chapters_and_numeric_hebrews(verses_and_numeric_hebrews)
+    # warm-up (resolves the words of the verses in the lexicon)
+    time_mapping(map_numeric_hebrews_reference, verses_and_numeric_hebrews, True, repeats=1)
+    for name, items in [('verses', verses_and_numeric_hebrews), ('chapters', chapters_and_numeric_hebrews)]:
+        print(f"{len(items)} {name}, {sum(len(item.numeric_hebrews) for item in items)} numeric hebrews")
+        for show_only_one_match in [True, False]:
+            reference_time, reference = time_mapping(map_numeric_hebrews_reference, items, show_only_one_match)
+            interval_time, mappings = time_mapping(
+                VerseAndNumericHebrews.map_numeric_hebrews, items, show_only_one_match)
+            assert mappings == reference, "The interval allocator assigned different spans"
+            print(f"  show_only_one_match={show_only_one_match}: "
+                  f"reference {reference_time:.3f}s, intervals {interval_time:.3f}s "
+                  f"(x{reference_time / interval_time:.1f}), identical assignments")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark of the NumericHebrew record against the pydantic NumericHebrewModel:
+memory footprint, creation, serialization, and the conversion between the two.
+
+    python -m benchmarks.records
+"""
+import json
+import time
+import tracemalloc
+
+from bible_types import NumericHebrew, NumericHebrewModel
+from verses_to_matches import FILE_NAME
+
+COPIES = 10  # of all the results, to get to tens of thousands of objects
+
+
+def get_json_objects() -> list:
+    """The numeric hebrews found by the LLM, as json objects."""
+    with open(FILE_NAME, 'r') as file:
+        objs = [obj for verse_and_objs in json.load(file) for obj in verse_and_objs[1:]]
+    return objs * COPIES
+
+
+def measure(create):
+    """The objects, the time it took to create them, and their memory (bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    objs = create()
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return objs, elapsed, memory
+
+
+def time_it(function, repeats: int = 3) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    json_objects = get_json_objects()
+    n = len(json_objects)
+    models, model_time, model_memory = measure(lambda: [NumericHebrewModel(**obj) for obj in json_objects])
+    records, record_time, record_memory = measure(lambda: [NumericHebrew.from_dict(obj) for obj in json_objects])
+
+    print(f"{n} numeric hebrews")
+    print(f"{'':24}{'pydantic':>12}{'record':>12}")
+    print(f"{'memory (bytes/object)':24}{model_memory / n:12.0f}{record_memory / n:12.0f}")
+    print(f"{'create (objects/s)':24}{n / model_time:12.0f}{n / record_time:12.0f}")
+    model_dump_time = time_it(lambda: [model.model_dump() for model in models])
+    record_dump_time = time_it(lambda: [record.to_dict() for record in records])
+    print(f"{'to dict (objects/s)':24}{n / model_dump_time:12.0f}{n / record_dump_time:12.0f}")
+    model_json_time = time_it(lambda: json.dumps([model.model_dump() for model in models], ensure_ascii=False))
+    record_json_time = time_it(lambda: json.dumps([record.to_dict() for record in records], ensure_ascii=False))
+    print(f"{'to json (objects/s)':24}{n / model_json_time:12.0f}{n / record_json_time:12.0f}")
+    hash_time = time_it(lambda: set(records))
+    print(f"{'hash (objects/s)':24}{'':>12}{n / hash_time:12.0f}")
+    from_model_time = time_it(lambda: [NumericHebrew.from_model(model) for model in models])
+    to_model_time = time_it(lambda: [record.to_model() for record in records])
+    print(f"model -> record: {n / from_model_time:.0f} objects/s, record -> model: {n / to_model_time:.0f} objects/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark of the total render time of docs/index.html and verses_with_numbers.txt (the output of find_programmatic),
+against the reference renderer (which rebuilt the verse string for every highlight, once per format), and with a
+warm render cache.
+
+    python -m benchmarks.render
+"""
+import functools
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from bible_types import NUMBER_COLOR, NUMBER_KEYWORD_COLOR, REPEATED_QUOTE_COLOR, RESET, UNIQUE_QUOTE_COLOR, WIDTH, \
+    VerseAndNumericHebrews
+from create_verses_html import START, TEMPLATE, write_verses_with_numbers
+from nikud_utils import remove_nikud
+from programmatic_nikud import GetHebrewNumbers, get_verses_with_numbers
+from render_cache import RenderCache
+
+
+def to_formatted_str_reference(self: VerseAndNumericHebrews, format: str) -> str:
+    text = self.verse.text
+    indices_to_numeric_hebrew_and_is_first = {index: (numeric_hebrew, k == 0)
+                                              for numeric_hebrew, indices in self.map_numeric_hebrews()
+                                              for k, index in enumerate(indices)}
+    text_len = len(remove_nikud(text))
+    for start_index, (numeric_hebrew, is_first) in sorted(indices_to_numeric_hebrew_and_is_first.items(),
+                                                          key=lambda x: x[0], reverse=True):
+        is_keyword = isinstance(numeric_hebrew, str)
+        if is_keyword:
+            quote = numeric_hebrew
+            bracket = ""
+        else:
+            quote = numeric_hebrew.quote
+            num = numeric_hebrew.number
+            if isinstance(num, float):
+                num = str(int(1 / num)) + ' / 1'
+            if numeric_hebrew.entity:
+                bracket = f" [{num} {numeric_hebrew.entity}]"
+            else:
+                bracket = f" [{num}]"
+        assert quote == text[start_index:start_index + len(quote)]
+        if format == "html":
+            if not is_keyword:
+                color = "blue" if is_first else "cyan"
+            else:
+                color = "orange"
+            highlighted_text = f"<span style='color:{color}'>{quote}</span>"
+            if bracket:
+                bracket_color = "green"
+                highlighted_text += f"<span style='color:{bracket_color}'>{bracket}</span>"
+        elif format == "color_text":
+            if not is_keyword:
+                color = UNIQUE_QUOTE_COLOR if is_first else REPEATED_QUOTE_COLOR
+            else:
+                color = NUMBER_KEYWORD_COLOR
+            highlighted_text = f"{color}{quote}{RESET}"
+            if bracket:
+                highlighted_text += f"{NUMBER_COLOR}{bracket}{RESET}"
+        elif format == "text":
+            highlighted_text = f"({quote}){bracket}"
+            text_len += 2
+        else:
+            raise ValueError("Invalid format")
+        text_len += len(bracket)
+        text = text[:start_index] + highlighted_text + text[start_index + len(quote):]
+    if format != "html":
+        text = " " * (WIDTH - text_len) + text
+    return text
+
+
+def write_verses_with_numbers_reference(verses_and_numeric_hebrews: List[VerseAndNumericHebrews],
+                                        html_file_name: str, text_file_name: str):
+    all_verses = []
+    for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+        verse_html = to_formatted_str_reference(verse_and_numeric_hebrews, "html")
+        location_html = verse_and_numeric_hebrews.get_location_html()
+        all_verses.append(f"""
+        <div class="row">
+            <div class="locations">{location_html}</div>
+            <div class="verses">{verse_html}</div>
+        </div>
+    """)
+    html = TEMPLATE
+    html = html.replace(START, START + '\n' + '\n'.join(all_verses))
+    with open(Path('docs') / html_file_name, 'w') as file:
+        file.write(html)
+
+    with open(text_file_name, 'w') as file:
+        for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+            verse_text = to_formatted_str_reference(verse_and_numeric_hebrews, "text")
+            file.write(f"{verse_text}\n\n")
+
+
+def time_writing(write_function, verses_and_numeric_hebrews, directory: Path, repeats: int = 5):
+    """The best time of `repeats` runs, and the contents of the written files."""
+    html_file_name, text_file_name = directory / 'index.html', directory / 'verses_with_numbers.txt'
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        write_function(verses_and_numeric_hebrews, html_file_name=html_file_name, text_file_name=text_file_name)
+        times.append(time.perf_counter() - start)
+    return min(times), (html_file_name.read_bytes(), text_file_name.read_bytes())
+
+
+def main():
+    verses = get_verses_with_numbers(with_nikud=True, remove_punctuations=False)
+    verses_and_numeric_hebrews = [VerseAndNumericHebrews(verse, GetHebrewNumbers(verse.text).get())
+                                  for verse in verses]
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        # warm-up (resolves the words of the verses in the lexicon)
+        time_writing(write_verses_with_numbers, verses_and_numeric_hebrews, directory, repeats=1)
+        reference_time, reference = time_writing(
+            write_verses_with_numbers_reference, verses_and_numeric_hebrews, directory)
+        one_pass_time, written = time_writing(write_verses_with_numbers, verses_and_numeric_hebrews, directory)
+        render_cache = RenderCache()
+        write_with_cache = functools.partial(write_verses_with_numbers, render_cache=render_cache)
+        time_writing(write_with_cache, verses_and_numeric_hebrews, directory, repeats=1)
+        cached_time, cached = time_writing(write_with_cache, verses_and_numeric_hebrews, directory)
+    assert written == reference, "The one-pass renderer wrote different files"
+    assert cached == reference, "The render cache wrote different files"
+    print(f"{len(verses_and_numeric_hebrews)} verses: reference {reference_time:.3f}s, "
+          f"one pass {one_pass_time:.3f}s (x{reference_time / one_pass_time:.1f}), "
+          f"warm render cache {cached_time:.3f}s (x{reference_time / cached_time:.1f}), identical files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+A run of find_by_llm against the local stub server (llm_stub) with an empty response cache, and a re-run in replay
+mode (after the server is stopped): the wall time, the hits and misses of the cache and the latency it saved.
+
+    python -m benchmarks.response_cache
+"""
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+
+from find_by_llm import find_numbers_of_verses_with_client
+from llm_pipeline import RateLimiter
+from llm_stub import StubServer
+from programmatic import get_verses_with_numbers
+from response_cache import ResponseCache
+from verses_to_matches import VersesToNumericsJournal
+
+NUM_VERSES = 200
+LATENCY = 0.5  # seconds per request
+CONCURRENCY = 4
+
+
+def run(verses, base_url: str, cache: ResponseCache, directory: Path, name: str):
+    with VersesToNumericsJournal(directory / f'{name}.json', directory / f'{name}.jsonl') as journal, \
+            contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        asyncio.run(find_numbers_of_verses_with_client(verses, journal, base_url, 'stub', concurrency=CONCURRENCY,
+                                                       rate_limiter=RateLimiter(10 ** 6), cache=cache))
+        run_time = time.perf_counter() - start
+    print(f"{name}: {run_time:.2f}s, {cache.stats.hits} hits, {cache.stats.misses} misses, "
+          f"saved {cache.saved_latency:.1f}s of LLM calls")
+    return journal.verses_to_numerics
+
+
+def main():
+    verses = get_verses_with_numbers()[:NUM_VERSES]
+    print(f"{len(verses)} verses, stub latency {LATENCY}s, concurrency {CONCURRENCY}")
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        with StubServer(latency=LATENCY) as server:
+            base_url = server.base_url
+            cold = run(verses, base_url, ResponseCache(directory / 'cache'), directory, 'empty cache')
+        replayed = run(verses, base_url, ResponseCache(directory / 'cache', replay=True), directory, 'replay')
+    assert replayed == cold
+
+
+if __name__ == "__main__":
+    main()
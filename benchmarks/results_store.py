@@ -0,0 +1,59 @@
+"""
+Load time of the stored LLM results: parsing verses_to_numerics.json against opening the binary results store,
+and the time to iterate over all the verses and to look up a single verse in each.
+
+    python -m benchmarks.results_store
+"""
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from results_store import ResultsStore, convert_json_to_store
+from verses_to_matches import FILE_NAME, load_or_create_verses_to_numerics
+
+
+def best_time(function, repeats: int = 5) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        store_file_name = Path(directory) / 'results.bin'
+        journal_file_name = Path(directory) / 'results.jsonl'  # none
+        convert_json_to_store(FILE_NAME, store_file_name, journal_file_name)
+        verses_to_numerics = load_or_create_verses_to_numerics(FILE_NAME, journal_file_name)
+        last = list(verses_to_numerics)[-1]
+        reference = last.book, last.chapter, last.letter
+
+        def load_json_and_look_up():
+            return load_or_create_verses_to_numerics(FILE_NAME, journal_file_name)[last]
+
+        def open_store_and_look_up():
+            with ResultsStore(store_file_name) as store:
+                return store[reference]
+
+        def open_store_and_iterate():
+            with ResultsStore(store_file_name) as store:
+                return store.to_dict()
+
+        with ResultsStore(store_file_name) as store:
+            assert store.to_dict() == verses_to_numerics
+            assert store[reference] == (last, verses_to_numerics[last])
+        json_time = best_time(load_json_and_look_up)
+        lookup_time = best_time(open_store_and_look_up)
+        iterate_time = best_time(open_store_and_iterate)
+        json_size, store_size = os.path.getsize(FILE_NAME), os.path.getsize(store_file_name)
+    print(f"{len(verses_to_numerics)} verses, json {json_size:,} bytes, store {store_size:,} bytes")
+    print(f"json: load and look up one verse {json_time * 1000:.1f}ms")
+    print(f"store: open and look up one verse {lookup_time * 1000:.2f}ms (x{json_time / lookup_time:.0f}), "
+          f"open and decode all verses {iterate_time * 1000:.1f}ms (x{json_time / iterate_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
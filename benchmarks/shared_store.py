@@ -0,0 +1,65 @@
+"""
+The cost of a new process getting the corpus, its encoding and the extracted numbers: loading them (the pickled
+Bible, the .npy arrays of the encoding and the json of the LLM results) against opening the shared store.
+Each is measured in a new process (the resident memory after it, the shared pages of the store included).
+
+    python -m benchmarks.shared_store
+"""
+import multiprocessing
+import time
+
+from bible_types import VerseAndNumericHebrews
+from corpus_encoding import get_corpus_encoding
+from read_bible import get_bible
+from shared_store import SharedStore, write_shared_store
+from verses_to_matches import load_or_create_verses_to_numerics
+
+
+def get_resident_memory() -> int:
+    with open('/proc/self/status') as file:
+        for line in file:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+
+
+def load_separately():
+    verses = get_bible()
+    encoding = get_corpus_encoding()
+    verses_to_numerics = load_or_create_verses_to_numerics()
+    return len(verses), encoding.find_phrase(['שנה']), verses_to_numerics
+
+
+def open_shared_store():
+    store = SharedStore()
+    return store.num_verses, store.find_word('שנה'), store.results
+
+
+def measure(function, queue):
+    start_memory = get_resident_memory()
+    start = time.perf_counter()
+    result = function()
+    queue.put((time.perf_counter() - start, get_resident_memory() - start_memory))
+    return result
+
+
+def run_in_new_process(function):
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=measure, args=(function, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    write_shared_store(VerseAndNumericHebrews(verse, numeric_hebrews)
+                       for verse, numeric_hebrews in load_or_create_verses_to_numerics().items())
+    run_in_new_process(load_separately)  # warm-up (the caches of the bible and the encoding, the page cache)
+    for name, function in [('load separately', load_separately), ('open the shared store', open_shared_store)]:
+        run_time, memory = run_in_new_process(function)
+        print(f"{name}: {run_time * 1000:.1f}ms, +{memory / 2 ** 20:.1f}MB resident memory")
+
+
+if __name__ == "__main__":
+    main()
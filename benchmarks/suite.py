@@ -0,0 +1,230 @@
+"""
+The benchmark suite of the hot paths of the corpus, the parser and the rendering, to catch performance regressions.
+
+Each case is warmed up, then timed over `repeats` samples (each of enough calls to take MIN_SAMPLE_TIME, unless the
+case has a setup, which is run before each call and is not timed), and reported by the median time of a call and
+the inter-quartile range (IQR) of the samples. The results are saved as a json baseline, and compared with it: a case
+regresses if its median is slower than that of the baseline by more than its threshold (a fraction of the baseline),
+and its IQR is above that of the baseline (so the noise of a shared machine is not a regression).
+
+    python -m benchmarks.suite                         # compare with benchmarks/baseline.json
+    python -m benchmarks.suite --save                  # save the results as the baseline
+    python -m benchmarks.suite -k GetHebrewNumbers --threshold 0.1 --baseline other.json
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+import read_bible
+from bible_types import VerseAndNumericHebrews
+from create_verses_html import write_verses_with_numbers
+from programmatic import get_verses_with_numbers
+from programmatic_nikud import GetHebrewNumbers, clear_memos
+from programmatic_nikud import get_verses_with_numbers as get_nikud_verses_with_numbers
+from read_bible import get_bible
+from utils import search_nikud_text_for_non_nikud_query
+from verses_to_matches import FILE_NAME, dump_verses_to_numerics, load_or_create_verses_to_numerics
+
+BASELINE_FILE_NAME = Path(__file__).parent / 'baseline.json'
+REPEATS = 7
+WARMUP = 1  # calls before the samples (besides those of the calibration of the number of calls per sample)
+MIN_SAMPLE_TIME = 0.05  # seconds
+DEFAULT_THRESHOLD = 0.25  # slower by more than 25% is a regression
+
+OK, REGRESSION, IMPROVEMENT, NEW = 'ok', 'REGRESSION', 'improvement', 'new'
+
+
+class Timing(NamedTuple):
+    """Seconds per call: the median and the quartiles of the samples."""
+    median: float
+    q1: float
+    q3: float
+    repeats: int
+    number: int  # calls per sample
+
+    @property
+    def iqr(self) -> float:
+        return self.q3 - self.q1
+
+
+class Case(NamedTuple):
+    name: str
+    function: Callable[[], object]
+    setup: Optional[Callable[[], object]] = None  # before each call, not timed (e.g. to clear a cache)
+    threshold: Optional[float] = None  # of a noisy case (None for the threshold of the run)
+
+
+def get_number(function: Callable, min_sample_time: float = MIN_SAMPLE_TIME) -> int:
+    """The number of calls that take at least `min_sample_time` (as timeit.Timer.autorange)."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_sample_time:
+            return number
+        number *= 2
+
+
+def measure(function: Callable, setup: Callable = None, repeats: int = REPEATS, warmup: int = WARMUP,
+            min_sample_time: float = MIN_SAMPLE_TIME) -> Timing:
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        function()
+    number = 1 if setup is not None else get_number(function, min_sample_time)
+    samples = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        gc.collect()
+        gc.disable()  # as timeit: no collections of the garbage of other samples
+        try:
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            samples.append((time.perf_counter() - start) / number)
+        finally:
+            gc.enable()
+    q1, median, q3 = np.percentile(samples, [25, 50, 75])
+    return Timing(float(median), float(q1), float(q3), repeats, number)
+
+
+def get_cases(directory: Path) -> List[Case]:
+    """The cases, with their inputs (prepared here, not timed). `directory` is for the files they write."""
+    nikud_verses = get_nikud_verses_with_numbers(with_nikud=True, remove_punctuations=False)
+    verses_and_numeric_hebrews = [VerseAndNumericHebrews(verse, GetHebrewNumbers(verse.text).get())
+                                  for verse in nikud_verses]
+    genesis = ' '.join(verse.text for verse in get_bible(with_nikud=True) if verse.book == 'בראשית')
+    verses_to_numerics = load_or_create_verses_to_numerics(FILE_NAME, directory / 'none.jsonl')
+
+    def parse_all():
+        for verse in nikud_verses:
+            GetHebrewNumbers(verse.text).get()
+
+    def map_all():
+        for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+            verse_and_numeric_hebrews.map_numeric_hebrews()
+
+    return [
+        # from the html books (as when the corpus pickle is missing or out of date), and from the pickle
+        Case('get_bible (cold)', lambda: read_bible._read_books('books_maleh', True), threshold=0.5),
+        Case('get_bible (warm pickle)', get_bible, setup=read_bible.BIBLES.clear, threshold=0.5),
+        Case('get_bible (warm)', get_bible, threshold=0.5),
+        Case('get_verses_with_numbers (maleh)', get_verses_with_numbers),
+        Case('get_verses_with_numbers (nikud)', lambda: get_nikud_verses_with_numbers(with_nikud=True)),
+        Case('GetHebrewNumbers, all verses (cold memos)', parse_all, setup=clear_memos, threshold=0.5),
+        Case('GetHebrewNumbers, all verses (warm memos)', parse_all),
+        Case('map_numeric_hebrews, all verses', map_all),
+        Case('write_verses_with_numbers (html and text)', lambda: write_verses_with_numbers(
+            verses_and_numeric_hebrews, directory / 'index.html', directory / 'verses_with_numbers.txt'),
+             threshold=0.5),
+        Case('search_nikud_text_for_non_nikud_query (Genesis)',
+             lambda: search_nikud_text_for_non_nikud_query(genesis, 'שבע')),
+        Case('json load (verses_to_numerics)',
+             lambda: load_or_create_verses_to_numerics(FILE_NAME, directory / 'none.jsonl')),
+        Case('json dump (verses_to_numerics)',
+             lambda: dump_verses_to_numerics(directory / 'verses_to_numerics.json', verses_to_numerics)),
+    ]
+
+
+def get_machine() -> dict:
+    return dict(platform=platform.platform(), processor=platform.processor(), python=platform.python_version())
+
+
+def save_baseline(timings: Dict[str, Timing], file_name=BASELINE_FILE_NAME):
+    with open(file_name, 'w') as file:
+        json.dump(dict(machine=get_machine(), cases={name: timing._asdict() for name, timing in timings.items()}),
+                  file, indent=2, ensure_ascii=False)
+
+
+def load_baseline(file_name=BASELINE_FILE_NAME) -> Dict[str, Timing]:
+    with open(file_name) as file:
+        baseline = json.load(file)
+    if baseline['machine'] != get_machine():
+        print(f"Note: the baseline is of another machine ({baseline['machine']})")
+    return {name: Timing(**timing) for name, timing in baseline['cases'].items()}
+
+
+class Comparison(NamedTuple):
+    name: str
+    timing: Timing
+    baseline: Optional[Timing]
+    threshold: float
+
+    @property
+    def ratio(self) -> float:
+        return self.timing.median / self.baseline.median if self.baseline is not None else float('nan')
+
+    @property
+    def status(self) -> str:
+        if self.baseline is None:
+            return NEW
+        # beyond the threshold, and beyond the noise: the inter-quartile ranges do not overlap
+        if self.ratio > 1 + self.threshold and self.timing.q1 > self.baseline.q3:
+            return REGRESSION
+        if self.ratio < 1 / (1 + self.threshold) and self.timing.q3 < self.baseline.q1:
+            return IMPROVEMENT
+        return OK
+
+
+def compare(timings: Dict[str, Timing], baseline: Dict[str, Timing], thresholds: Dict[str, float]) \
+        -> List[Comparison]:
+    return [Comparison(name, timing, baseline.get(name), thresholds[name]) for name, timing in timings.items()]
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in [('s', 1), ('ms', 1e-3), ('us', 1e-6)]:
+        if seconds >= scale:
+            return f'{seconds / scale:.3g}{unit}'
+    return f'{seconds / 1e-9:.3g}ns'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--baseline', default=BASELINE_FILE_NAME, type=Path)
+    parser.add_argument('--save', action='store_true', help='save the results as the baseline')
+    parser.add_argument('--threshold', default=DEFAULT_THRESHOLD, type=float,
+                        help='the regression threshold of the cases without their own')
+    parser.add_argument('--repeats', default=REPEATS, type=int)
+    parser.add_argument('-k', dest='keyword', default='', help='only the cases whose name contains this')
+    args = parser.parse_args(argv)
+
+    timings, thresholds = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        for case in get_cases(Path(directory)):
+            if args.keyword not in case.name:
+                continue
+            timings[case.name] = measure(case.function, case.setup, args.repeats)
+            thresholds[case.name] = case.threshold if case.threshold is not None else args.threshold
+
+    baseline = load_baseline(args.baseline) if args.baseline.exists() else {}
+    comparisons = compare(timings, baseline, thresholds)
+    print(f"{'case':50}{'median':>10}{'IQR':>10}{'baseline':>10}{'ratio':>8}  status")
+    for comparison in comparisons:
+        timing, baseline_timing = comparison.timing, comparison.baseline
+        print(f"{comparison.name:50}{format_seconds(timing.median):>10}{format_seconds(timing.iqr):>10}"
+              f"{format_seconds(baseline_timing.median) if baseline_timing else '-':>10}"
+              f"{f'{comparison.ratio:.2f}' if baseline_timing else '-':>8}  {comparison.status}")
+    if args.save:
+        save_baseline(timings, args.baseline)
+        print(f"Saved the baseline to {args.baseline}")
+        return 0
+    regressions = [comparison.name for comparison in comparisons if comparison.status == REGRESSION]
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
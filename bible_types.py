@@ -1,14 +1,16 @@
 from __future__ import annotations
+import dataclasses
 from dataclasses import dataclass
-from typing import NamedTuple, List, Dict, Union, Tuple
+from typing import NamedTuple, Iterable, List, Dict, Optional, Union, Tuple
 
+import bisect
 import operator
 import numpy as np
 from pydantic import BaseModel
 
 from booknames import get_book_num
 from letters_to_num import convert_hebrew_string_to_num
-from nikud_utils import remove_nikud
+from nikud_utils import get_length_without_nikud
 from utils import find_all_start_indices
 
 
@@ -25,13 +27,33 @@ class Verse(NamedTuple):
 Verses = List[Verse]
 
 
-class NumericHebrew(BaseModel):
-    book: str
-    chapter: str
-    letter: str
-    quote: str
-    number: Union[int, float, Time]
-    entity: str
+class NumericHebrew:
+    """
+    A number quoted in a verse, with its value.
+    A light immutable record (its Time is frozen too) with value equality and hashing, for the internal pipeline.
+    NumericHebrewModel is its pydantic counterpart, used only for the structured output of the LLM.
+    """
+    # start and end are the character offsets of the quote in the verse text ([start, end)), when known (set by the
+    # parser)
+    __slots__ = ('book', 'chapter', 'letter', 'quote', 'number', 'entity', 'start', 'end')
+
+    def __init__(self, book: str, chapter: str, letter: str, quote: str, number: Union[int, float, Time],
+                 entity: str, start: Optional[int] = None, end: Optional[int] = None):
+        for name, value in zip(self.__slots__, (book, chapter, letter, quote, number, entity, start, end)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"NumericHebrew is immutable, can't set {name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"NumericHebrew is immutable, can't delete {name}")
+
+    def __reduce__(self):
+        return NumericHebrew, tuple(getattr(self, name) for name in self.__slots__)
+
+    @property
+    def has_span(self) -> bool:
+        return self.start is not None and self.end is not None
 
     def to_string(self):
         return \
@@ -44,12 +66,64 @@ class NumericHebrew(BaseModel):
             '   "entity": "' + self.entity + '"\n' \
             '}'
 
+    def _key(self) -> tuple:
+        number = self.number
+        if isinstance(number, Time):
+            number = (Time, number.years, number.months, number.days, number.is_date)
+        return self.book, self.chapter, self.letter, self.quote, number, self.entity, self.start, self.end
+
+    def __eq__(self, other):
+        if not isinstance(other, NumericHebrew):
+            return NotImplemented
+        return self._key() == other._key()
+
     def __hash__(self):
-        return id(self)
+        return hash(self._key())
+
+    def __repr__(self):
+        return 'NumericHebrew(' + ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__) + ')'
+
+    def to_dict(self) -> dict:
+        """The json object of the numeric hebrew (without start/end if it has no span)."""
+        number = dataclasses.asdict(self.number) if isinstance(self.number, Time) else self.number
+        obj = dict(book=self.book, chapter=self.chapter, letter=self.letter, quote=self.quote, number=number,
+                   entity=self.entity)
+        if self.start is not None:
+            obj['start'] = self.start
+        if self.end is not None:
+            obj['end'] = self.end
+        return obj
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> NumericHebrew:
+        number = obj['number']
+        if isinstance(number, dict):
+            number = Time(**number)
+        return cls(obj['book'], obj['chapter'], obj['letter'], obj['quote'], number, obj['entity'],
+                   obj.get('start'), obj.get('end'))
+
+    @classmethod
+    def from_model(cls, model: NumericHebrewModel) -> NumericHebrew:
+        # the fields are shared, not copied
+        return cls(model.book, model.chapter, model.letter, model.quote, model.number, model.entity)
+
+    def to_model(self) -> NumericHebrewModel:
+        return NumericHebrewModel.model_construct(
+            book=self.book, chapter=self.chapter, letter=self.letter, quote=self.quote, number=self.number,
+            entity=self.entity)
+
+
+class NumericHebrewModel(BaseModel):
+    book: str
+    chapter: str
+    letter: str
+    quote: str
+    number: Union[int, float, Time]
+    entity: str
 
 
 class ListOfNumericHebrew(BaseModel):
-    all_numbers: List[NumericHebrew]
+    all_numbers: List[NumericHebrewModel]
 
 
 UNIQUE_QUOTE_COLOR = "\033[31m"  # red
@@ -61,59 +135,134 @@ RESET = "\033[0m"
 WIDTH = 180
 
 
+FORMATS = ("html", "text", "color_text")
+RENDER_VERSION = 1  # the version of the output of VerseAndNumericHebrews.render (it keys the render cache)
+
+
+def _highlight(format: str, quote: str, bracket: str, is_keyword: bool, is_first: bool) -> str:
+    if format == "html":
+        if not is_keyword:
+            color = "blue" if is_first else "cyan"
+        else:
+            color = "orange"
+        highlighted_text = f"<span style='color:{color}'>{quote}</span>"
+        if bracket:
+            bracket_color = "green"
+            highlighted_text += f"<span style='color:{bracket_color}'>{bracket}</span>"
+    elif format == "color_text":
+        if not is_keyword:
+            color = UNIQUE_QUOTE_COLOR if is_first else REPEATED_QUOTE_COLOR
+        else:
+            color = NUMBER_KEYWORD_COLOR
+        highlighted_text = f"{color}{quote}{RESET}"
+        if bracket:
+            highlighted_text += f"{NUMBER_COLOR}{bracket}{RESET}"
+    else:
+        highlighted_text = f"({quote}){bracket}"
+    return highlighted_text
+
+
+class CoveredSpans:
+    """
+    Non-overlapping [start, end) spans of a text, kept sorted, so that checking a span is a binary search.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def is_free(self, start: int, end: int) -> bool:
+        if start >= end:
+            return True
+        i = bisect.bisect_left(self.starts, end) - 1
+        return i < 0 or self.ends[i] <= start
+
+    def add_if_free(self, start: int, end: int) -> bool:
+        if not self.is_free(start, end):
+            return False
+        if start < end:
+            i = bisect.bisect_left(self.starts, start)
+            self.starts.insert(i, start)
+            self.ends.insert(i, end)
+        return True
+
+
 @dataclass(frozen=True)
 class VerseAndNumericHebrews:
     verse: Verse
     numeric_hebrews: List[NumericHebrew]
 
-    def map_numeric_hebrews(self, show_only_one_match: bool = True) -> Dict[Union[NumericHebrew, str], List[int]]:
+    def map_numeric_hebrews(self, show_only_one_match: bool = True) \
+            -> List[Tuple[Union[NumericHebrew, str], List[int]]]:
         """
         For each numeric hebrew find the index of its first appearance in the verse.
         If the match is already covered, move to the next match.
+        Numeric hebrews with a span (from the parser) are placed at their span, without searching the quote.
+        Returns (numeric hebrew, or number keyword, start indices) pairs; equal numeric hebrews are placed separately.
         """
-        from programmatic import iter_hebrew_numbers
-
-        is_covered = np.zeros(len(self.verse.text), dtype=bool)
-        numeric_hebrew_to_indices = {}
-        numeric_hebrew_to_all_indices = {}
+        from lexicon import Category, get_lexicon
+        lookup = get_lexicon().lookup
+
+        covered = CoveredSpans()
+        quote_to_start_indices = {}
+        # each numeric hebrew, its start indices, a pointer to the first that was not tried yet, and its matches
+        pending = []
+        seen_ids = set()
         for numeric_hebrew in self.numeric_hebrews:
-            all_start_indices = list(find_all_start_indices(self.verse.text, numeric_hebrew.quote))
-            numeric_hebrew_to_all_indices[numeric_hebrew] = all_start_indices
-            numeric_hebrew_to_indices[numeric_hebrew] = []
-
-        while any(numeric_hebrew_to_all_indices.values()):
-            for numeric_hebrew, all_start_indices in numeric_hebrew_to_all_indices.items():
-                remaining_indices = all_start_indices.copy()
-                for start_index in all_start_indices:
-                    remaining_indices.remove(start_index)
-                    len_quote = len(numeric_hebrew.quote)
-                    if not any(is_covered[start_index:start_index + len_quote]):
-                        numeric_hebrew_to_indices[numeric_hebrew].append(start_index)
-                        is_covered[start_index:start_index + len_quote] = True
+            if id(numeric_hebrew) in seen_ids:
+                continue
+            seen_ids.add(id(numeric_hebrew))
+            quote = numeric_hebrew.quote
+            if numeric_hebrew.has_span and self.verse.text[numeric_hebrew.start:numeric_hebrew.end] == quote:
+                # the parser already knows where the quote is
+                pending.append([numeric_hebrew, [numeric_hebrew.start], 0, []])
+                continue
+            if quote not in quote_to_start_indices:
+                quote_to_start_indices[quote] = list(find_all_start_indices(self.verse.text, quote))
+            pending.append([numeric_hebrew, quote_to_start_indices[quote], 0, []])
+        numeric_hebrews_and_indices = [(item[0], item[3]) for item in pending]
+
+        while pending:
+            for item in pending:
+                numeric_hebrew, start_indices, pointer, indices = item
+                len_quote = len(numeric_hebrew.quote)
+                while pointer < len(start_indices):
+                    start_index = start_indices[pointer]
+                    pointer += 1
+                    if covered.add_if_free(start_index, start_index + len_quote):
+                        indices.append(start_index)
                         break
-                numeric_hebrew_to_all_indices[numeric_hebrew] = remaining_indices
+                item[2] = pointer
             if show_only_one_match:
                 break
-        for numeric_keyword in iter_hebrew_numbers():
-            all_start_indices = list(find_all_start_indices(' ' + self.verse.text + ' ', ' ' + numeric_keyword + ' '))
-            available_indices = []
-            for start_index in all_start_indices:
-                if not any(is_covered[start_index:start_index + len(numeric_keyword)]):
-                    available_indices.append(start_index)
-                    is_covered[start_index:start_index + len(numeric_keyword)] = True
-            if available_indices:
-                numeric_hebrew_to_indices[numeric_keyword] = available_indices
-        return numeric_hebrew_to_indices
-
-    def _to_formatted_str(self, format: str) -> str:
+            pending = [item for item in pending if item[2] < len(item[1])]
+        # number keywords are the space-delimited tokens that are maleh number words
+        keyword_to_indices = {}
+        start_index = 0
+        for token in self.verse.text.split(' '):
+            entry = lookup(token) if token else None
+            if entry is not None and entry.category & Category.MALEH_NUMBER \
+                    and covered.add_if_free(start_index, start_index + len(token)):
+                keyword_to_indices.setdefault(token, []).append(start_index)
+            start_index += len(token) + 1
+        return numeric_hebrews_and_indices + list(keyword_to_indices.items())
+
+    def render(self, formats: Iterable[str] = FORMATS) -> Dict[str, str]:
+        """
+        Render the verse in each of the formats, in one left-to-right pass over the highlighted spans.
+        """
+        formats = tuple(formats)
+        if not set(formats) <= set(FORMATS):
+            raise ValueError("Invalid format")
         text = self.verse.text
-        numeric_hebrew_to_indices = self.map_numeric_hebrews()
         indices_to_numeric_hebrew_and_is_first = {index: (numeric_hebrew, k == 0)
-                                                  for numeric_hebrew, indices in numeric_hebrew_to_indices.items()
+                                                  for numeric_hebrew, indices in self.map_numeric_hebrews()
                                                   for k, index in enumerate(indices)}
-        text_len = len(remove_nikud(text))
+        builders = {format: [] for format in formats}
+        position = 0
+        brackets_len = 0
         for start_index, (numeric_hebrew, is_first) in sorted(indices_to_numeric_hebrew_and_is_first.items(),
-                                                              key=lambda x: x[0], reverse=True):
+                                                              key=lambda x: x[0]):
             is_keyword = isinstance(numeric_hebrew, str)
             if is_keyword:
                 quote = numeric_hebrew
@@ -128,33 +277,26 @@ class VerseAndNumericHebrews:
                 else:
                     bracket = f" [{num}]"
             assert quote == text[start_index:start_index + len(quote)]
-            if format == "html":
-                if not is_keyword:
-                    color = "blue" if is_first else "cyan"
-                else:
-                    color = "orange"
-                highlighted_text = f"<span style='color:{color}'>{quote}</span>"
-                if bracket:
-                    bracket_color = "green"
-                    highlighted_text += f"<span style='color:{bracket_color}'>{bracket}</span>"
-            elif format == "color_text":
-                if not is_keyword:
-                    color = UNIQUE_QUOTE_COLOR if is_first else REPEATED_QUOTE_COLOR
-                else:
-                    color = NUMBER_KEYWORD_COLOR
-                highlighted_text = f"{color}{quote}{RESET}"
-                if bracket:
-                    highlighted_text += f"{NUMBER_COLOR}{bracket}{RESET}"
-            elif format == "text":
-                highlighted_text = f"({quote}){bracket}"
-                text_len += 2
-            else:
-                raise ValueError("Invalid format")
-            text_len += len(bracket)
-            text = text[:start_index] + highlighted_text + text[start_index + len(quote):]
-        if format != "html":
-            text = " " * (WIDTH - text_len) + text
-        return text
+            preceding_text = text[position:start_index]
+            for format, builder in builders.items():
+                builder.append(preceding_text)
+                builder.append(_highlight(format, quote, bracket, is_keyword, is_first))
+            position = start_index + len(quote)
+            brackets_len += len(bracket)
+
+        rendered = {}
+        text_len = get_length_without_nikud(text) + brackets_len
+        for format, builder in builders.items():
+            builder.append(text[position:])
+            rendered_text = ''.join(builder)
+            if format != "html":
+                padding = WIDTH - text_len - (2 * len(indices_to_numeric_hebrew_and_is_first) if format == "text" else 0)
+                rendered_text = " " * padding + rendered_text
+            rendered[format] = rendered_text
+        return rendered
+
+    def _to_formatted_str(self, format: str) -> str:
+        return self.render((format, ))[format]
 
     def to_colored_text(self) -> str:
         return self._to_formatted_str("color_text")
@@ -163,18 +305,19 @@ class VerseAndNumericHebrews:
         return self._to_formatted_str("text")
 
     def to_html(self) -> Tuple[str, str]:
-        verse_html = self._to_formatted_str("html")
+        return self._to_formatted_str("html"), self.get_location_html()
+
+    def get_location_html(self) -> str:
         html = '<a href="{link}" target="_blank">{location}</a>'
         location = f"{self.verse.book} {self.verse.chapter} {self.verse.letter}"
         booknum = get_book_num(self.verse.book)
         link = (f"https://www.mgketer.org/mikra/{booknum}/"
                 f"{convert_hebrew_string_to_num(self.verse.chapter)}/"
                 f"{convert_hebrew_string_to_num(self.verse.letter)}")
-        location_html = html.format(link=link, location=location)
-        return verse_html, location_html
+        return html.format(link=link, location=location)
 
 
-@dataclass
+@dataclass(frozen=True)
 class Time:
     years: int = None
     months: int = None
@@ -263,6 +406,22 @@ class Time:
         other = self._convert_to_time(other)
         return self.years == other.years and self.months == other.months and self.days == other.days and self.is_date == other.is_date
 
+    def pack(self) -> tuple:
+        """The fields of the time as a TIME_DTYPE record (None fields are 0, and unset in the units mask)."""
+        if any(value is not None and value != int(value) for value in (self.years, self.months, self.days)):
+            raise ValueError(f"Only whole units can be packed: {self!r}")
+        units = (YEARS if self.years is not None else 0) | (MONTHS if self.months is not None else 0) \
+            | (DAYS if self.days is not None else 0)
+        return self.years or 0, self.months or 0, self.days or 0, units, self.is_date
+
+    @classmethod
+    def unpack(cls, packed) -> Time:
+        years, months, days, units, is_date = packed
+        return cls(int(years) if units & YEARS else None,
+                   int(months) if units & MONTHS else None,
+                   int(days) if units & DAYS else None,
+                   bool(is_date))
+
     def to_number(self, in_days=False):
         total_days = 0
         if self.years:
@@ -278,3 +437,53 @@ class Time:
         if self.months:
             return total_days / 30
         return total_days
+
+
+# Bits of the units mask of a packed Time: which of the fields are set
+YEARS = 1
+MONTHS = 2
+DAYS = 4
+
+TIME_DTYPE = np.dtype([
+    ('years', np.int64),
+    ('months', np.int64),
+    ('days', np.int64),
+    ('units', np.uint8),
+    ('is_date', np.bool_),
+])
+
+
+class TimeArray:
+    """
+    Times packed in a NumPy structured array (TIME_DTYPE), with vectorized conversions.
+    Indexing returns a Time.
+    """
+
+    def __init__(self, packed: np.ndarray):
+        self.packed = packed
+
+    @classmethod
+    def from_times(cls, times: Iterable[Time]) -> TimeArray:
+        return cls(np.array([time.pack() for time in times], dtype=TIME_DTYPE))
+
+    def __len__(self):
+        return len(self.packed)
+
+    def __getitem__(self, index) -> Time:
+        return Time.unpack(self.packed[index])
+
+    def __iter__(self):
+        return (Time.unpack(packed) for packed in self.packed)
+
+    def to_days(self) -> np.ndarray:
+        return self.packed['years'] * 365 + self.packed['months'] * 30 + self.packed['days']
+
+    def dominant_unit(self) -> np.ndarray:
+        """YEARS, MONTHS or DAYS: the largest unit with a non-zero value (the unit of `to_number`)."""
+        return np.where(self.packed['years'] != 0, YEARS, np.where(self.packed['months'] != 0, MONTHS, DAYS))
+
+    def to_number(self) -> np.ndarray:
+        """Vectorized Time.to_number: the total time, in the dominant unit."""
+        dominant_unit = self.dominant_unit()
+        days_in_unit = np.select([dominant_unit == YEARS, dominant_unit == MONTHS], [365, 30], 1)
+        return self.to_days() / days_in_unit
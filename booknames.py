@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import List
 
 BOOK_NAMES = None
@@ -6,7 +7,7 @@ BOOK_NAMES = None
 def get_book_names() -> List[str]:
     global BOOK_NAMES
     if BOOK_NAMES is None:
-        books_folder = "bible_book_names.txt"
+        books_folder = Path(__file__).parent / "bible_book_names.txt"
         with open(books_folder, "r", encoding="utf-8") as file:
             book_names = file.readlines()
         BOOK_NAMES = [name.strip() for name in book_names if name.strip()]
@@ -0,0 +1,130 @@
+"""
+The static files of a site build: each file is written with precompressed variants (for servers that serve
+<file>.gz / <file>.xz as is), data assets get content-hashed names (so they can be cached forever), and a manifest
+maps the logical names to the written files.
+
+Files whose content did not change are not re-written, so repeated builds only touch what changed.
+"""
+import gzip
+import hashlib
+import json
+import lzma
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from utils import write_atomically
+
+MANIFEST_FILE_NAME = 'manifest.json'
+HASH_LENGTH = 12
+
+# the files are small, so a large lzma dictionary only costs time (preset 9 allocates 64MiB for each file)
+XZ_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 9, 'dict_size': 1 << 20}]
+
+COMPRESSIONS = {
+    'gzip': ('.gz', lambda content: gzip.compress(content, compresslevel=9, mtime=0)),
+    'xz': ('.xz', lambda content: lzma.compress(content, filters=XZ_FILTERS)),
+}
+
+
+class ArtifactSize(NamedTuple):
+    name: str  # the logical name, e.g. 'data/index.json'
+    file: str  # the written file, e.g. 'data/index.3f2a9c0d1b7e.json'
+    size: int
+    compressed_sizes: Dict[str, int]  # per compression (only the variants that are smaller than the file)
+    is_written: bool  # False if the file was unchanged
+
+
+def get_hashed_name(name: str, content: bytes) -> str:
+    path = Path(name)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return str(path.with_name(f'{path.stem}.{digest}{path.suffix}'))
+
+
+def _is_unchanged(file_name: Path, content: bytes) -> bool:
+    return file_name.exists() and file_name.read_bytes() == content
+
+
+class BuildOutput:
+    """
+    Writes the files of a build into `directory`. `close` removes the hashed files of the previous build that
+    were not written again, and writes the manifest.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        manifest_file = self.directory / MANIFEST_FILE_NAME
+        self.previous_manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+        self.artifacts: Dict[str, ArtifactSize] = {}
+
+    def __enter__(self):
+        return self
+
+    def write(self, name: str, content: bytes, hashed: bool = False) -> str:
+        """
+        Write the file (and its compressed variants), and return its name relative to the directory.
+        """
+        file = get_hashed_name(name, content) if hashed else name
+        file_name = self.directory / file
+        is_unchanged = _is_unchanged(file_name, content)
+        # the variants are written first, so an existing variant of an unchanged file is up to date
+        compressed_sizes = {}
+        for compression, (suffix, compress) in COMPRESSIONS.items():
+            variant_file_name = file_name.with_name(file_name.name + suffix)
+            if is_unchanged and variant_file_name.exists():
+                compressed_sizes[compression] = variant_file_name.stat().st_size
+                continue
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                write_atomically(variant_file_name, compressed)
+                compressed_sizes[compression] = len(compressed)
+            elif variant_file_name.exists():
+                variant_file_name.unlink()
+        if not is_unchanged:
+            write_atomically(file_name, content)
+        self.artifacts[name] = ArtifactSize(name, file, len(content), compressed_sizes, not is_unchanged)
+        return file
+
+    def _remove_stale_files(self):
+        # only the hashed files (whose file is not their logical name): the directory may have other files of the
+        # same names, e.g. the pages of create_book_pages
+        files = {artifact.file for artifact in self.artifacts.values()}
+        for name, entry in self.previous_manifest.items():
+            if entry['file'] == name or entry['file'] in files:
+                continue
+            file_name = self.directory / entry['file']
+            for stale_file_name in [file_name] + [file_name.with_name(file_name.name + suffix)
+                                                  for suffix, _ in COMPRESSIONS.values()]:
+                if stale_file_name.exists():
+                    stale_file_name.unlink()
+
+    def close(self):
+        self._remove_stale_files()
+        manifest = {name: dict(file=artifact.file, size=artifact.size, **artifact.compressed_sizes)
+                    for name, artifact in sorted(self.artifacts.items())}
+        content = json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8')
+        if not _is_unchanged(self.directory / MANIFEST_FILE_NAME, content):
+            write_atomically(self.directory / MANIFEST_FILE_NAME, content)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+    def get_size_report(self, max_rows: int = 10) -> str:
+        """
+        The sizes of the artifacts (the largest `max_rows`, and the totals).
+        """
+        artifacts: List[ArtifactSize] = sorted(self.artifacts.values(), key=lambda artifact: -artifact.size)
+        compressions = list(COMPRESSIONS)
+        lines = [f"{'artifact':<40} {'bytes':>10} " + ' '.join(f'{c:>10}' for c in compressions) + '  written']
+        for artifact in artifacts[:max_rows]:
+            lines.append(f"{artifact.file:<40} {artifact.size:>10,} "
+                         + ' '.join(f"{artifact.compressed_sizes.get(c, artifact.size):>10,}" for c in compressions)
+                         + f"  {'yes' if artifact.is_written else 'no'}")
+        if len(artifacts) > max_rows:
+            lines.append(f"... {len(artifacts) - max_rows} more")
+        total = f"total ({len(artifacts)} files)"
+        lines.append(f"{total:<40} {sum(artifact.size for artifact in artifacts):>10,} "
+                     + ' '.join(f"{sum(a.compressed_sizes.get(c, a.size) for a in artifacts):>10,}"
+                                for c in compressions)
+                     + f"  {sum(artifact.is_written for artifact in artifacts)} written")
+        return '\n'.join(lines)
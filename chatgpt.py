@@ -1,15 +1,20 @@
 # Call chatgpt
 
-from typing import List, Optional
+import json
+import time
+from typing import List, Optional, Union
 
 import openai
 
 from openai import OpenAIError
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from openai.types import CompletionUsage
 
-from bible_types import Verse, Verses, NumericHebrew
-from read_bible import clean_text
+from bible_types import Verse, Verses, NumericHebrew, ListOfNumericHebrew
+from read_bible import clean_text, get_bible
 from bible_utils import search_in_bible
+from response_cache import ResponseCache, get_response_key
+from llm_metrics import BatchRecord, LLMMetrics
 
 MODEL = "gpt-4o"
 
@@ -18,8 +23,8 @@ API_KEY = "YOUR KEY HERE"
 SYSTEM_PROMPT = "You are a bible expert. Respond in json. Use hebrew"
 
 EXAMPLE_VERSES = [
-    search_in_bible("ארבע מאות ושבעים אלף איש שולף חרב", expected=1)[0],
-    search_in_bible("ויהיו כל ימי אדם אשר חי תשע מאות שנה ושלושים שנה וימות", expected=1)[0],
+    search_in_bible("ארבע מאות ושבעים אלף איש שולף חרב", get_bible(), expected=1)[0],
+    search_in_bible("ויהיו כל ימי אדם אשר חי תשע מאות שנה ושלושים שנה וימות", get_bible(), expected=1)[0],
 ]
 
 
@@ -33,6 +38,10 @@ EXAMPLE_ALL_NUMBERS = [
 ]
 
 
+class ResponseParseError(Exception):
+    """A response that does not parse into the response format (invalid json, or a refusal)."""
+
+
 def check_match(verse: Verse, numeric_hebrew: NumericHebrew) -> Optional[bool]:
     if verse.book == numeric_hebrew.book and verse.chapter == numeric_hebrew.chapter \
             and verse.letter == numeric_hebrew.letter:
@@ -50,12 +59,12 @@ def get_matching_verse(verses: List[Verse], numeric_hebrew: NumericHebrew) -> Op
     return None
 
 
-def get_numbers_from_verses_using_llm(verses: List[Verse]) -> List[NumericHebrew]:
+def get_prompt_prefix() -> str:
+    """
+    The instructions and the example, the same for all the requests (and first, so the provider can cache them).
+    """
     message = ''
-    message += 'Here are some verses from the Bible that all cite numerical values:\n\n'
-    for num, verse in enumerate(verses):
-        message += str(verse) + '\n'
-    message += '\n'
+    message += 'You will be given some verses from the Bible that all cite numerical values.\n\n'
     message += 'Identify all the numbers in each of the verses and provide their values in JSON format, like this.\n\n'
     message += \
         '{"all_numbers": [\n' \
@@ -67,7 +76,7 @@ def get_numbers_from_verses_using_llm(verses: List[Verse]) -> List[NumericHebrew
         '    "number": <the quoted number, int>,\n' \
         '    "entity": "<the counted entity>"\n' \
         '},\n' \
-        'etc for all numbers you can find in above provided verses\n' \
+        'etc for all numbers you can find in the provided verses\n' \
         ']}\n\n'
 
     message += 'For example, if the verses were:\n\n'
@@ -82,13 +91,84 @@ def get_numbers_from_verses_using_llm(verses: List[Verse]) -> List[NumericHebrew
 
     message += \
         "\nNote that each provided versus could have more than one number. "
+    message += VERSES_HEADER
+    return message
+
+
+VERSES_HEADER = '\n\nHere are the verses:\n\n'
+PROMPT_PREFIX = get_prompt_prefix()
+
+
+def get_prompt(verses: List[Verse]) -> str:
+    return PROMPT_PREFIX + ''.join(get_verse_line(verse) for verse in verses)
 
-    response = get_response(message, response_format=ListOfNumericHebrew)
 
-    return response.all_numbers
+def get_verse_line(verse: Verse) -> str:
+    return str(verse) + '\n'
 
 
-def get_response(user_prompt, system_prompt=SYSTEM_PROMPT, api_key=API_KEY, model=MODEL, response_format=None):
+def get_numbers_from_verses_using_llm(verses: List[Verse], cache: ResponseCache = None,
+                                      metrics: Union[LLMMetrics, BatchRecord] = None) -> List[NumericHebrew]:
+    response = get_response(get_prompt(verses), response_format=ListOfNumericHebrew, cache=cache, metrics=metrics)
+
+    return [NumericHebrew.from_model(model) for model in response.all_numbers]
+
+
+async def get_numbers_from_verses_using_llm_async(verses: List[Verse], client: AsyncOpenAI,
+                                                  cache: ResponseCache = None,
+                                                  metrics: Union[LLMMetrics, BatchRecord] = None) \
+        -> List[NumericHebrew]:
+    """
+    As get_numbers_from_verses_using_llm, with an async client. Errors (OpenAIError, ResponseParseError) are raised,
+    to be retried.
+    """
+    response = await get_response_async(client, get_prompt(verses), response_format=ListOfNumericHebrew, cache=cache,
+                                        metrics=metrics)
+    return [NumericHebrew.from_model(model) for model in response.all_numbers]
+
+
+def get_cached_numbers(verses: List[Verse], cache: ResponseCache) -> Optional[List[NumericHebrew]]:
+    """The numbers of the verses if their response is cached (None if not; not counted as a miss)."""
+    key = get_response_key(MODEL, SYSTEM_PROMPT, get_prompt(verses), ListOfNumericHebrew)
+    if key not in cache:
+        return None
+    response = cache.get(key, ListOfNumericHebrew)
+    return None if response is None else [NumericHebrew.from_model(model) for model in response.all_numbers]
+
+
+def _observe_request(metrics, model: str, start: float, usage=None, error: Exception = None,
+                     parse_failure: bool = False):
+    if metrics is not None:
+        metrics.observe_request(model, time.perf_counter() - start,
+                                prompt_tokens=usage.prompt_tokens if usage else 0,
+                                completion_tokens=usage.completion_tokens if usage else 0,
+                                error=type(error).__name__ if error is not None else None,
+                                parse_failure=parse_failure)
+
+
+def _get_usage(raw_response) -> Optional[CompletionUsage]:
+    """The usage of a response, from its json (for a response that does not parse, which is billed all the same)."""
+    try:
+        return CompletionUsage.model_validate(json.loads(raw_response.text)['usage'])
+    except (AttributeError, ValueError, KeyError, TypeError):  # no response, or one without usage
+        return None
+
+
+def _get_messages(system_prompt: str, user_prompt: str) -> List[dict]:
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": user_prompt,
+        },
+    ]
+
+
+def get_response(user_prompt, system_prompt=SYSTEM_PROMPT, api_key=API_KEY, model=MODEL, response_format=None,
+                 cache: ResponseCache = None, metrics: Union[LLMMetrics, BatchRecord] = None):
     """
     Get a response from the ChatGPT-4 model.
 
@@ -98,33 +178,86 @@ def get_response(user_prompt, system_prompt=SYSTEM_PROMPT, api_key=API_KEY, mode
     api_key (str): The OpenAI API key.
     model (str): The model to use.
     is_json (bool): Whether the response should be in JSON format.
+    cache (ResponseCache): The cache of the responses (None for no cache).
+    metrics (LLMMetrics or BatchRecord): Records the latency, tokens and errors of the request (None for none).
 
     Returns:
-    dict: The response from the model.
+    dict: The response from the model (None on an error, or a response that does not parse).
     """
+    if cache is not None:
+        key = get_response_key(model, system_prompt, user_prompt, response_format)
+        cached = cache.get(key, response_format)
+        if cached is not None:
+            if metrics is not None:
+                metrics.observe_cache_hit()
+            return cached
+
     openai.api_key = api_key
 
+    start = time.perf_counter()
+    raw_response = None
     try:
         client = OpenAI(api_key=api_key)
-        response = client.beta.chat.completions.parse(
+        raw_response = client.beta.chat.completions.with_raw_response.parse(
             model=model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ],
+            messages=_get_messages(system_prompt, user_prompt),
             response_format=response_format,
         )
+        response = raw_response.parse()
     except OpenAIError as e:
+        _observe_request(metrics, model, start, error=e)
         print(f"An error occurred: {e}")
         return None
+    except ValueError as e:  # the content does not validate as the response format
+        _observe_request(metrics, model, start, _get_usage(raw_response), parse_failure=True)
+        print(f"Failed to parse the response: {e}")
+        return None
 
-    return response.choices[0].message.parsed
+    parsed = response.choices[0].message.parsed
+    _observe_request(metrics, model, start, response.usage, parse_failure=parsed is None)
+    if parsed is None:
+        print(f"Failed to parse the response: {response.choices[0].message.refusal}")
+        return None
+    if cache is not None:
+        cache.put(key, parsed, time.perf_counter() - start)
+    return parsed
+
+
+async def get_response_async(client: AsyncOpenAI, user_prompt, system_prompt=SYSTEM_PROMPT, model=MODEL,
+                             response_format=None, cache: ResponseCache = None,
+                             metrics: Union[LLMMetrics, BatchRecord] = None):
+    """As get_response, with an async client, raising the errors (OpenAIError, ResponseParseError)."""
+    if cache is not None:
+        key = get_response_key(model, system_prompt, user_prompt, response_format)
+        cached = cache.get(key, response_format)
+        if cached is not None:
+            if metrics is not None:
+                metrics.observe_cache_hit()
+            return cached
+
+    start = time.perf_counter()
+    raw_response = None
+    try:
+        raw_response = await client.beta.chat.completions.with_raw_response.parse(
+            model=model,
+            messages=_get_messages(system_prompt, user_prompt),
+            response_format=response_format,
+        )
+        response = raw_response.parse()
+    except OpenAIError as e:
+        _observe_request(metrics, model, start, error=e)
+        raise
+    except ValueError as e:  # the content does not validate as the response format
+        _observe_request(metrics, model, start, _get_usage(raw_response), parse_failure=True)
+        raise ResponseParseError(str(e)) from e
+
+    parsed = response.choices[0].message.parsed
+    _observe_request(metrics, model, start, response.usage, parse_failure=parsed is None)
+    if parsed is None:
+        raise ResponseParseError(response.choices[0].message.refusal)
+    if cache is not None:
+        cache.put(key, parsed, time.perf_counter() - start)
+    return parsed
 
 
 def test_chatgpt():
@@ -1,12 +1,14 @@
 import numpy as np
 
+from bible_types import VerseAndNumericHebrews
 from read_bible import clean_text
-from verses_to_matches import load_or_create_verses_to_numerics
-from view import print_verse_with_numbers
+from results_store import open_results_store
 
 
 def check_multi_match(verse, numeric_hebrews):
     for numeric_hebrew in numeric_hebrews:
+        if numeric_hebrew.has_span:
+            continue  # located by the parser
         quote = clean_text(numeric_hebrew.quote)
         if verse.text.count(quote) != 1:
             return False
@@ -16,14 +18,17 @@ def check_multi_match(verse, numeric_hebrews):
 def check_overlapping_matches(verse, numeric_hebrews):
     coverage = np.zeros(len(verse.text), dtype=int)
     for numeric_hebrew in numeric_hebrews:
-        quote = clean_text(numeric_hebrew.quote)
-        start = verse.text.find(quote)
-        end = start + len(quote)
+        if numeric_hebrew.has_span:
+            start, end = numeric_hebrew.start, numeric_hebrew.end
+        else:
+            quote = clean_text(numeric_hebrew.quote)
+            start = verse.text.find(quote)
+            end = start + len(quote)
         coverage[start:end] += 1
     return np.all(coverage <= 1)
 
 
-verses_to_matches = load_or_create_verses_to_numerics()
-for verse, numeric_hebrews in verses_to_matches.items():
-    if not check_overlapping_matches(verse, numeric_hebrews):
-        print_verse_with_numbers(verse, numeric_hebrews)
+with open_results_store() as store:
+    for verse, numeric_hebrews in store:
+        if not check_overlapping_matches(verse, numeric_hebrews):
+            print(VerseAndNumericHebrews(verse, numeric_hebrews).to_colored_text())
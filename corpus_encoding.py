@@ -0,0 +1,197 @@
+"""
+A one-time integer encoding of the Bible.
+
+Each edition (nikud/maleh, with/without punctuations) is encoded as a vocabulary of its words and a flat int32
+array of token ids, with the token offsets of each verse and the character span of each token in its verse.
+The per-word attributes (conjugate letters, lexicon category and value) are precomputed for the vocabulary,
+so filtering the corpus by a category is a vectorized array lookup.
+
+The arrays are saved as .npy files under the cache directory, and are loaded memory-mapped.
+"""
+from __future__ import annotations
+
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from bible_types import Verses
+from read_bible import get_bible, get_books_fingerprint
+from utils import CACHE_DIRECTORY, get_fingerprint, write_atomically
+
+ENCODING_VERSION = 1
+ENCODING_DIRECTORY = CACHE_DIRECTORY / 'corpus_encoding'
+WORD_PATTERN = re.compile(r'[\u0590-\u05FF]+')  # the words of tokenize_words_and_punctuations
+
+NO_VALUE = -1
+
+# The arrays of an encoding, each saved in its own .npy file
+ARRAY_NAMES = (
+    'vocabulary',  # str, per word
+    'token_ids',  # int32, per token
+    'verse_offsets',  # int64, per verse + 1: the tokens of verse i are token_ids[verse_offsets[i]:verse_offsets[i+1]]
+    'char_starts',  # int32, per token: the start of the token in the text of its verse
+    'char_ends',  # int32, per token
+    'prefix_letters',  # uint8, per word: bit i is set if the i-th ConjugateLetter is prefixed to the word
+    'prefix_lengths',  # uint8, per word: the number of conjugate letters
+    'categories',  # int32, per word: lexicon Category flags (0 for words not in the lexicon)
+    'values',  # int64, per word: the numeric value (NO_VALUE if none)
+)
+
+
+class CorpusEncoding:
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self._word_ids = None
+
+    @classmethod
+    def load(cls, directory: Path) -> CorpusEncoding:
+        return cls({name: np.load(directory / f'{name}.npy', mmap_mode='r') for name in ARRAY_NAMES})
+
+    def save(self, directory: Path):
+        for name in ARRAY_NAMES:
+            buffer = BytesIO()
+            np.save(buffer, getattr(self, name))
+            write_atomically(directory / f'{name}.npy', buffer.getvalue())
+
+    @property
+    def num_verses(self) -> int:
+        return len(self.verse_offsets) - 1
+
+    @property
+    def word_ids(self) -> Dict[str, int]:
+        if self._word_ids is None:
+            self._word_ids = {str(word): word_id for word_id, word in enumerate(self.vocabulary)}
+        return self._word_ids
+
+    def get_verse_token_ids(self, verse_index: int) -> np.ndarray:
+        return self.token_ids[self.verse_offsets[verse_index]:self.verse_offsets[verse_index + 1]]
+
+    def get_verse_words(self, verse_index: int) -> List[str]:
+        return [str(self.vocabulary[token_id]) for token_id in self.get_verse_token_ids(verse_index)]
+
+    def get_verse_indices_of_tokens(self, token_indices: np.ndarray) -> np.ndarray:
+        return np.searchsorted(self.verse_offsets, token_indices, side='right') - 1
+
+    def get_verse_indices_with_category(self, category: int) -> np.ndarray:
+        """
+        The (sorted) indices of the verses with at least one word of the given Category flags.
+        """
+        is_word_of_category = (self.categories & category) != 0
+        token_indices = np.flatnonzero(is_word_of_category[self.token_ids])
+        return np.unique(self.get_verse_indices_of_tokens(token_indices))
+
+    def find_phrase(self, words: Iterable[str]) -> np.ndarray:
+        """
+        The (sorted) indices of the verses containing the words as consecutive tokens.
+        """
+        word_ids = [self.word_ids.get(word) for word in words]
+        if not word_ids or None in word_ids:
+            return np.empty(0, dtype=np.int64)
+        num_words = len(word_ids)
+        starts = np.flatnonzero(self.token_ids[:len(self.token_ids) - num_words + 1] == word_ids[0])
+        for i, word_id in enumerate(word_ids[1:], start=1):
+            starts = starts[self.token_ids[starts + i] == word_id]
+        verse_indices = self.get_verse_indices_of_tokens(starts)
+        is_within_verse = starts + num_words <= self.verse_offsets[verse_indices + 1]
+        return np.unique(verse_indices[is_within_verse])
+
+
+def encode_verses(verses: Verses) -> CorpusEncoding:
+    from lexicon import get_lexicon
+    from programmatic_nikud import ConjugateLetter
+
+    word_ids = {}
+    token_ids, char_starts, char_ends, verse_offsets = [], [], [], [0]
+    for verse in verses:
+        for match in WORD_PATTERN.finditer(verse.text):
+            token_ids.append(word_ids.setdefault(match.group(), len(word_ids)))
+            char_starts.append(match.start())
+            char_ends.append(match.end())
+        verse_offsets.append(len(token_ids))
+
+    vocabulary = list(word_ids)
+    letter_bits = {letter: 1 << i for i, letter in enumerate(ConjugateLetter)}
+    prefix_letters = np.zeros(len(vocabulary), dtype=np.uint8)
+    prefix_lengths = np.zeros(len(vocabulary), dtype=np.uint8)
+    categories = np.zeros(len(vocabulary), dtype=np.int32)
+    values = np.full(len(vocabulary), NO_VALUE, dtype=np.int64)
+    lexicon = get_lexicon()
+    for word_id, word in enumerate(vocabulary):
+        entry = lexicon.lookup(word)
+        if entry is None:
+            continue
+        prefix_letters[word_id] = sum(letter_bits[letter] for letter in set(entry.conjugate_letters))
+        prefix_lengths[word_id] = len(entry.conjugate_letters)
+        categories[word_id] = entry.category
+        if entry.value is not None:
+            values[word_id] = entry.value
+
+    return CorpusEncoding(dict(
+        vocabulary=np.array(vocabulary, dtype=str),
+        token_ids=np.array(token_ids, dtype=np.int32),
+        verse_offsets=np.array(verse_offsets, dtype=np.int64),
+        char_starts=np.array(char_starts, dtype=np.int32),
+        char_ends=np.array(char_ends, dtype=np.int32),
+        prefix_letters=prefix_letters,
+        prefix_lengths=prefix_lengths,
+        categories=categories,
+        values=values,
+    ))
+
+
+ENCODINGS = dict()
+
+
+def get_corpus_encoding(with_nikud: bool = False, remove_punctuations: bool = True) -> CorpusEncoding:
+    """
+    The encoding of an edition of the Bible. Its verse indices are the indices of `get_bible` of the same edition.
+    """
+    key = (with_nikud, remove_punctuations)
+    if key not in ENCODINGS:
+        ENCODINGS[key] = _load_or_create_encoding(with_nikud, remove_punctuations)
+    return ENCODINGS[key]
+
+
+def _get_encoding_fingerprint(with_nikud: bool, remove_punctuations: bool) -> str:
+    from lexicon import get_tables_fingerprint
+    name = "books_nikud" if with_nikud else "books_maleh"
+    return get_fingerprint(ENCODING_VERSION, remove_punctuations, get_books_fingerprint(name),
+                           get_tables_fingerprint())
+
+
+def _load_or_create_encoding(with_nikud: bool, remove_punctuations: bool) -> CorpusEncoding:
+    directory = ENCODING_DIRECTORY / \
+        f'{"nikud" if with_nikud else "maleh"}_{"clean" if remove_punctuations else "raw"}'
+    fingerprint_file = directory / 'fingerprint.txt'
+    fingerprint = _get_encoding_fingerprint(with_nikud, remove_punctuations)
+    if fingerprint_file.exists() and fingerprint_file.read_text() == fingerprint:
+        try:
+            return CorpusEncoding.load(directory)
+        except (OSError, ValueError):  # a missing or truncated array file
+            pass
+    encoding = encode_verses(get_bible(with_nikud=with_nikud, remove_punctuations=remove_punctuations))
+    # the fingerprint is written last, so an interrupted save is re-created
+    if fingerprint_file.exists():
+        fingerprint_file.unlink()
+    encoding.save(directory)
+    write_atomically(fingerprint_file, fingerprint.encode('utf-8'))
+    return CorpusEncoding.load(directory)
+
+
+def get_verses_with_category(category: int, with_nikud: bool = False, remove_punctuations: bool = True) -> Verses:
+    verses = get_bible(with_nikud=with_nikud, remove_punctuations=remove_punctuations)
+    verse_indices = get_corpus_encoding(with_nikud, remove_punctuations).get_verse_indices_with_category(category)
+    return [verses[i] for i in verse_indices]
+
+
+if __name__ == "__main__":
+    for with_nikud in [True, False]:
+        for remove_punctuations in [True, False]:
+            encoding = get_corpus_encoding(with_nikud, remove_punctuations)
+            print(f"nikud={with_nikud}, remove_punctuations={remove_punctuations}: "
+                  f"{encoding.num_verses} verses, {len(encoding.token_ids)} tokens, "
+                  f"{len(encoding.vocabulary)} words")
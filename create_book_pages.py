@@ -0,0 +1,133 @@
+"""
+One html page per book (or per chapter), with the rows of the book inline, and an index page linking them.
+
+The inputs of each page (its verses and numeric hebrews, the template, RENDER_VERSION and the lexicon tables) are
+fingerprinted; a build re-renders only the pages whose fingerprint changed, from the render cache if given, else in a
+pool of worker processes.
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional
+
+from bible_types import RENDER_VERSION, VerseAndNumericHebrews
+from booknames import get_book_num
+from create_verses_html import HTML_ROW, TEMPLATE, VersesWriter
+from letters_to_num import convert_hebrew_string_to_num
+from lexicon import get_tables_fingerprint
+from render_cache import RenderCache
+from utils import get_fingerprint, write_atomically
+
+PAGES_VERSION = 1
+PAGES_INDEX_FILE_NAME = 'books.html'
+FINGERPRINTS_FILE_NAME = '.book_pages.json'
+
+PAGES_INDEX_HTML = """<!DOCTYPE html>
+<html lang="he" dir="rtl">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>תנ״ך מ10פר</title>
+    <link rel="icon" type="image/png" sizes="64x64" href="favicon.png">
+</head>
+<body style="font-family: Arial, sans-serif; direction: rtl;">
+<ul>
+{links}
+</ul>
+</body>
+</html>
+"""
+PAGES_INDEX_LINK = '    <li><a href="{file_name}">{title}</a> ({num_verses} פסוקים, {num_numbers} מספרים)</li>'
+
+
+class Page(NamedTuple):
+    file_name: str
+    title: str
+    verses_and_numeric_hebrews: List[VerseAndNumericHebrews]
+
+    def get_fingerprint(self, tables_fingerprint: str = None) -> str:
+        if tables_fingerprint is None:
+            tables_fingerprint = get_tables_fingerprint()
+        return get_fingerprint(PAGES_VERSION, RENDER_VERSION, tables_fingerprint, TEMPLATE, HTML_ROW, [
+            (verse_and_numeric_hebrews.verse,
+             [numeric_hebrew.to_dict() for numeric_hebrew in verse_and_numeric_hebrews.numeric_hebrews])
+            for verse_and_numeric_hebrews in self.verses_and_numeric_hebrews
+        ])
+
+
+class BookPagesReport(NamedTuple):
+    num_pages: int
+    num_rendered: int
+    num_removed: int
+
+
+def split_into_pages(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews], by_chapter: bool = False) \
+        -> List[Page]:
+    pages = {}
+    for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+        verse = verse_and_numeric_hebrews.verse
+        if by_chapter:
+            file_name = f'book_{get_book_num(verse.book):02d}_{convert_hebrew_string_to_num(verse.chapter):03d}.html'
+            title = f'{verse.book} {verse.chapter}'
+        else:
+            file_name = f'book_{get_book_num(verse.book):02d}.html'
+            title = verse.book
+        if file_name not in pages:
+            pages[file_name] = Page(file_name, title, [])
+        pages[file_name].verses_and_numeric_hebrews.append(verse_and_numeric_hebrews)
+    return list(pages.values())
+
+
+def _write_page(directory: Path, page: Page, render_cache: Optional[RenderCache] = None):
+    with VersesWriter(html_file_name=str(directory.absolute() / page.file_name), text_file_name=None,
+                      render_cache=render_cache) as writer:
+        for verse_and_numeric_hebrews in page.verses_and_numeric_hebrews:
+            writer.write(verse_and_numeric_hebrews)
+
+
+def _get_pages_index_html(pages: List[Page]) -> str:
+    pages = sorted(pages, key=lambda page: page.file_name)
+    return PAGES_INDEX_HTML.format(links='\n'.join(PAGES_INDEX_LINK.format(
+        file_name=page.file_name,
+        title=page.title,
+        num_verses=len(page.verses_and_numeric_hebrews),
+        num_numbers=sum(len(item.numeric_hebrews) for item in page.verses_and_numeric_hebrews),
+    ) for page in pages))
+
+
+def write_book_pages(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews], directory: Path = Path('docs'),
+                     by_chapter: bool = False, max_workers: Optional[int] = None,
+                     render_cache: Optional[RenderCache] = None) -> BookPagesReport:
+    """
+    Write the pages whose inputs changed since the last build (and the index page), and remove the pages
+    that are no longer built.
+    With a `render_cache`, the pages are written in this process, with the rows of the cache.
+    """
+    directory = Path(directory)
+    fingerprints_file = directory / FINGERPRINTS_FILE_NAME
+    previous_fingerprints = json.loads(fingerprints_file.read_text()) if fingerprints_file.exists() else {}
+    pages = split_into_pages(verses_and_numeric_hebrews, by_chapter)
+    tables_fingerprint = get_tables_fingerprint()
+    fingerprints = {page.file_name: page.get_fingerprint(tables_fingerprint) for page in pages}
+    changed_pages = [page for page in pages if previous_fingerprints.get(page.file_name) != fingerprints[page.file_name]
+                     or not (directory / page.file_name).exists()]
+
+    # the fingerprints of the changed pages are removed first, so an interrupted build re-renders them
+    directory.mkdir(parents=True, exist_ok=True)
+    changed_file_names = {page.file_name for page in changed_pages}
+    write_atomically(fingerprints_file, json.dumps({file_name: fingerprint for file_name, fingerprint
+                                                    in previous_fingerprints.items()
+                                                    if file_name not in changed_file_names}, indent=1).encode('utf-8'))
+    if len(changed_pages) > 1 and max_workers != 1 and render_cache is None:
+        with ProcessPoolExecutor(max_workers) as pool:
+            list(pool.map(_write_page, [directory] * len(changed_pages), changed_pages))
+    else:
+        for page in changed_pages:
+            _write_page(directory, page, render_cache)
+    removed_file_names = set(previous_fingerprints) - set(fingerprints)
+    for file_name in removed_file_names:
+        if (directory / file_name).exists():
+            (directory / file_name).unlink()
+    write_atomically(directory / PAGES_INDEX_FILE_NAME, _get_pages_index_html(pages).encode('utf-8'))
+    write_atomically(fingerprints_file, json.dumps(fingerprints, indent=1).encode('utf-8'))
+    return BookPagesReport(len(pages), len(changed_pages), len(removed_file_names))
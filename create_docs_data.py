@@ -0,0 +1,119 @@
+"""
+The docs search page as a small HTML shell with lazily fetched data (instead of one page with all the rows inline):
+
+    docs/index.html                the template, without rows, loading search.js with the file of the index
+    docs/data/<k>.<hash>.json      shard k: consecutive rows of one book (at most max_rows_per_shard), as
+                                   [location_html, verse_html]
+    docs/data/index.<hash>.json    the shards, and the searchable numbers, sorted, with the row id of each number
+    docs/search.<hash>.js          a copy of docs/search.js
+
+Row ids run over all the rows, in order; the rows of a shard are first_row, ..., first_row + num_rows - 1.
+All the files but index.html have content-hashed names, and are written with compressed variants (see build_output).
+"""
+import json
+import re
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from bible_types import VerseAndNumericHebrews
+from build_output import BuildOutput
+from create_verses_html import TEMPLATE
+from render_cache import RenderCache
+
+DATA_DIRECTORY = 'data'
+INDEX_FILE_NAME = 'index.json'
+SCRIPT_FILE_NAME = 'search.js'
+SCRIPT_SOURCE = Path(__file__).parent / 'docs' / SCRIPT_FILE_NAME  # the source, whatever the output directory
+MAX_ROWS_PER_SHARD = 8  # a search for a single number fetches small shards of many books
+
+SCRIPT_START = "<!-- SCRIPT START -->"
+SCRIPT_END = "<!-- SCRIPT END -->"
+
+# The numbers the search matches: the first integer in each bracket of the verse html (as the inline page did)
+BRACKET_PATTERN = re.compile(r"<span style='color:green'>([^<]*)</span>")
+INTEGER_PATTERN = re.compile(r'\d+')
+
+
+def get_shell(script_file: str, index_file: str, template: str = TEMPLATE) -> str:
+    start_index = template.index(SCRIPT_START) + len(SCRIPT_START)
+    end_index = template.index(SCRIPT_END)
+    return template[:start_index] + f'\n<script src="{script_file}" data-index="{index_file}"></script>\n' \
+        + template[end_index:]
+
+
+def get_searchable_numbers(verse_html: str) -> List[int]:
+    numbers = []
+    for bracket in BRACKET_PATTERN.findall(verse_html):
+        match = INTEGER_PATTERN.search(bracket)
+        if match:
+            numbers.append(int(match.group()))
+    return numbers
+
+
+def _to_json(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class DocsDataWriter:
+    """
+    Streams the rendered rows into shards; the numeric index and the shell are written on exit.
+    """
+
+    def __init__(self, directory: Path = Path('docs'), max_rows_per_shard: int = MAX_ROWS_PER_SHARD,
+                 render_cache: Optional[RenderCache] = None):
+        self.output = BuildOutput(directory)
+        self.max_rows_per_shard = max_rows_per_shard
+        self.render_cache = render_cache
+        self.shards = []  # the entries of the index
+        self.numbers: List[Tuple[int, int]] = []  # (number, row id)
+        self.num_rows = 0
+        self._book = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def write(self, verse_and_numeric_hebrews: VerseAndNumericHebrews):
+        if verse_and_numeric_hebrews.verse.book != self._book or len(self._rows) == self.max_rows_per_shard:
+            self._write_shard()
+            self._book = verse_and_numeric_hebrews.verse.book
+        if self.render_cache is None:
+            verse_html = verse_and_numeric_hebrews.render(('html',))['html']
+        else:
+            verse_html = self.render_cache.render(verse_and_numeric_hebrews, ('html',))['html']
+        self._rows.append([verse_and_numeric_hebrews.get_location_html(), verse_html])
+        self.numbers.extend((number, self.num_rows) for number in get_searchable_numbers(verse_html))
+        self.num_rows += 1
+
+    def _write_shard(self):
+        if not self._rows:
+            return
+        file = self.output.write(f'{DATA_DIRECTORY}/{len(self.shards)}.json',
+                                 _to_json(dict(book=self._book, rows=self._rows)), hashed=True)
+        self.shards.append(dict(file=file, book=self._book, first_row=self.num_rows - len(self._rows),
+                                num_rows=len(self._rows)))
+        self._rows = []
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            return
+        self._write_shard()
+        self.numbers.sort()
+        index = dict(
+            shards=self.shards,
+            values=[number for number, _ in self.numbers],
+            rows=[row for _, row in self.numbers],
+        )
+        index_file = self.output.write(f'{DATA_DIRECTORY}/{INDEX_FILE_NAME}', _to_json(index), hashed=True)
+        script_file = self.output.write(SCRIPT_FILE_NAME, SCRIPT_SOURCE.read_bytes(), hashed=True)
+        self.output.write('index.html', get_shell(script_file, index_file).encode('utf-8'))
+        self.output.close()
+
+
+def write_docs_data(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews], directory: Path = Path('docs'),
+                    max_rows_per_shard: int = MAX_ROWS_PER_SHARD, render_cache: Optional[RenderCache] = None) \
+        -> BuildOutput:
+    with DocsDataWriter(directory, max_rows_per_shard, render_cache) as writer:
+        for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
+            writer.write(verse_and_numeric_hebrews)
+    return writer.output
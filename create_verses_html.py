@@ -1,7 +1,8 @@
 from pathlib import Path
-from typing import List
+from typing import Iterable, Optional
 
 from bible_types import VerseAndNumericHebrews
+from render_cache import RenderCache
 
 START = "    <!-- START -->"
 END = "    <!-- END -->"
@@ -19,26 +20,80 @@ def read_template(file_name: str) -> str:
 TEMPLATE = read_template('docs/template.html')
 
 
-def create_html_of_verses_with_numbers(verses_and_numeric_hebrews: List[VerseAndNumericHebrews],
-                                       file_name='index.html'):
-    all_verses = []
-    for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
-        verse_html, location_html = verse_and_numeric_hebrews.to_html()
-        all_verses.append(f"""
+HTML_ROW = """
         <div class="row">
             <div class="locations">{location_html}</div>
             <div class="verses">{verse_html}</div>
         </div>
-    """)
-    html = TEMPLATE
-    html = html.replace(START, START + '\n' + '\n'.join(all_verses))
-    with open(Path('docs') / file_name, 'w') as file:
-        file.write(html)
+    """
 
 
-def create_text_of_verses_with_numbers(verses_and_numeric_hebrews: List[VerseAndNumericHebrews],
-                                       file_name='verses_with_numbers.txt'):
-    with open(file_name, 'w') as file:
+class VersesWriter:
+    """
+    Streams the rows of the verses into docs/<html_file_name> (inside the template) and/or into text_file_name,
+    without holding the whole output in memory. Rows are taken from the render cache, if given.
+    """
+
+    def __init__(self, html_file_name: Optional[str] = 'index.html',
+                 text_file_name: Optional[str] = 'verses_with_numbers.txt', render_cache: Optional[RenderCache] = None):
+        self.html_file_name = html_file_name
+        self.text_file_name = text_file_name
+        self.render_cache = render_cache
+        self.formats = tuple(format for format, file_name in [('html', html_file_name), ('text', text_file_name)]
+                             if file_name is not None)
+        self.html_file = None
+        self.text_file = None
+        self.num_rows = 0
+
+    def __enter__(self):
+        if self.html_file_name is not None:
+            head, tail = TEMPLATE.split(START)
+            self._html_tail = tail
+            self.html_file = open(Path('docs') / self.html_file_name, 'w')
+            self.html_file.write(head + START + '\n')
+        if self.text_file_name is not None:
+            self.text_file = open(self.text_file_name, 'w')
+        return self
+
+    def write(self, verse_and_numeric_hebrews: VerseAndNumericHebrews):
+        if self.render_cache is None:
+            rendered = verse_and_numeric_hebrews.render(self.formats)
+        else:
+            rendered = self.render_cache.render(verse_and_numeric_hebrews, self.formats)
+        if self.html_file is not None:
+            if self.num_rows:
+                self.html_file.write('\n')
+            self.html_file.write(HTML_ROW.format(location_html=verse_and_numeric_hebrews.get_location_html(),
+                                                 verse_html=rendered['html']))
+        if self.text_file is not None:
+            self.text_file.write(f"{rendered['text']}\n\n")
+        self.num_rows += 1
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.html_file is not None:
+            self.html_file.write(self._html_tail)
+            self.html_file.close()
+        if self.text_file is not None:
+            self.text_file.close()
+
+
+def write_verses_with_numbers(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews],
+                              html_file_name: Optional[str] = 'index.html',
+                              text_file_name: Optional[str] = 'verses_with_numbers.txt',
+                              render_cache: Optional[RenderCache] = None):
+    """
+    Render each verse once, for both the html page and the text file.
+    """
+    with VersesWriter(html_file_name, text_file_name, render_cache) as writer:
         for verse_and_numeric_hebrews in verses_and_numeric_hebrews:
-            verse_text = verse_and_numeric_hebrews.to_text()
-            file.write(f"{verse_text}\n\n")
\ No newline at end of file
+            writer.write(verse_and_numeric_hebrews)
+
+
+def create_html_of_verses_with_numbers(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews],
+                                       file_name='index.html'):
+    write_verses_with_numbers(verses_and_numeric_hebrews, html_file_name=file_name, text_file_name=None)
+
+
+def create_text_of_verses_with_numbers(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews],
+                                       file_name='verses_with_numbers.txt'):
+    write_verses_with_numbers(verses_and_numeric_hebrews, html_file_name=None, text_file_name=file_name)
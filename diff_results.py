@@ -0,0 +1,222 @@
+"""
+A diff of two sets of extraction results (e.g. the LLM results against the programmatic parser), over the whole
+corpus.
+
+The results are aligned by verse reference (older results name the two-part books in the legacy way, see
+get_reference) and by the span of their quote, in words (so results from different editions of a verse, nikud and
+maleh, align): two results are the same number if they start at the same word (or,
+failing that, end at the same word). Each result is then classified as:
+
+    agree           aligned, with the same value
+    value mismatch  aligned, with different values
+    missing         only in the reference
+    extra           only in the candidate
+
+The extraction of the rows is per result; the alignment and the classification are vectorized over all the rows.
+"""
+from __future__ import annotations
+
+import bisect
+import csv
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from bible_types import NumericHebrew, Verse, VerseAndNumericHebrews
+from read_bible import clean_text
+from results_table import ResultsTable
+from utils import CACHE_DIRECTORY
+
+AGREE, VALUE_MISMATCH, MISSING, EXTRA = range(4)
+CATEGORY_NAMES = ('agree', 'value mismatch', 'missing', 'extra')
+
+NOT_LOCATED = -1  # the word span of a quote that is not found in its verse
+# Hebrew letters and nikud, without maqaf (U+05BE), paseq and sof pasuq, which separate words
+WORD_PATTERN = re.compile(r'[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7\u05D0-\u05EA]+')
+
+DIFF_FILE_NAME = CACHE_DIRECTORY / 'results_diff.csv'  # of the LLM results against the parser
+
+VerseReference = Tuple[str, str, str]  # book, chapter, letter
+
+LEGACY_CHAPTER_SEPARATOR = '\xa0'  # of the legacy chapters, that start with the part of the book ('א\xa0ג')
+LEGACY_PARTS = {'עזרא / נחמיה': {'ע': 'עזרא', 'נ': 'נחמיה'}}  # of the books whose parts are not numbered
+
+# The columns of the diff, one value per row (a pair of aligned results, or a result of one side)
+COLUMNS = (
+    'verse',  # int32: index into `references`
+    'category',  # uint8: AGREE, VALUE_MISMATCH, MISSING or EXTRA
+    'word_start',  # int32: the first word of the quote (of the reference if it has one, else of the candidate)
+    'reference_value',  # float64: nan if only in the candidate
+    'candidate_value',  # float64: nan if only in the reference
+    'reference_quote',  # str: '' if only in the candidate
+    'candidate_quote',  # str: '' if only in the reference
+)
+
+
+def get_reference(verse: Verse) -> VerseReference:
+    """
+    The reference of the verse, as in read_bible. The legacy references of the two-part books ('שמואל', 'א\xa0ג')
+    are of the part ('שמואל א', 'ג').
+    """
+    book, chapter = verse.book, verse.chapter
+    if LEGACY_CHAPTER_SEPARATOR in chapter:
+        part, chapter = chapter.split(LEGACY_CHAPTER_SEPARATOR, 1)
+        book = LEGACY_PARTS[book][part] if book in LEGACY_PARTS else f'{book} {part}'
+    return book, chapter, verse.letter
+
+
+def get_word_span(verse: Verse, numeric_hebrew: NumericHebrew) -> Tuple[int, int]:
+    """The words [start, end) of the quote in the verse (by its span, else by finding the quote)."""
+    if numeric_hebrew.has_span:
+        start, end = numeric_hebrew.start, numeric_hebrew.end
+    else:
+        quote = clean_text(numeric_hebrew.quote)
+        start = verse.text.find(quote)
+        if not quote or start < 0:
+            return NOT_LOCATED, NOT_LOCATED
+        end = start + len(quote)
+    words = list(WORD_PATTERN.finditer(verse.text))
+    word_start = bisect.bisect_right([word.end() for word in words], start)
+    word_end = bisect.bisect_left([word.start() for word in words], end)
+    return word_start, word_end
+
+
+class ResultRows:
+    """The results of one side, as arrays: the verse (index into the references), word span, value and quote."""
+
+    def __init__(self, verses_to_numerics: Dict[Verse, List[NumericHebrew]], references: Dict[VerseReference, int]):
+        items = list(verses_to_numerics.items())
+        table = ResultsTable.from_verses_and_numeric_hebrews(
+            VerseAndNumericHebrews(verse, numeric_hebrews) for verse, numeric_hebrews in items)
+        verse_references = np.array([references[get_reference(verse)] for verse, _ in items], dtype=np.int32)
+        self.verse = verse_references[table.verse_index]
+        self.value = table.value
+        spans = [get_word_span(verse, numeric_hebrew) for verse, numeric_hebrews in items
+                 for numeric_hebrew in numeric_hebrews]
+        spans = np.array(spans, dtype=np.int32).reshape(-1, 2)
+        self.word_start, self.word_end = spans[:, 0], spans[:, 1]
+        self.quote = np.array([numeric_hebrew.quote for _, numeric_hebrews in items
+                               for numeric_hebrew in numeric_hebrews], dtype=str)
+
+    def __len__(self):
+        return len(self.value)
+
+
+def _match(left_keys: np.ndarray, right_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """The (left, right) rows with equal keys, one to one (the first of duplicate keys)."""
+    if not len(left_keys) or not len(right_keys):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(right_keys, kind='stable')
+    positions = np.minimum(np.searchsorted(right_keys[order], left_keys), len(right_keys) - 1)
+    left_rows = np.flatnonzero(right_keys[order][positions] == left_keys)
+    right_rows, first = np.unique(order[positions[left_rows]], return_index=True)
+    return left_rows[first], right_rows
+
+
+class ResultsDiff:
+    def __init__(self, columns: Dict[str, np.ndarray], references: List[VerseReference]):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self.references = references
+
+    @classmethod
+    def from_results(cls, reference: Dict[Verse, List[NumericHebrew]], candidate: Dict[Verse, List[NumericHebrew]]) \
+            -> ResultsDiff:
+        references = {}
+        for verse in list(reference) + list(candidate):
+            references.setdefault(get_reference(verse), len(references))
+        left, right = ResultRows(reference, references), ResultRows(candidate, references)
+
+        # a key per row: the verse and a word of the quote (unlocated quotes get keys that match nothing)
+        num_words = max(int(left.word_end.max(initial=0)), int(right.word_end.max(initial=0))) + 1
+        matched_left, matched_right = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        for word_column in ('word_start', 'word_end'):
+            left_keys = left.verse.astype(np.int64) * num_words + getattr(left, word_column)
+            right_keys = right.verse.astype(np.int64) * num_words + getattr(right, word_column)
+            left_keys[left.word_start == NOT_LOCATED] = -1
+            right_keys[right.word_start == NOT_LOCATED] = -2
+            left_rows = np.setdiff1d(np.arange(len(left)), matched_left)
+            right_rows = np.setdiff1d(np.arange(len(right)), matched_right)
+            new_left, new_right = _match(left_keys[left_rows], right_keys[right_rows])
+            matched_left = np.concatenate([matched_left, left_rows[new_left]])
+            matched_right = np.concatenate([matched_right, right_rows[new_right]])
+        missing = np.setdiff1d(np.arange(len(left)), matched_left)
+        extra = np.setdiff1d(np.arange(len(right)), matched_right)
+
+        is_agree = np.isclose(left.value[matched_left], right.value[matched_right])
+        columns = dict(
+            verse=np.concatenate([left.verse[matched_left], left.verse[missing], right.verse[extra]]),
+            category=np.concatenate([np.where(is_agree, AGREE, VALUE_MISMATCH), np.full(len(missing), MISSING),
+                                     np.full(len(extra), EXTRA)]).astype(np.uint8),
+            word_start=np.concatenate([left.word_start[matched_left], left.word_start[missing],
+                                       right.word_start[extra]]),
+            reference_value=np.concatenate([left.value[matched_left], left.value[missing],
+                                            np.full(len(extra), np.nan)]),
+            candidate_value=np.concatenate([right.value[matched_right], np.full(len(missing), np.nan),
+                                            right.value[extra]]),
+            reference_quote=np.concatenate([left.quote[matched_left], left.quote[missing], np.full(len(extra), '')]),
+            candidate_quote=np.concatenate([right.quote[matched_right], np.full(len(missing), ''),
+                                            right.quote[extra]]),
+        )
+        return cls(columns, list(references)).sort()
+
+    def __len__(self):
+        return len(self.category)
+
+    def _take(self, rows: np.ndarray) -> ResultsDiff:
+        return ResultsDiff({name: getattr(self, name)[rows] for name in COLUMNS}, self.references)
+
+    def sort(self, by: Tuple[str, ...] = ('verse', 'word_start'), descending: bool = False) -> ResultsDiff:
+        """The rows sorted by the columns (the first is the primary key)."""
+        order = np.lexsort([getattr(self, name) for name in reversed(by)])
+        return self._take(order[::-1] if descending else order)
+
+    def filter(self, category: Optional[int] = None) -> ResultsDiff:
+        return self._take(np.flatnonzero(self.category == category))
+
+    def count_by_category(self) -> Dict[str, int]:
+        counts = np.bincount(self.category, minlength=len(CATEGORY_NAMES))
+        return {name: int(count) for name, count in zip(CATEGORY_NAMES, counts)}
+
+    @property
+    def agreement_rate(self) -> float:
+        return float(np.mean(self.category == AGREE)) if len(self) else 1.
+
+    def to_csv(self, file_name):
+        references = [self.references[verse] for verse in self.verse.tolist()]
+        with open(file_name, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('book', 'chapter', 'letter') + COLUMNS[1:])
+            for reference, category, *values in zip(references, self.category.tolist(),
+                                                    *[getattr(self, name).tolist() for name in COLUMNS[2:]]):
+                writer.writerow(reference + (CATEGORY_NAMES[category],) + tuple(values))
+
+
+def get_programmatic_results(references) -> Dict[Verse, List[NumericHebrew]]:
+    """The results of the (nikud) parser for the verses of the references."""
+    from programmatic_nikud import GetHebrewNumbers
+    from read_bible import get_bible
+
+    references = set(references)
+    return {verse: GetHebrewNumbers(verse.text).get() for verse in get_bible(with_nikud=True)
+            if (verse.book, verse.chapter, verse.letter) in references}
+
+
+if __name__ == "__main__":
+    import time
+    from results_store import open_results_store
+
+    with open_results_store() as store:
+        llm_results = store.to_dict()
+    start = time.perf_counter()
+    programmatic_results = get_programmatic_results(map(get_reference, llm_results))
+    parse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    diff = ResultsDiff.from_results(llm_results, programmatic_results)
+    diff_time = time.perf_counter() - start
+    print(f"{len(llm_results)} verses, {len(diff)} results: {diff.count_by_category()}, "
+          f"agreement {diff.agreement_rate:.1%} (parse {parse_time:.2f}s, diff {diff_time:.2f}s)")
+    DIFF_FILE_NAME.parent.mkdir(exist_ok=True)
+    diff.sort(('category', 'verse', 'word_start')).to_csv(DIFF_FILE_NAME)
+    print(f"The results in {DIFF_FILE_NAME}")
@@ -0,0 +1,144 @@
+// The search of the sharded page (see create_docs_data.py).
+// The index (data-index of the script tag) holds the searchable numbers, sorted, with the row of each number; the
+// rows themselves are in small json shards of one book each, fetched only when a row of the shard is shown.
+const INDEX_FILE = document.currentScript.dataset.index;
+
+document.addEventListener('DOMContentLoaded', async () => {
+    const searchInput = document.getElementById('searchNumber');
+    const rangeMinInput = document.getElementById('rangeMin');
+    const rangeMaxInput = document.getElementById('rangeMax');
+
+    const searchBtn = document.getElementById('searchBtn');
+    const rangeBtn = document.getElementById('rangeBtn');
+    const resetBtn = document.getElementById('resetBtn');
+
+    const container = document.querySelector('.container');
+    const matchCountSpan = document.getElementById('matchCount');
+    const matchTitle = document.getElementById('matchTitle');
+
+    const PAGE_SIZE = 100;  // rows added to the page each time the end of the page is reached
+
+    const index = await fetch(INDEX_FILE).then(response => response.json());
+    const shardFirstRows = index.shards.map(shard => shard.first_row);
+    const shards = new Map();
+
+    function loadShard(k) {
+        if (!shards.has(k)) {
+            shards.set(k, fetch(index.shards[k].file).then(response => response.json()));
+        }
+        return shards.get(k);
+    }
+
+    // the first position in the sorted array with a value >= x (or > x, if strict)
+    function bisect(array, x, strict) {
+        let lo = 0, hi = array.length;
+        while (lo < hi) {
+            const mid = (lo + hi) >> 1;
+            if (array[mid] < x || (strict && array[mid] === x)) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    function getShardOfRow(row) {
+        return bisect(shardFirstRows, row, true) - 1;
+    }
+
+    // --- Showing the rows ---
+
+    let shownRows = [];
+    let numShown = 0;
+    let generation = 0;  // incremented on each query, so that rows of a previous query are not appended
+    let loading = Promise.resolve();
+
+    function createRow([locationHtml, verseHtml]) {
+        const row = document.createElement('div');
+        row.className = 'row';
+        row.innerHTML = `<div class="locations">${locationHtml}</div><div class="verses">${verseHtml}</div>`;
+        return row;
+    }
+
+    async function showMoreRows() {
+        const queryGeneration = generation;
+        const page = shownRows.slice(numShown, numShown + PAGE_SIZE);
+        numShown += page.length;
+        const pageShards = await Promise.all(page.map(row => getShardOfRow(row)).map(loadShard));
+        if (queryGeneration !== generation) return;
+        const fragment = document.createDocumentFragment();
+        page.forEach((row, i) => {
+            const shardIndex = getShardOfRow(row);
+            fragment.appendChild(createRow(pageShards[i].rows[row - index.shards[shardIndex].first_row]));
+        });
+        container.appendChild(fragment);
+        if (sentinel.getBoundingClientRect().top < window.innerHeight + 1000) queueMoreRows();  // the page is not full yet
+    }
+
+    function queueMoreRows() {
+        loading = loading.then(() => numShown < shownRows.length ? showMoreRows() : null);
+        return loading;
+    }
+
+    const sentinel = document.createElement('div');
+    container.after(sentinel);
+    new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) queueMoreRows();
+    }, { rootMargin: '1000px' }).observe(sentinel);
+
+    function applyRange(min, max) {
+        const start = bisect(index.values, min, false);
+        const end = bisect(index.values, max, true);
+        generation++;
+        shownRows = Array.from(new Set(index.rows.slice(start, end))).sort((a, b) => a - b);
+        numShown = 0;
+        container.replaceChildren();
+        matchCountSpan.textContent = Math.max(end - start, 0);
+        return queueMoreRows();
+    }
+
+    function scrollToResults() {
+        const firstRow = container.querySelector('.row');
+        if (firstRow) {
+            const y = firstRow.getBoundingClientRect().top + window.pageYOffset;
+            window.scrollTo({ top: y - 60, behavior: 'smooth' });  // 60px offset to keep #countStats visible
+        }
+    }
+
+    // --- Event Handlers ---
+
+    searchBtn.addEventListener('click', () => {
+        const v = +searchInput.value;
+        if (!isNaN(v)) {
+            matchTitle.textContent = 'מספר תוצאות מתאימות';
+            applyRange(v, v).then(scrollToResults);
+        }
+    });
+
+    rangeBtn.addEventListener('click', () => {
+        const min = +rangeMinInput.value;
+        const max = +rangeMaxInput.value;
+        if (!isNaN(min) && !isNaN(max)) {
+            matchTitle.textContent = 'מספר תוצאות בטווח';
+            applyRange(min, max).then(scrollToResults);
+        }
+    });
+
+    resetBtn.addEventListener('click', () => {
+        searchInput.value = '';
+        rangeMinInput.value = '';
+        rangeMaxInput.value = '';
+        matchTitle.textContent = 'כל המספרים בתנ״ך';
+        applyRange(0, 100000000).then(scrollToResults);
+    });
+
+    searchInput.addEventListener('keydown', e => {
+        if (e.key === 'Enter') searchBtn.click();
+    });
+
+    [rangeMinInput, rangeMaxInput].forEach(input => {
+        input.addEventListener('keydown', e => {
+            if (e.key === 'Enter') rangeBtn.click();
+        });
+    });
+
+    // --- Initial State ---
+    applyRange(0, 100000000);
+});
@@ -1,44 +1,174 @@
-from chatgpt import get_numbers_from_verses_using_llm, get_matching_verse
+import asyncio
+import sys
+from typing import Dict, List
+
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+
+from bible_types import NumericHebrew, Verse
+from chatgpt import API_KEY, ResponseParseError, get_cached_numbers, get_matching_verse, \
+    get_numbers_from_verses_using_llm, get_numbers_from_verses_using_llm_async, get_prompt, get_verse_line
+from llm_metrics import BATCH_LOG_FILE_NAME, METRICS_FILE_NAMES, LLMMetrics
+from llm_pipeline import RateLimiter, estimate_tokens, pack_batches, run_pipeline
 from programmatic import get_verses_with_numbers
-from verses_to_matches import load_or_create_verses_to_numerics, dump_verses_to_numerics
+from response_cache import ResponseCache
+from routing import get_reference, route_verses
+from verses_to_matches import PROGRAMMATIC_FILE_NAME, PROGRAMMATIC_JOURNAL_FILE_NAME, VersesToNumericsJournal
 
-BATCH_SIZE = 10
+TOKEN_BUDGET = 4000  # per request: the (estimated) tokens of its verses and of their response, besides the prefix
+CONCURRENCY = 8  # requests in flight
+REQUESTS_PER_MINUTE = 500
+TOKENS_PER_MINUTE = 30000
+RESPONSE_TOKENS_PER_VERSE = 60  # an estimate of the response, for the tokens rate limit
+# the transient errors (APITimeoutError is an APIConnectionError, InternalServerError is a 5xx); not, e.g., a bad key
+RETRY_ON = (RateLimitError, APIConnectionError, InternalServerError, ResponseParseError)
 
 
-def main():
+def main(replay: bool = False, route: bool = False):
+    """
+    `replay`: only the cached responses of the LLM (fails on a prompt that was not answered before).
+    `route`: only the verses that the programmatic parser finds ambiguous (see routing.py), the others are journaled
+    with the results of the parser, apart from those of the LLM (in PROGRAMMATIC_FILE_NAME).
+    """
     verses = get_verses_with_numbers()
     print('Found', len(verses), 'verses with numbers')
-    verses_to_numerics = load_or_create_verses_to_numerics()
-    batch = []
-    for index, verse in enumerate(verses):
-        if verse in verses_to_numerics and verses_to_numerics[verse]:
+    cache = ResponseCache(replay=replay)
+    metrics = LLMMetrics(METRICS_FILE_NAMES, BATCH_LOG_FILE_NAME)
+    try:
+        with VersesToNumericsJournal() as journal:
+            if route:
+                verses, programmatic_results = route_verses(verses)
+                print('Routed', len(verses), 'ambiguous verses to the LLM')
+                with VersesToNumericsJournal(PROGRAMMATIC_FILE_NAME, PROGRAMMATIC_JOURNAL_FILE_NAME) \
+                        as programmatic_journal:
+                    commit_programmatic_results(programmatic_results, journal, programmatic_journal)
+            asyncio.run(find_numbers_of_verses_with_client(verses, journal, api_key=API_KEY, cache=cache,
+                                                           metrics=metrics))
+    finally:
+        metrics.write()
+    print(f"Response cache: {cache.stats}, hit rate {cache.stats.hit_rate:.0%}, "
+          f"saved {cache.saved_latency:.1f}s of LLM calls")
+    print(f"Metrics in {', '.join(map(str, METRICS_FILE_NAMES))}, batches in {BATCH_LOG_FILE_NAME}")
+
+
+def get_verses_to_find(verses, journal: VersesToNumericsJournal) -> List[Verse]:
+    verses_to_find = []
+    for verse in verses:
+        if verse in journal.verses_to_numerics and journal.verses_to_numerics[verse]:
             print('Skipping verse:', verse)
             continue
-        batch.append(verse)
-        if len(batch) < BATCH_SIZE:
-            continue
+        verses_to_find.append(verse)
+    return verses_to_find
+
+
+def commit_programmatic_results(verses_to_numerics: Dict[Verse, List[NumericHebrew]],
+                                journal: VersesToNumericsJournal, programmatic_journal: VersesToNumericsJournal):
+    """
+    The results of the parser, of the verses that are not routed to the LLM (see routing.route_verses), to their own
+    journal (so they are not taken for results of the LLM), unless the journal has the LLM results of the verse, or the
+    programmatic journal has them already.
+    """
+    found_by_llm = {get_reference(verse) for verse, numeric_hebrews in journal.verses_to_numerics.items()
+                    if numeric_hebrews}
+    for verse, numeric_hebrews in verses_to_numerics.items():
+        if get_reference(verse) not in found_by_llm \
+                and programmatic_journal.verses_to_numerics.get(verse) != numeric_hebrews:
+            programmatic_journal.append(verse, numeric_hebrews)
+
+
+def get_verse_tokens(verse: Verse) -> int:
+    return estimate_tokens(get_verse_line(verse)) + RESPONSE_TOKENS_PER_VERSE
+
+
+def get_batches(verses: List[Verse], token_budget: int = TOKEN_BUDGET) -> List[List[Verse]]:
+    return pack_batches(verses, get_verse_tokens, token_budget)
+
 
-        numeric_hebrews = get_numbers_from_verses_using_llm(batch)
-        matching_verses = set()
-        for numeric_hebrew in numeric_hebrews:
-            matching_verse = get_matching_verse(batch, numeric_hebrew)
-            if matching_verse is not None:
-                verses_to_numerics[matching_verse] = verses_to_numerics.get(matching_verse, []) + [numeric_hebrew]
-                matching_verses.add(matching_verse)
-            else:
-                print('No matching verse for numeric:', numeric_hebrew)
-        for verse in batch:
-            if verse not in matching_verses:
-                verses_to_numerics[verse] = []
-            print('Verse:', verse)
-            if not verses_to_numerics[verse]:
-                print('   No numeric found')
-            for numeric_hebrew in verses_to_numerics[verse]:
-                print('   ', numeric_hebrew)
+def commit_batch(batch: List[Verse], numeric_hebrews: List[NumericHebrew], journal: VersesToNumericsJournal) -> int:
+    """Returns the number of numerics that match none of the verses of the batch."""
+    verses_to_numerics = journal.verses_to_numerics
+    matching_verses = set()
+    num_unmatched = 0
+    for numeric_hebrew in numeric_hebrews:
+        matching_verse = get_matching_verse(batch, numeric_hebrew)
+        if matching_verse is not None:
+            verses_to_numerics[matching_verse] = verses_to_numerics.get(matching_verse, []) + [numeric_hebrew]
+            matching_verses.add(matching_verse)
+        else:
+            print('No matching verse for numeric:', numeric_hebrew)
+            num_unmatched += 1
+    for verse in batch:
+        if verse not in matching_verses:
+            verses_to_numerics[verse] = []
+        print('Verse:', verse)
+        if not verses_to_numerics[verse]:
+            print('   No numeric found')
+        for numeric_hebrew in verses_to_numerics[verse]:
+            print('   ', numeric_hebrew)
+        journal.append(verse, verses_to_numerics[verse])
+    return num_unmatched
+
+
+def find_numbers_of_verses(verses, journal: VersesToNumericsJournal, cache: ResponseCache = None,
+                           metrics: LLMMetrics = None):
+    """One request at a time."""
+    for index, batch in enumerate(get_batches(get_verses_to_find(verses, journal))):
+        record = metrics.start_batch(index, batch) if metrics is not None else None
+        numeric_hebrews = get_numbers_from_verses_using_llm(batch, cache, record)
+        num_unmatched = commit_batch(batch, numeric_hebrews, journal)
+        if metrics is not None:
+            metrics.commit_batch(record, len(numeric_hebrews), num_unmatched)
         print('-----------------------------------', index)
-        batch = []
-        dump_verses_to_numerics(verses_to_numerics=verses_to_numerics)
+
+
+async def find_numbers_of_verses_concurrently(verses, journal: VersesToNumericsJournal, client: AsyncOpenAI,
+                                              concurrency: int = CONCURRENCY, rate_limiter: RateLimiter = None,
+                                              token_budget: int = TOKEN_BUDGET, base_delay: float = 1.0,
+                                              cache: ResponseCache = None, metrics: LLMMetrics = None):
+    """
+    `concurrency` requests in flight, retried on the errors of RETRY_ON (the client should not retry itself,
+    max_retries=0). The batches are committed to the journal in order. Batches with a cached response are not
+    requested. `metrics` records the requests, and logs each committed batch.
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, TOKENS_PER_MINUTE)
+    batches = get_batches(get_verses_to_find(verses, journal), token_budget)
+    indices = {id(batch): index for index, batch in enumerate(batches)}
+    records = {}  # of the batches from their first attempt to their commit
+
+    def get_record(batch):
+        if metrics is None:
+            return None
+        if id(batch) not in records:
+            records[id(batch)] = metrics.start_batch(indices[id(batch)], batch)
+        return records[id(batch)]
+
+    def get_tokens(batch):
+        return estimate_tokens(get_prompt(batch)) + RESPONSE_TOKENS_PER_VERSE * len(batch)
+
+    async def request(batch):
+        return await get_numbers_from_verses_using_llm_async(batch, client, cache, get_record(batch))
+
+    def get_cached(batch):
+        numeric_hebrews = get_cached_numbers(batch, cache)
+        if numeric_hebrews is not None and metrics is not None:
+            get_record(batch).observe_cache_hit()
+        return numeric_hebrews
+
+    def commit(batch, numeric_hebrews):
+        num_unmatched = commit_batch(batch, numeric_hebrews, journal)
+        if metrics is not None:
+            metrics.commit_batch(records.pop(id(batch)), len(numeric_hebrews), num_unmatched)
+
+    await run_pipeline(batches, request, commit, concurrency, rate_limiter, get_tokens,
+                       retry_on=RETRY_ON, base_delay=base_delay,
+                       get_cached=get_cached if cache is not None else None)
+
+
+async def find_numbers_of_verses_with_client(verses, journal: VersesToNumericsJournal, base_url: str = None,
+                                             api_key: str = API_KEY, **kwargs):
+    async with AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0) as client:
+        await find_numbers_of_verses_concurrently(verses, journal, client, **kwargs)
 
 
 if __name__ == "__main__":
-    main()
+    main(replay='--replay' in sys.argv[1:], route='--route' in sys.argv[1:])
@@ -1,25 +1,16 @@
-import numpy as np
 from matplotlib import pyplot as plt
 
-from bible_types import VerseAndNumericHebrews, Time
-from create_verses_html import create_html_of_verses_with_numbers, create_text_of_verses_with_numbers
+from bible_types import VerseAndNumericHebrews
+from create_book_pages import write_book_pages
+from create_docs_data import write_docs_data
+from create_verses_html import write_verses_with_numbers
 from programmatic_nikud import get_verses_with_numbers, GetHebrewNumbers
-
-
-def _converrt_to_number(x):
-    if isinstance(x, Time):
-        try:
-            return x.to_number()
-        except:
-            return None
-    return x
+from render_cache import RenderCache
+from results_table import RESULTS_FILE_NAME, ResultsTable, get_cdf
 
 
 def plot_accumulated_histogram(ax, x, normalize=False, marker='o', linestyle='-', color='b', name=''):
-    x = sorted(x)
-    y = np.arange(len(x))
-    if normalize:
-        y = y / y[-1]
+    x, y = get_cdf(x, normalize=normalize)
     name += f' (n={len(x)})'
     ax.semilogx(x, y, marker=marker, linestyle=linestyle, color=color, markersize=2, label=name)
 
@@ -37,21 +28,24 @@ def main():
     verses_and_numeric_hebrews = []
     for verse, numeric_hebrews in verses_to_matches.items():
         verses_and_numeric_hebrews.append(VerseAndNumericHebrews(verse, numeric_hebrews))
-    create_html_of_verses_with_numbers(verses_and_numeric_hebrews)
-    create_text_of_verses_with_numbers(verses_and_numeric_hebrews)
-
-    total_numeric_hebrews = 0
-    for verse, numeric_hebrews in verses_to_matches.items():
-        total_numeric_hebrews += len(numeric_hebrews)
-    print(f"Total numeric hebrews: {total_numeric_hebrews}")
-
-    all_numeric_hebrews = [numeric_hebrew for numeric_hebrews in verses_to_matches.values() for numeric_hebrew in numeric_hebrews]
-
-    not_time = [x.number for x in all_numeric_hebrews if not isinstance(x.number, Time)]
-
-    all_numbers = [_converrt_to_number(numeric_hebrew.number) for numeric_hebrew in all_numeric_hebrews]
-
-    all_years = [x.number.to_number() for x in all_numeric_hebrews if isinstance(x.number, Time)]
+    render_cache = RenderCache.load()
+    write_verses_with_numbers(verses_and_numeric_hebrews, html_file_name=None, render_cache=render_cache)
+    print(write_docs_data(verses_and_numeric_hebrews, render_cache=render_cache).get_size_report())
+    print(write_book_pages(verses_and_numeric_hebrews, render_cache=render_cache))
+    render_cache.save()
+    print(f"Render cache: {render_cache.stats}, hit rate {render_cache.stats.hit_rate:.0%}")
+
+    table = ResultsTable.from_verses_and_numeric_hebrews(verses_and_numeric_hebrews)
+    RESULTS_FILE_NAME.parent.mkdir(exist_ok=True)
+    table.save_npz(RESULTS_FILE_NAME)
+    print(f"Total numeric hebrews: {len(table)}")
+    plot_numbers(table)
+
+
+def plot_numbers(table: ResultsTable):
+    all_numbers = table.value
+    all_years = table.value[table.is_time]
+    not_time = table.value[~table.is_time]
 
     # plot accumulated histogram of all numbers
     fig = plt.figure()
@@ -0,0 +1,327 @@
+"""
+A compiled lexicon of the number and time words.
+
+All the word tables of programmatic_nikud are merged into a single dict, mapping each surface form
+(the bare word, and every prefixed form of it that appears in the Bible) to one LexiconEntry.
+The parser, the prefilter and the renderers all resolve a word with a single `lookup` call.
+"""
+from __future__ import annotations
+
+import unicodedata
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from utils import FOLD_MARKS, canonicalize, get_fingerprint, load_or_create_pickle, normalize_vowels
+
+LEXICON_VERSION = 3
+LEXICON_FILE_NAME = 'lexicon.pkl'
+
+# Words whose canonical key is that of another word (e.g., 'שֵׁנִית', again, is 'שֵּׁנִית', second, without its dagesh)
+NON_CANONICAL_WORDS = {'שֵּׁנִית'}
+
+DAGESH = '\u05BC'
+BEGADKEFAT = 'בגדכפת'  # the letters that lose their (lene) dagesh after a prefix
+
+
+class Category:
+    """
+    Bit flags of a lexicon entry.
+    Kept as plain ints (rather than an IntFlag), since the parser tests them for every word.
+    """
+    UNIT = 1 << 0
+    ORDINAL_M = 1 << 1
+    ORDINAL_F = 1 << 2
+    TENS = 1 << 3
+    COUPLE = 1 << 4
+    HUNDREDS = 1 << 5
+    HUNDREDS_PLURAL = 1 << 6
+    PLURAL = 1 << 7
+
+    SHANA = 1 << 8
+    SHANA_STARTER = 1 << 9
+    MONTH = 1 << 10
+    MONTH_STARTER = 1 << 11
+    DAY = 1 << 12
+    DAY_STARTER = 1 << 13
+    NIGHT = 1 << 14
+
+    THE_ONE = 1 << 15
+    EXCEPTION = 1 << 16
+
+    # Properties of the surface form itself (not of the base word):
+    TO_MONTH = 1 << 17
+    MALEH_NUMBER = 1 << 18  # a number word of the maleh (non-nikud) text
+
+    ORDINAL = ORDINAL_M | ORDINAL_F
+    FIXED = UNIT | ORDINAL | TENS | COUPLE | HUNDREDS
+    ALL_PLURAL = PLURAL | HUNDREDS_PLURAL
+    NUMBER = FIXED | ALL_PLURAL
+    TIME = SHANA | MONTH | DAY | NIGHT
+    STARTER_TIME = SHANA_STARTER | MONTH_STARTER | DAY_STARTER
+    ALL_TIME = TIME | STARTER_TIME
+
+
+class Form:
+    FEMININE = 1 << 0
+    MASCULINE = 1 << 1
+    CONSTRUCT = 1 << 2
+    CONJUNCTIVE = 1 << 3
+
+
+class LexiconEntry(NamedTuple):
+    word: str  # the base word, as it appears in the tables of programmatic_nikud
+    conjugate_letters: Tuple  # Tuple[ConjugateLetter, ...], in the order returned by preprocess_token
+    category: int  # Category flags
+    form: int = 0  # Form flags
+    value: Optional[int] = None
+
+    @property
+    def is_number(self) -> bool:
+        return bool(self.category & Category.NUMBER)
+
+
+def _get_tables():
+    import programmatic
+    import programmatic_nikud as p
+    category_tables = [
+        (Category.UNIT, p.UNITS_MAP),
+        (Category.ORDINAL_M, p.ORDINAL_MAP_M),
+        (Category.ORDINAL_F, p.ORDINAL_MAP_F),
+        (Category.TENS, p.TENS_NUM_MAP),
+        (Category.COUPLE, p.COUPLE_MAP),
+        (Category.HUNDREDS, p.HUNDREDS_MAP),
+        (Category.HUNDREDS_PLURAL, p.HUNDREDS_PLURAL_MAP),
+        (Category.PLURAL, p.PLURAL_MAP),
+        (Category.SHANA, p.SHANA_WORDS),
+        (Category.SHANA_STARTER, p.SHANA_STARTER),
+        (Category.MONTH, p.MONTH_WORDS),
+        (Category.MONTH_STARTER, p.MONTH_STARTER),
+        (Category.DAY, p.DAY_WORDS),
+        (Category.DAY_STARTER, p.DAY_STARTER),
+        (Category.NIGHT, p.NIGHT_WORDS),
+        (Category.THE_ONE, p.THE_ONE),
+        (Category.EXCEPTION, p.ALL_EXCEPTION_WORDS),
+    ]
+    form_tables = [
+        (Form.FEMININE, p.UNITS_MAP_F),
+        (Form.FEMININE, p.ORDINAL_MAP_F),
+        (Form.MASCULINE, p.UNITS_MAP_M),
+        (Form.MASCULINE, p.ORDINAL_MAP_M),
+        (Form.CONSTRUCT, p.UNITS_MAP_CONSTRUCT),
+        (Form.CONJUNCTIVE, p.UNITS_MAP_CONJUNCTIVE),
+    ]
+    surface_tables = [
+        (Category.TO_MONTH, p.TO_MONTH),
+        (Category.MALEH_NUMBER, programmatic.HEBREW_NUMBERS),
+    ]
+    return category_tables, form_tables, surface_tables
+
+
+def get_tables_fingerprint() -> str:
+    def as_sorted(table):
+        return sorted(table.items()) if isinstance(table, dict) else sorted(table)
+    category_tables, form_tables, surface_tables = _get_tables()
+    return get_fingerprint(
+        LEXICON_VERSION,
+        FOLD_MARKS,
+        sorted(NON_CANONICAL_WORDS),
+        [(int(flag), as_sorted(table)) for flag, table in category_tables + form_tables + surface_tables],
+    )
+
+
+def _get_base_entries() -> Dict[str, LexiconEntry]:
+    """
+    The entries of the bare (un-prefixed) words.
+    """
+    import programmatic_nikud as p
+    category_tables, form_tables, _ = _get_tables()
+    categories = {}
+    for flag, table in category_tables:
+        for word in table:
+            categories[word] = categories.get(word, 0) | flag
+    forms = {}
+    for flag, table in form_tables:
+        for word in table:
+            forms[word] = forms.get(word, 0) | flag
+    return {
+        word: LexiconEntry(
+            word=word,
+            conjugate_letters=(),
+            category=category,
+            form=forms.get(word, 0),
+            value=p.FIXED_MAP.get(word, p.ALL_PLURAL_MAP.get(word)),
+        )
+        for word, category in categories.items()
+    }
+
+
+def _get_surface_categories() -> Dict[str, int]:
+    _, _, surface_tables = _get_tables()
+    surface_categories = {}
+    for flag, table in surface_tables:
+        for surface in table:
+            surface_categories[surface] = surface_categories.get(surface, 0) | flag
+    return surface_categories
+
+
+def _get_canonical_entries(base_entries: Dict[str, LexiconEntry]) -> Dict[str, LexiconEntry]:
+    """
+    The base entries by their canonical key.
+    Keys shared by base words of different categories are ambiguous, and are left out.
+    """
+    canonical_entries = {}
+    ambiguous = set()
+    for word, entry in base_entries.items():
+        if word in NON_CANONICAL_WORDS:
+            continue
+        key = canonicalize(word)
+        if key in canonical_entries and canonical_entries[key][2:] != entry[2:]:
+            ambiguous.add(key)
+        canonical_entries.setdefault(key, entry)
+    return {key: entry for key, entry in canonical_entries.items() if key not in ambiguous}
+
+
+def _remove_initial_dagesh(word: str) -> str:
+    end = 1
+    while end < len(word) and unicodedata.combining(word[end]):
+        end += 1
+    return word[0] + word[1:end].replace(DAGESH, '') + word[end:]
+
+
+def _get_lenited_entries(base_entries: Dict[str, LexiconEntry]) -> Dict[str, LexiconEntry]:
+    """
+    The base entries that start with a dagesh lene, by their form after a prefix (e.g., 'וּבַשָּׁנָה' of 'בַּשָּׁנָה').
+    """
+    lenited_entries = {}
+    for word, entry in base_entries.items():
+        lenited = _remove_initial_dagesh(word)
+        if word[0] in BEGADKEFAT and lenited != word and lenited not in base_entries:
+            lenited_entries[lenited] = entry
+    return lenited_entries
+
+
+def _resolve_exact(surface: str, base_entries: Dict[str, LexiconEntry]) -> Optional[LexiconEntry]:
+    from programmatic_nikud import preprocess_token
+    word, conjugate_letters = preprocess_token(normalize_vowels(surface), expected_nouns=base_entries)
+    entry = base_entries.get(word)
+    return None if entry is None else entry._replace(conjugate_letters=tuple(conjugate_letters))
+
+
+def _resolve_canonical(surface: str, canonical_entries: Dict[str, LexiconEntry]) -> Optional[LexiconEntry]:
+    """
+    Resolve a spelling variant that is not listed in the tables (e.g., differs from a listed word by a dagesh).
+    Only a bare variant: a prefixed one is too often another word (e.g., 'הַשָּׁבֻעִים', weeks, is not 'שָׁבֻעִים').
+    """
+    return canonical_entries.get(canonicalize(surface))
+
+
+def _resolve_lenited(surface: str, lenited_entries: Dict[str, LexiconEntry]) -> Optional[LexiconEntry]:
+    """
+    Resolve a prefixed word whose first letter lost its dagesh lene to the prefix.
+    """
+    from programmatic_nikud import preprocess_token
+    word, conjugate_letters = preprocess_token(normalize_vowels(surface), expected_nouns=lenited_entries)
+    entry = lenited_entries.get(word) if conjugate_letters else None
+    return None if entry is None else entry._replace(conjugate_letters=tuple(conjugate_letters))
+
+
+def _resolve(surface: str, base_entries: Dict[str, LexiconEntry], canonical_entries: Dict[str, LexiconEntry],
+             lenited_entries: Dict[str, LexiconEntry], surface_categories: Dict[str, int]) -> Optional[LexiconEntry]:
+    entry = _resolve_exact(surface, base_entries) or _resolve_lenited(surface, lenited_entries) \
+        or _resolve_canonical(surface, canonical_entries)
+    surface_category = surface_categories.get(normalize_vowels(surface), 0)
+    if entry is None:
+        if not surface_category:
+            return None
+        return LexiconEntry(word=surface, conjugate_letters=(), category=surface_category)
+    return entry._replace(category=entry.category | surface_category)
+
+
+class Lexicon:
+    """
+    Maps a surface form to its LexiconEntry (or to None, for words that are not in the lexicon).
+    Words that were not seen at compile time are resolved on first lookup and memoized.
+    """
+
+    def __init__(self, surfaces: Dict[str, Optional[LexiconEntry]], base_entries: Dict[str, LexiconEntry],
+                 surface_categories: Dict[str, int]):
+        self.surfaces = surfaces
+        self.base_entries = base_entries
+        self.canonical_entries = _get_canonical_entries(base_entries)
+        self.lenited_entries = _get_lenited_entries(base_entries)
+        self.surface_categories = surface_categories
+
+    def lookup(self, surface: str) -> Optional[LexiconEntry]:
+        try:
+            return self.surfaces[surface]
+        except KeyError:
+            entry = self.surfaces[surface] = \
+                _resolve(surface, self.base_entries, self.canonical_entries, self.lenited_entries,
+                         self.surface_categories)
+            return entry
+
+    def __len__(self):
+        return len(self.base_entries)
+
+
+def compile_lexicon() -> Lexicon:
+    """
+    Resolve every word of the Bible (nikud) against the word tables.
+    """
+    lexicon = Lexicon({}, _get_base_entries(), _get_surface_categories())
+    for surface in sorted(_get_corpus_vocabulary() | set(lexicon.base_entries) | set(lexicon.surface_categories)):
+        lexicon.lookup(surface)
+    return lexicon
+
+
+def _get_corpus_vocabulary() -> set:
+    from bible_utils import tokenize_words_and_punctuations
+    from read_bible import get_bible
+
+    vocabulary = set()
+    for remove_punctuations in [True, False]:
+        for verse in get_bible(with_nikud=True, remove_punctuations=remove_punctuations):
+            vocabulary.update(token for is_word, token in tokenize_words_and_punctuations(verse.text) if is_word)
+    return vocabulary
+
+
+LEXICON: Optional[Lexicon] = None
+
+
+def get_lexicon() -> Lexicon:
+    global LEXICON
+    if LEXICON is None:
+        LEXICON = load_or_create_pickle(LEXICON_FILE_NAME, get_tables_fingerprint(), compile_lexicon)
+    return LEXICON
+
+
+def lookup(surface: str) -> Optional[LexiconEntry]:
+    """
+    The lexicon entry of a word (with or without conjugate letters), or None if it is not a number/time word.
+    """
+    return get_lexicon().lookup(surface)
+
+
+def get_canonicalization_report() -> Dict[str, int]:
+    """
+    How much the canonical keys save: base words that share a key, and Bible words resolved only through their key.
+    """
+    lexicon = get_lexicon()
+    variant_words = [surface for surface in _get_corpus_vocabulary()
+                     if _resolve_exact(surface, lexicon.base_entries) is None
+                     and _resolve_canonical(surface, lexicon.canonical_entries) is not None]
+    return {
+        'base_words': len(lexicon.base_entries),
+        'canonical_keys': len({canonicalize(word) for word in lexicon.base_entries}),
+        'ambiguous_canonical_keys': len({canonicalize(word) for word in lexicon.base_entries}
+                                        - set(lexicon.canonical_entries)),
+        'variant_words_in_bible': len(variant_words),
+    }
+
+
+if __name__ == "__main__":
+    lexicon = get_lexicon()
+    entries = [entry for entry in lexicon.surfaces.values() if entry is not None]
+    print(f"Base words: {len(lexicon)}")
+    print(f"Surface forms: {len(lexicon.surfaces)} ({len(entries)} in the lexicon)")
+    for name, count in get_canonicalization_report().items():
+        print(f"{name}: {count}")
@@ -0,0 +1,235 @@
+"""
+Metrics of the LLM pipeline: counters (requests, errors by type, retries, parse failures, cache hits, tokens, cost)
+and histograms of the latency of the requests and of the batches, exported as json or as Prometheus text (e.g. for
+the textfile collector of node_exporter), and a structured log of the batches (a json line per committed batch).
+
+The requests of a batch are recorded on its BatchRecord (see LLMMetrics.start_batch), which forwards them to the
+metrics of the run:
+
+    metrics = LLMMetrics(['llm_metrics.json', 'llm_metrics.prom'], 'llm_batches.jsonl')
+    record = metrics.start_batch(index, verses)  # at the first attempt of the batch
+    response = await get_response_async(client, prompt, metrics=record)  # records latency, tokens and errors
+    metrics.commit_batch(record, num_numbers, num_unmatched)  # logs the batch, and writes the metrics files
+"""
+from __future__ import annotations
+
+import bisect
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from utils import CACHE_DIRECTORY, write_atomically
+
+METRICS_FILE_NAMES = (CACHE_DIRECTORY / 'llm_metrics.json', CACHE_DIRECTORY / 'llm_metrics.prom')
+BATCH_LOG_FILE_NAME = CACHE_DIRECTORY / 'llm_batches.jsonl'
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)  # seconds
+QUANTILES = (0.5, 0.9, 0.99)
+
+# USD per million prompt and completion tokens
+PRICES = {
+    'gpt-4o': (2.5, 10.),
+}
+
+COUNTERS = (
+    'requests',  # calls to the API, including the failed ones
+    'errors',  # failed calls (see errors_by_type)
+    'parse_failures',  # responses that do not parse into the response format
+    'retries',
+    'cache_hits',  # batches, and calls, answered by the response cache
+    'batches',  # committed batches
+    'verses',
+    'numbers',
+    'unmatched_numbers',  # numbers of the responses that match none of the verses of their batch
+    'prompt_tokens',
+    'completion_tokens',
+)
+
+
+def get_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """USD (0 for a model without a price)."""
+    prompt_price, completion_price = PRICES.get(model, (0., 0.))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def _to_json_number(value: float):
+    return None if value != value else '+Inf' if value == float('inf') else value
+
+
+class Histogram:
+    """Counts of the observations in buckets of upper bounds `buckets` (and one above them), as in Prometheus."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get_cumulative_counts(self) -> List[int]:
+        cumulative = []
+        for count in self.counts:
+            cumulative.append(count + (cumulative[-1] if cumulative else 0))
+        return cumulative
+
+    def quantile(self, q: float) -> float:
+        """The upper bound of the bucket of the q-quantile (inf above the buckets, nan if empty)."""
+        if not self.count:
+            return float('nan')
+        index = bisect.bisect_left(self.get_cumulative_counts(), q * self.count)
+        return self.buckets[index] if index < len(self.buckets) else float('inf')
+
+    def to_dict(self) -> dict:
+        return dict(
+            buckets={str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.get_cumulative_counts())},
+            sum=self.sum,
+            count=self.count,
+            **{f'p{round(q * 100)}': _to_json_number(self.quantile(q)) for q in QUANTILES},
+        )
+
+
+class BatchRecord:
+    """The requests of one batch, for its line of the log (and forwarded to the metrics of the run)."""
+
+    def __init__(self, metrics: LLMMetrics, index: int, verses: list):
+        self.metrics = metrics
+        self.index = index
+        self.verses = verses
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.errors: List[str] = []
+        self.parse_failures = 0
+        self.cached = False
+        self.latency = 0.  # seconds, of all the attempts
+        self.prompt_tokens = self.completion_tokens = 0
+        self.cost = 0.
+
+    def observe_request(self, model: str, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                        error: Optional[str] = None, parse_failure: bool = False):
+        self.attempts += 1
+        self.latency += latency
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += get_cost(model, prompt_tokens, completion_tokens)
+        if error is not None:
+            self.errors.append(error)
+        self.parse_failures += parse_failure
+        self.metrics.observe_request(model, latency, prompt_tokens, completion_tokens, error, parse_failure)
+
+    def observe_cache_hit(self):
+        self.cached = True
+        self.metrics.observe_cache_hit()
+
+    def to_dict(self, num_numbers: int, num_unmatched: int) -> dict:
+        first = self.verses[0] if self.verses else None
+        return dict(
+            batch=self.index,
+            first_verse=f'{first.book} {first.chapter} {first.letter}' if first is not None else None,
+            verses=len(self.verses),
+            cached=self.cached,
+            attempts=self.attempts,
+            errors=self.errors,
+            parse_failures=self.parse_failures,
+            latency=round(self.latency, 4),
+            elapsed=round(time.monotonic() - self.started, 4),  # from the first attempt to the commit
+            committed_at=round(time.monotonic() - self.metrics.started, 4),  # since the start of the run
+            prompt_tokens=self.prompt_tokens,
+            completion_tokens=self.completion_tokens,
+            cost_usd=round(self.cost, 6),
+            numbers=num_numbers,
+            unmatched_numbers=num_unmatched,
+        )
+
+
+class LLMMetrics:
+    def __init__(self, file_names: Sequence = (), log_file_name=None):
+        """
+        `file_names`: the files to write the metrics to (after each batch), as Prometheus text if named *.prom, else
+        as json. `log_file_name`: the json lines of the batches (appended to).
+        """
+        self.file_names = [Path(file_name) for file_name in file_names]
+        self.log_file_name = Path(log_file_name) if log_file_name is not None else None
+        self.started = time.monotonic()
+        self.counters: Dict[str, int] = dict.fromkeys(COUNTERS, 0)
+        self.errors_by_type = Counter()
+        self.cost = 0.
+        self.request_latency = Histogram()
+        self.batch_latency = Histogram()  # from the first attempt of a batch to its commit (with retries and waits)
+
+    def observe_request(self, model: str, latency: float, prompt_tokens: int = 0, completion_tokens: int = 0,
+                        error: Optional[str] = None, parse_failure: bool = False):
+        self.counters['requests'] += 1
+        self.counters['prompt_tokens'] += prompt_tokens
+        self.counters['completion_tokens'] += completion_tokens
+        self.cost += get_cost(model, prompt_tokens, completion_tokens)
+        self.request_latency.observe(latency)
+        if error is not None:
+            self.counters['errors'] += 1
+            self.errors_by_type[error] += 1
+        self.counters['parse_failures'] += parse_failure
+
+    def observe_cache_hit(self):
+        self.counters['cache_hits'] += 1
+
+    def start_batch(self, index: int, verses: list) -> BatchRecord:
+        return BatchRecord(self, index, verses)
+
+    def commit_batch(self, record: BatchRecord, num_numbers: int, num_unmatched: int):
+        self.counters['batches'] += 1
+        self.counters['verses'] += len(record.verses)
+        self.counters['numbers'] += num_numbers
+        self.counters['unmatched_numbers'] += num_unmatched
+        self.counters['retries'] += max(record.attempts - 1, 0)
+        line = record.to_dict(num_numbers, num_unmatched)
+        self.batch_latency.observe(line['elapsed'])
+        if self.log_file_name is not None:
+            self.log_file_name.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_file_name, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(line, ensure_ascii=False) + '\n')
+        self.write()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed
+        return dict(
+            **self.counters,
+            cost_usd=self.cost,
+            errors_by_type=dict(self.errors_by_type),
+            elapsed_seconds=elapsed,
+            verses_per_second=self.counters['verses'] / elapsed if elapsed else 0.,
+            request_latency_seconds=self.request_latency.to_dict(),
+            batch_latency_seconds=self.batch_latency.to_dict(),
+        )
+
+    def to_prometheus(self, prefix: str = 'llm') -> str:
+        lines = []
+
+        def add(name, kind, samples):  # samples of (labels, or the suffix of a histogram series, and value)
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            lines.extend(f'{prefix}_{name}{labels} {value}' for labels, value in samples)
+
+        for name in COUNTERS:
+            if name != 'errors':
+                add(f'{name}_total', 'counter', [('', self.counters[name])])
+        add('errors_total', 'counter', [(f'{{type="{error}"}}', count) for error, count in self.errors_by_type.items()])
+        add('cost_usd_total', 'counter', [('', self.cost)])
+        add('elapsed_seconds', 'gauge', [('', self.elapsed)])
+        for name, histogram in [('request_latency_seconds', self.request_latency),
+                                ('batch_latency_seconds', self.batch_latency)]:
+            samples = [(f'_bucket{{le="{bound}"}}', count) for bound, count in histogram.to_dict()['buckets'].items()]
+            add(name, 'histogram', samples + [('_sum', histogram.sum), ('_count', histogram.count)])
+        return ''.join(line + '\n' for line in lines)
+
+    def write(self):
+        for file_name in self.file_names:
+            content = self.to_prometheus() if file_name.suffix == '.prom' else json.dumps(self.to_dict(), indent=2)
+            write_atomically(file_name, content.encode('utf-8'))
@@ -0,0 +1,142 @@
+"""
+Concurrent LLM requests with asyncio: at most `concurrency` requests in flight, within a rate limit of requests and
+tokens per minute, retried with exponential backoff, and with the results committed in the order of the batches
+(whatever the order in which the responses arrive).
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+Batch = TypeVar('Batch')
+Result = TypeVar('Result')
+
+MAX_RETRIES = 6
+BASE_DELAY = 1.0  # seconds, doubled after each failed attempt
+MAX_DELAY = 60.0
+BYTES_PER_TOKEN = 4  # a rough estimate of tokens, without a tokenizer
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text.encode('utf-8')) // BYTES_PER_TOKEN + 1
+
+
+class RateLimiter:
+    """
+    Token buckets of requests per minute and (estimated) tokens per minute.
+    `acquire` waits until both buckets have room for the request.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float = float('inf')):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.available_requests = requests_per_minute
+        self.available_tokens = tokens_per_minute
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_minutes = (now - self.updated) / 60
+        self.updated = now
+        self.available_requests = min(self.requests_per_minute,
+                                      self.available_requests + elapsed_minutes * self.requests_per_minute)
+        self.available_tokens = min(self.tokens_per_minute,
+                                    self.available_tokens + elapsed_minutes * self.tokens_per_minute)
+
+    async def acquire(self, tokens: int = 0):
+        tokens = min(tokens, self.tokens_per_minute)  # a request larger than the bucket waits for a full bucket
+        async with self.lock:  # first come, first served
+            while True:
+                self._refill()
+                missing_requests = 1 - self.available_requests
+                missing_tokens = tokens - self.available_tokens
+                if missing_requests <= 0 and missing_tokens <= 0:
+                    self.available_requests -= 1
+                    self.available_tokens -= tokens
+                    return
+                await asyncio.sleep(60 * max(missing_requests / self.requests_per_minute,
+                                             missing_tokens / self.tokens_per_minute))
+
+
+async def call_with_retries(call: Callable[[], Awaitable[Result]], retry_on: Tuple[type, ...],
+                            max_retries: int = MAX_RETRIES, base_delay: float = BASE_DELAY,
+                            max_delay: float = MAX_DELAY) -> Result:
+    for attempt in range(max_retries + 1):
+        try:
+            return await call()
+        except retry_on as e:
+            if attempt == max_retries:
+                raise
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1)  # jitter
+            print(f"Retrying in {delay:.1f}s ({attempt + 1}/{max_retries}) after: {e!r}")
+            await asyncio.sleep(delay)
+
+
+async def run_pipeline(batches: Sequence[Batch], request: Callable[[Batch], Awaitable[Result]],
+                       commit: Callable[[Batch, Result], None], concurrency: int,
+                       rate_limiter: Optional[RateLimiter] = None, get_tokens: Callable[[Batch], int] = None,
+                       retry_on: Tuple[type, ...] = (), max_retries: int = MAX_RETRIES,
+                       base_delay: float = BASE_DELAY, get_cached: Callable[[Batch], Optional[Result]] = None):
+    """
+    Request all the batches (at most `concurrency` at a time) and commit the result of each batch, in order.
+    `get_tokens` estimates the tokens of a batch, for the rate limiter.
+    `get_cached` gives the result of a batch without a request (e.g. a cached response), None if it has none.
+    A batch that fails after all its retries raises; the batches before it are committed, and so are the later
+    batches that completed (out of order, so they are not requested again).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done: Dict[int, Result] = {}
+    next_to_commit = 0
+
+    async def process(index: int):
+        nonlocal next_to_commit
+        batch = batches[index]
+
+        async def call():
+            if rate_limiter is not None:
+                await rate_limiter.acquire(get_tokens(batch) if get_tokens else 0)
+            return await request(batch)
+
+        result = get_cached(batch) if get_cached else None
+        if result is None:
+            async with semaphore:
+                result = await call_with_retries(call, retry_on, max_retries, base_delay)
+        done[index] = result
+        while next_to_commit in done:
+            commit(batches[next_to_commit], done.pop(next_to_commit))
+            next_to_commit += 1
+
+    tasks = [asyncio.create_task(process(index)) for index in range(len(batches))]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for index in sorted(done):  # only after a failed batch
+            commit(batches[index], done.pop(index))
+
+
+def split_into_batches(items: List, batch_size: int) -> List[List]:
+    return [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+
+
+def pack_batches(items: List, get_tokens: Callable, token_budget: int) -> List[List]:
+    """
+    The items, in order, in batches of at most `token_budget` tokens each (an item larger than the budget is a batch
+    of its own).
+    """
+    batches = []
+    batch, batch_tokens = [], 0
+    for item in items:
+        tokens = get_tokens(item)
+        if batch and batch_tokens + tokens > token_budget:
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
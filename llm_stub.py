@@ -0,0 +1,116 @@
+"""
+A local stand-in for the chat completions endpoint, with configurable latency and errors, to run the LLM pipeline
+without the API.
+
+It answers the prompts of chatgpt.get_prompt: for each verse of the prompt (after VERSES_HEADER), one number quoting
+the first word of the verse. A fraction `error_rate` of the requests fail with 429 (rate limited) or 500, and a
+fraction `parse_failure_rate` of the responses are not valid json. The usage of the responses is estimated (see
+llm_pipeline.estimate_tokens).
+
+    with StubServer(latency=0.1, error_rate=0.05) as server:
+        client = AsyncOpenAI(api_key='stub', base_url=server.base_url, max_retries=0)
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chatgpt import VERSES_HEADER
+from llm_pipeline import estimate_tokens
+
+VERSE_PATTERN = re.compile(r'^Verse\(book="(.*?)", chapter="(.*?)", letter="(.*?)", text="(.*)"\)$', re.MULTILINE)
+
+
+def get_stub_numbers(user_prompt: str) -> list:
+    verses_part = user_prompt.rsplit(VERSES_HEADER, 1)[1]  # after the example verses
+    return [dict(book=book, chapter=chapter, letter=letter, quote=text.split()[0], number=1, entity='')
+            for book, chapter, letter, text in VERSE_PATTERN.findall(verses_part)]
+
+
+class StubServer:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0, parse_failure_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.parse_failure_rate = parse_failure_rate
+        self.random = random.Random(seed)
+        self.num_requests = 0
+        self.num_errors = 0
+        self.num_parse_failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._get_handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server.server_address[1]}/v1'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _respond(self, body: dict):
+        """The status and the json of the response to a request."""
+        with self.lock:
+            self.num_requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            is_error = self.random.random() < self.error_rate
+            is_parse_failure = not is_error and self.random.random() < self.parse_failure_rate
+            self.num_errors += is_error
+            self.num_parse_failures += is_parse_failure
+        try:
+            time.sleep(self.latency)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        if is_error:
+            status = self.random.choice([429, 500])
+            return status, dict(error=dict(message=f'stub error {status}', type='stub_error', code=None))
+        user_prompt = [message['content'] for message in body['messages'] if message['role'] == 'user'][0]
+        content = json.dumps(dict(all_numbers=get_stub_numbers(user_prompt)), ensure_ascii=False)
+        if is_parse_failure:
+            content = content[:len(content) // 2]  # as if cut off
+        prompt_tokens = sum(estimate_tokens(message['content']) for message in body['messages'])
+        completion_tokens = estimate_tokens(content)
+        with self.lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+        return 200, dict(
+            id='chatcmpl-stub', object='chat.completion', created=int(time.time()), model=body['model'],
+            choices=[dict(index=0, finish_reason='stop', logprobs=None,
+                          message=dict(role='assistant', content=content, refusal=None))],
+            usage=dict(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                       total_tokens=prompt_tokens + completion_tokens),
+        )
+
+    def _get_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                status, response = stub._respond(body)
+                data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,12 +1,17 @@
 import re
 
 NIKUD_PATTERN = "[\u0590-\u05C7]*"  # Matches Hebrew vowel signs and diacritics
+NIKUD_CHARACTER = re.compile("[\u0590-\u05C7]")
 
 
 def remove_nikud(s):
     return re.sub(NIKUD_PATTERN, "", s)
 
 
+def get_length_without_nikud(s) -> int:
+    return len(s) - len(NIKUD_CHARACTER.findall(s))
+
+
 def compare_without_nikud(s1, s2):
     return remove_nikud(s1) == remove_nikud(s2)
 
@@ -1,7 +1,10 @@
+import re
 from enum import Enum
-from typing import Optional, Iterable
+from typing import Optional, Iterable, List, Dict
 
-from read_bible import get_bible
+from bible_types import Verse, Verses, NumericHebrew
+from corpus_encoding import get_verses_with_category
+from lexicon import Category
 
 UNITS_MAP = {
     'אחת': 1, 'אחד': 1,
@@ -90,16 +93,31 @@ def preprocess_token(token: str, letters: Iterable[ConjugateLetter] = ConjugateL
     return token, None
 
 
+HYPHENATE_PATTERN = re.compile('(שתים(?= עשרה)|שנים(?= עשר))')
+
+
 def tokenize(phrase: str) -> list[str]:
-    phrase = phrase.replace('שתים עשרה', 'שתים- עשרה')
-    phrase = phrase.replace('שנים עשר', 'שנים- עשר')
-    return phrase.split()
+    return HYPHENATE_PATTERN.sub(r'\1-', phrase).split()
 
 
-def hebrew_num_to_int(phrase: str) -> int:
+CONJUGATE_LETTERS = {letter.value: letter for letter in ConjugateLetter}
 
-    tokens = tokenize(phrase)
 
+def _preprocess_number_token(token: str) -> tuple[str, Optional[ConjugateLetter]]:
+    """Same as preprocess_token (with all the letters), except that number words are kept as is."""
+    if token in ALL_NUMBER_WORDS:
+        return token, None
+    letter = CONJUGATE_LETTERS.get(token[:1])
+    if letter is None:
+        return token, None
+    return token[1:], letter
+
+
+def _tokens_to_int(tokens: list[str], preprocessed: list[tuple[str, Optional[ConjugateLetter]]]) -> int:
+    """
+    Evaluate the value of a tokenized number phrase.
+    `preprocessed` holds the (token, conjugate_letter) pair of each of the tokens.
+    """
     total = 0
     current_segment = 0
     segment_parts = []  # track numbers added in the current segment
@@ -130,17 +148,9 @@ def hebrew_num_to_int(phrase: str) -> int:
             current_segment = current_segment - last + new_val
             segment_parts.append(new_val)
 
-    for j, token in enumerate(tokens):
+    for j, (token, conjugate_letter) in enumerate(preprocessed):
         is_last = j + 1 == len(tokens)
-        is_first = j == 0
         next_token = tokens[j + 1] if not is_last else None
-        if token in ALL_NUMBER_WORDS:
-            conjugate_letter = None
-        else:
-            if total:
-                token, conjugate_letter = preprocess_token(token, [ConjugateLetter.VAV])
-            else:
-                token, conjugate_letter = preprocess_token(token)
 
         if token in SHANA_WORDS \
                 or token == 'שני' and is_last and len(tokens) > 1 \
@@ -167,13 +177,8 @@ def hebrew_num_to_int(phrase: str) -> int:
                     # val == 200 (מאתיים)
                     # Typically means just 200. If we have a previous number and no 'ו', it's tricky.
                     # We'll treat "מאתיים" like a standalone 200 if no conjunction.
-                    if len(segment_parts) == 1 and segment_parts[0] != 0:
-                        # Not a standard form, but let's just add 200
-                        current_segment += 200
-                        segment_parts.append(200)
-                    else:
-                        current_segment += 200
-                        segment_parts.append(200)
+                    current_segment += 200
+                    segment_parts.append(200)
             continue
 
         if token in ALL_PLURAL_MAP:
@@ -192,6 +197,11 @@ def hebrew_num_to_int(phrase: str) -> int:
     return total
 
 
+def hebrew_num_to_int(phrase: str) -> int:
+    tokens = tokenize(phrase)
+    return _tokens_to_int(tokens, [_preprocess_number_token(token) for token in tokens])
+
+
 def iter_hebrew_numbers(with_hatayot: bool = True):
     for unit in ALL_NUMBER_WORDS:
         yield unit
@@ -199,16 +209,19 @@ def iter_hebrew_numbers(with_hatayot: bool = True):
         yield f"ו{unit}"
 
 
+HEBREW_NUMBERS = frozenset(iter_hebrew_numbers())
+
+
 def is_word_in_hebrew_numbers(word: str) -> bool:
-    return word in iter_hebrew_numbers()
+    return word in HEBREW_NUMBERS
 
 
 def is_numbers_in_verse(verse) -> bool:
     return any(is_word_in_hebrew_numbers(word) for word in verse.split(' '))
 
 
-EXCEPTIONS = ['האחת']
-EXCEPTION_BECAUSE_OF_PREVIOUS_WORD = [
+EXCEPTIONS = {'האחת'}
+EXCEPTION_BECAUSE_OF_PREVIOUS_WORD = {
     ('באר', 'שבע'),
     ('קרית', 'ארבע'),
     ("בגדי", "שש"),
@@ -216,38 +229,58 @@ EXCEPTION_BECAUSE_OF_PREVIOUS_WORD = [
     ("תולעת", "שני"),
     ("שני", "ושש"),
 
-]
-EXCEPTIONS_BECAUSE_OF_NEXT_WORD = [
+}
+EXCEPTIONS_BECAUSE_OF_NEXT_WORD = {
     ("שני", "חיי"),
     ("שני", "חייך"),
     ("שני", "חייו"),
-]
-UNALLOWED_PHRASES = [
+}
+UNALLOWED_PHRASES = {
     "מאת", "השבע",
-]
+}
 
 
-def extract_number_phrases(verse: str) -> list[str]:
+# All the tokens that preprocess_token maps to a SHANA word (no SHANA word starts with a conjugate letter)
+SHANA_TOKENS = SHANA_WORDS | {letter.value + word for letter in ConjugateLetter for word in SHANA_WORDS}
+
+
+def _get_has_following_shana(tokens: list[str]) -> list[bool]:
+    """
+    For each token, whether any of the tokens after it is a year/month word.
+    """
+    has_following_shana = [False] * len(tokens)
+    for i in range(len(tokens) - 1, 0, -1):
+        has_following_shana[i - 1] = has_following_shana[i] or tokens[i] in SHANA_TOKENS
+    return has_following_shana
+
 
+def extract_number_phrases_and_values(verse: str) -> list[tuple[str, int]]:
+    """
+    Find the number phrases in the verse and evaluate each of them, in a single pass over the tokens.
+    """
     tokens = tokenize(verse)
-    phrases = []
+    has_following_shana = _get_has_following_shana(tokens)
+    phrases_and_values = []
     current_phrase = []
+    current_preprocessed = []
 
     def terminate_phrase():
         if current_phrase:
+            if current_phrase[-1].endswith('-'):
+                # the hyphen only binds to a following עשר/עשרה within the phrase
+                current_phrase[-1] = current_phrase[-1][:-1]
+                current_preprocessed[-1] = _preprocess_number_token(current_phrase[-1])
             joined_current_phrase = " ".join(current_phrase).replace('-', '')
             if joined_current_phrase not in UNALLOWED_PHRASES:
-                phrases.append(joined_current_phrase)
+                phrases_and_values.append(
+                    (joined_current_phrase, _tokens_to_int(current_phrase, current_preprocessed)))
             current_phrase.clear()
+            current_preprocessed.clear()
 
     prev_raw_token, prev_token = None, None
     for i, raw_token in enumerate(tokens):
         # Preprocess token to identify if it's conjunction and remove leading 'ו'
-        if raw_token in ALL_NUMBER_WORDS:
-            conjugate_letter = None
-            token = raw_token
-        else:
-            token, conjugate_letter = preprocess_token(raw_token)
+        token, conjugate_letter = _preprocess_number_token(raw_token)
 
         next_token = tokens[i + 1] if i + 1 < len(tokens) else None
         # Check if token is a number word or in the ignore words
@@ -259,21 +292,19 @@ def extract_number_phrases(verse: str) -> list[str]:
         elif (raw_token, next_token) in EXCEPTIONS_BECAUSE_OF_NEXT_WORD:
             terminate_phrase()
         elif token in ALL_NUMBER_WORDS or raw_token in ALL_NUMBER_WORDS:
-            # if conjugate_letter in {ConjugateLetter.BET, ConjugateLetter.HEY}:
-            #     terminate_phrase()
             # terminate if end of sentence, or for שנים שנים
             if prev_raw_token == raw_token:
                 terminate_phrase()
             # Start or continue a phrase
             current_phrase.append(raw_token)
+            current_preprocessed.append((token, conjugate_letter))
         elif token in SHANA_WORDS and current_phrase:
             # If 'שנה' appears we include it
             current_phrase.append(raw_token)
+            current_preprocessed.append((token, conjugate_letter))
 
-            # Look ahead to check if another 'שנה' exists at the end of this phrase
-            look_ahead_tokens = tokens[i + 1:]
-            has_following_shana = any(preprocess_token(t)[0] in SHANA_WORDS for t in look_ahead_tokens)
-            if not has_following_shana:
+            # Terminate unless another 'שנה' follows later in the verse
+            if not has_following_shana[i]:
                 terminate_phrase()
         else:
             # Not a number word or ignore word while phrase_active
@@ -282,13 +313,34 @@ def extract_number_phrases(verse: str) -> list[str]:
         prev_raw_token, prev_token = raw_token, token
 
     terminate_phrase()
-    return phrases
+    return phrases_and_values
+
+
+def extract_number_phrases(verse: str) -> list[str]:
+    return [phrase for phrase, _ in extract_number_phrases_and_values(verse)]
+
+
+def get_numeric_hebrews(verse: Verse) -> List[NumericHebrew]:
+    return [
+        NumericHebrew(
+            book=verse.book,
+            chapter=verse.chapter,
+            letter=verse.letter,
+            quote=phrase,
+            number=value,
+            entity='',
+        ) for phrase, value in extract_number_phrases_and_values(verse.text)]
+
 
+def get_verses_with_numbers(with_nikud: bool = False, remove_punctuations: bool = True) -> Verses:
+    return get_verses_with_category(Category.MALEH_NUMBER, with_nikud=with_nikud,
+                                    remove_punctuations=remove_punctuations)
 
-def get_verses_with_numbers():
-    verses = []
-    for verse in get_bible():
-        if is_numbers_in_verse(verse.text):
-            verses.append(verse)
 
-    return verses
+def get_verses_to_numeric_hebrews(verses: Verses = None) -> Dict[Verse, List[NumericHebrew]]:
+    """
+    Extract the numbers of all the verses (by default, all the verses with numbers in the Bible).
+    """
+    if verses is None:
+        verses = get_verses_with_numbers()
+    return {verse: get_numeric_hebrews(verse) for verse in verses}
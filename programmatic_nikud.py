@@ -1,138 +1,151 @@
 import re
-from dataclasses import dataclass, field
+import unicodedata
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from typing import Iterable, List, NamedTuple, Union, Optional, Tuple
 
 from bible_types import Time, NumericHebrew
 from bible_utils import tokenize_words_and_punctuations
+from corpus_encoding import get_verses_with_category
+from lexicon import Category, lookup
 from nikud_utils import NIKUD_PATTERN
 from read_bible import get_bible, get_bible_as_one_text
+from utils import LRUCache, normalize_vowels
 
 
-UNITS_MAP = {
+UNITS_MAP_F = {
     # Feminine
     'אַחַת': 1,
-    'שְׁתַּיִם': 2,
-    'שָׁלוֹשׁ': 3,
-    'שָׁלֹשׁ': 3,  # Added shortened form
-    'אַרְבַּע': 4,
+    'שְׁתַּיִם': 2,
+    'שָׁלוֹשׁ': 3,
+    'שָׁלֹשׁ': 3,  # Added shortened form
+    'אַרְבַּע': 4,
     'חָמֵשׁ': 5,
     'חֲמֵשׁ': 5,
-    'שֵׁשׁ': 6,
-    'שֶׁשׁ': 6,  # Added shortened form
-    'שֶׁבַע': 7,
-    'שְׁמֹנֶה': 8,
-    'תֵּשַׁע': 9,
-    'תֵשַׁע': 9,
-    'תְשַׁע': 9,  # Added shortened form
-    'תְּשַׁע': 9,  # Added shortened form
+    'שֵׁשׁ': 6,
+    'שֶׁשׁ': 6,  # Added shortened form
+    'שֶׁבַע': 7,
+    'שְׁמֹנֶה': 8,
+    'תֵּשַׁע': 9,
+    'תֵשַׁע': 9,
+    'תְשַׁע': 9,  # Added shortened form
+    'תְּשַׁע': 9,  # Added shortened form
+}
 
+UNITS_MAP_M = {
     # Masculine
     'אֶחָד': 1,
-    'שְׁנַיִם': 2,
-    'שְׁנָיִם': 2,
-    'שְׁלֹשָׁה': 3,
-    'שְׁלוֹשָׁה': 3,
-    'אַרְבָּעָה': 4,
-    'חֲמִשָּׁה': 5,
-    'שִׁשָּׁה': 6,
-    'שִׁבְעָה': 7,
-    'שִׁבְעָנָה': 7,
-    'שְׁמוֹנָה': 8,
-    'שְׁמֹנָה': 8,
-    'תִּשְׁעָה': 9,
+    'שְׁנַיִם': 2,
+    'שְׁנָיִם': 2,
+    'שְׁלֹשָׁה': 3,
+    'שְׁלוֹשָׁה': 3,
+    'אַרְבָּעָה': 4,
+    'חֲמִשָּׁה': 5,
+    'שִׁשָּׁה': 6,
+    'שִׁבְעָה': 7,
+    'שִׁבְעָנָה': 7,
+    'שְׁמוֹנָה': 8,
+    'שְׁמֹנָה': 8,
+    'תִּשְׁעָה': 9,
+}
 
+UNITS_MAP_CONSTRUCT = {
     # Construct
-    'שְׁתֵּי': 2,
-    'שְׁנֵי': 2,
-
-    'שְׁלֹשֶׁת': 3,
-    'אַרְבַּעַת': 4,
-    'חֲמֵשֶׁת': 5,
-    'שֵׁשֶׁת': 6,
-    'שִׁבְעַת': 7,
-    'שְׁמוֹנַת': 8,
-    'שְׁמֹנַת': 8,
-    'תִשְׁעַת': 9,
+    'שְׁתֵּי': 2,
+    'שְׁנֵי': 2,
+
+    'שְׁלֹשֶׁת': 3,
+    'אַרְבַּעַת': 4,
+    'חֲמֵשֶׁת': 5,
+    'שֵׁשֶׁת': 6,
+    'שִׁבְעַת': 7,
+    'שְׁמוֹנַת': 8,
+    'שְׁמֹנַת': 8,
+    'תִשְׁעַת': 9,
+}
 
+UNITS_MAP_CONJUNCTIVE = {
     # Conjunctive
-    'עַשְׁתֵּי': 1,
-    'שְׁתֵּים': 2,
-    'שְׁנֵים': 2,
-    'שְּׁנֵים': 2,
-    'שְׁלֹשׁ': 3,
-    'אַרְבָּע': 4,
-    'שְׁבַע': 7,
-    'שְׁמוֹנֶה': 8,
+    'עַשְׁתֵּי': 1,
+    'שְׁתֵּים': 2,
+    'שְׁנֵים': 2,
+    'שְּׁנֵים': 2,
+    'שְׁלֹשׁ': 3,
+    'אַרְבָּע': 4,
+    'שְׁבַע': 7,
+    'שְׁמוֹנֶה': 8,
 }
 
+UNITS_MAP = UNITS_MAP_F | UNITS_MAP_M | UNITS_MAP_CONSTRUCT | UNITS_MAP_CONJUNCTIVE
+
+
 ORDINAL_MAP_M = {
     # Masculine
     'רִאשׁוֹן': 1,
-    'שֵׁנִי': 2,
-    'שֵּׁנִי': 2,
-    'שְׁלִישִׁי': 3,
-    'שְּׁלִישִׁי': 3,
+    'שֵׁנִי': 2,
+    'שֵּׁנִי': 2,
+    'שְׁלִישִׁי': 3,
+    'שְּׁלִישִׁי': 3,
     'רְבִיעִי': 4,
-    'חֲמִישִׁי': 5,
-    'שִׁשִּׁי': 6,
-    'שִּׁשִּׁי': 6,
-    'שְּׁבִיעִי': 7,
-    'שְּׁמִינִי': 8,
-    'תְּשִׁיעִי': 9,
-    'עֲשִׂירִי': 10,
+    'חֲמִישִׁי': 5,
+    'שִׁשִּׁי': 6,
+    'שִּׁשִּׁי': 6,
+    'שְּׁבִיעִי': 7,
+    'שְּׁמִינִי': 8,
+    'תְּשִׁיעִי': 9,
+    'עֲשִׂירִי': 10,
 }
 
 ORDINAL_MAP_F = {
     # Feminine
     'רִאשׁוֹנָה': 1,
-    'שְׁנִיָה': 2,
-    'שֵּׁנִית': 2,
-    'שְׁלִישִׁית': 3,
-    'שְּׁלִישִׁית': 3,
+    'שְׁנִיָה': 2,
+    'שֵּׁנִית': 2,
+    'שְׁלִישִׁית': 3,
+    'שְּׁלִישִׁית': 3,
     'רְבִיעִית': 4,
-    'חֲמִישִׁית': 5,
-    'שִׁשִּׁית': 6,
-    'שִּׁשִּׁית': 6,
-    'שְּׁבִיעִית': 7,
-    'שְּׁבִיעִת': 7,
-    'שְׁמִינִית': 8,
-    'תְּשִׁיעִית': 9,
-    'עֲשִׂירִית': 10,
+    'חֲמִישִׁית': 5,
+    'שִׁשִּׁית': 6,
+    'שִּׁשִּׁית': 6,
+    'שְּׁבִיעִית': 7,
+    'שְּׁבִיעִת': 7,
+    'שְׁמִינִית': 8,
+    'תְּשִׁיעִית': 9,
+    'עֲשִׂירִית': 10,
 }
 
 ORDINAL_MAP = ORDINAL_MAP_M | ORDINAL_MAP_F
 
 TENS_NUM_MAP = {
     # Feminine
-    'עֶשֶׂר': 10,
-    'עָשָׂר': 10,
+    'עֶשֶׂר': 10,
+    'עָשָׂר': 10,
 
-    'עֲשֶׂרֶת': 10,
+    'עֲשֶׂרֶת': 10,
 
     # Masculine
-    'עֲשָׂרָה': 10,
+    'עֲשָׂרָה': 10,
 
     # Construct
-    'עֶשְׂרֵה': 10,
+    'עֶשְׂרֵה': 10,
 
     # Tens (neutral across genders)
-    'עֶשְׂרִים': 20,
-    'שְׁלוֹשִׁים': 30,
-    'שְׁלֹשִׁים': 30,
-    'אַרְבָּעִים': 40,
-    'חֲמִשִּׁים': 50,
-    'שִׁשִּׁים': 60,
-    'שִׁבְעִים': 70,
-    'שְׁמֹנִים': 80,
-    'שְׁמוֹנִים': 80,
-    'תִשְׁעִים': 90,
-    'תִּשְׁעִים': 90,
+    'עֶשְׂרִים': 20,
+    'שְׁלוֹשִׁים': 30,
+    'שְׁלֹשִׁים': 30,
+    'אַרְבָּעִים': 40,
+    'חֲמִשִּׁים': 50,
+    'שִׁשִּׁים': 60,
+    'שִׁבְעִים': 70,
+    'שְׁמֹנִים': 80,
+    'שְׁמוֹנִים': 80,
+    'תִשְׁעִים': 90,
+    'תִּשְׁעִים': 90,
 }
 
 COUPLE_MAP = {
     'מָאתַיִם': 200,
-    'אַלְפַּיִם': 2000,
+    'אַלְפַּיִם': 2000,
 }
 
 HUNDREDS_MAP = {
@@ -148,8 +161,8 @@ HUNDREDS_PLURAL_MAP = {
 }
 
 PLURAL_MAP = {
-    'שָׁבֻעִים': 7,
-    'עֲשָׂרֹת': 10,
+    'שָׁבֻעִים': 7,
+    'עֲשָׂרֹת': 10,
     'אֶלֶף': 1000,
     'אָלֶף': 1000,
     'אֲלָפִים': 1000,
@@ -166,13 +179,13 @@ ALL_PLURAL_MAP = PLURAL_MAP | HUNDREDS_PLURAL_MAP
 ALL_NUMBER_WORDS = set(FIXED_MAP) | set(HUNDREDS_MAP) | set(ALL_PLURAL_MAP)
 
 # Time words
-SHANA_WORDS = {"שָׁנָה", "שָׁנָה", "שְׁנוֹת", "שָׁנִים", "שְׁנֵי", "הַשָּׁנִים"}
-SHANA_STARTER = {"בַשָּׁנָה", "בִּשְׁנַת", "בַּשָּׁנָה", "שְׁנַת"}
-MONTH_WORDS = {"לַחֹדֶשׁ", "לְחֹדֶשׁ", "חֹדֶשׁ", "חֳדָשִׁים", "לַחֹדֶשׁ"}
-MONTH_STARTER = {"בַּחֹדֶשׁ", "הַחֹדֶשׁ", "וּבַחֹדֶשׁ"}
+SHANA_WORDS = {"שָׁנָה", "שְׁנוֹת", "שָׁנִים", "שְׁנֵי", "הַשָּׁנִים"}
+SHANA_STARTER = {"בִּשְׁנַת", "בַּשָּׁנָה", "שְׁנַת"}
+MONTH_WORDS = {"לַחֹדֶשׁ", "לְחֹדֶשׁ", "חֹדֶשׁ", "חֳדָשִׁים"}
+MONTH_STARTER = {"בַּחֹדֶשׁ", "הַחֹדֶשׁ", "וּבַחֹדֶשׁ"}
 TO_MONTH = {"לַחֹדֶשׁ", "לְחֹדֶשׁ", "בַחֹדֶשׁ"}
-DAY_WORDS = {'יָמִים', 'יוֹם', 'הַיָּמִים'}
-DAY_STARTER = {'בַּיּוֹם', 'יוֹם', 'וּבַיּוֹם'}
+DAY_WORDS = {'יָמִים', 'יוֹם', 'הַיָּמִים'}
+DAY_STARTER = {'בַּיּוֹם', 'יוֹם', 'וּבַיּוֹם'}
 NIGHT_WORDS = {'לַיְלָה', 'לָיְלָה', 'לֵיל', 'לֵילוֹת'}
 TIME_WORDS = SHANA_WORDS | MONTH_WORDS | DAY_WORDS | NIGHT_WORDS
 STARTER_TIME_WORDS = SHANA_STARTER | MONTH_STARTER | DAY_STARTER
@@ -185,26 +198,23 @@ for word in ALL_NUMBER_WORDS | ALL_TIME_WORDS:
 
 
 EXCEPTION_BECAUSE_OF_PREVIOUS_WORD = [
-    ('שָׁנִי', 'וְשֵׁשׁ'),
-    ('בְּאֵר', 'שֶׁבַע'),
-    ('בְאֵר', 'שֶׁבַע'),
+    ('שָׁנִי', 'וְשֵׁשׁ'),
+    ('בְּאֵר', 'שֶׁבַע'),
     ('קִרְיַת', 'אַרְבַּע'),
-    ('קִרְיַת', 'אַרְבַּע'),
-    ('קִרְיַת', 'הָאַרְבַּע'),
-    ('בַּת', 'שֶׁבַע'),
+    ('קִרְיַת', 'הָאַרְבַּע'),
+    ('בַּת', 'שֶׁבַע'),
     ('בִּגְדֵי', 'שֵׁשׁ'),
     ('יְמֵי', 'שֵׁנִי'),
     ('תוֹלַעַת', 'שָׁנִי'),
-    ('שָׁנִי', 'וְשֵׁשׁ'),
 ]
 
 EXCEPTIONS_BECAUSE_OF_NEXT_WORD = [
-    ('שְׁנֵי', 'חַיַּי'),
-    ('שְׁנֵי', 'חַיֵּי'),
-    ('שְׁנֵי', 'חַיֶּיךָ'),
-    ('שְׁנֵי', 'חַיָּיו'),
-    ('שְׁנֵי', 'מְגוּרַי'),
-    ('שֶׁבַע', 'בֶּן'),  #  שֶׁבַע בֶּן בכרי
+    ('שְׁנֵי', 'חַיַּי'),
+    ('שְׁנֵי', 'חַיֵּי'),
+    ('שְׁנֵי', 'חַיֶּיךָ'),
+    ('שְׁנֵי', 'חַיָּיו'),
+    ('שְׁנֵי', 'מְגוּרַי'),
+    ('שֶׁבַע', 'בֶּן'),  #  שֶׁבַע בֶּן בכרי
 ]
 
 THE_ONE = [
@@ -216,7 +226,7 @@ ALL_EXCEPTION_WORDS = set(w for w, _ in EXCEPTION_BECAUSE_OF_PREVIOUS_WORD) | se
 ALL_WORDS = ALL_NUMBER_WORDS | ALL_TIME_WORDS | ALL_EXCEPTION_WORDS
 
 CUT_AT = {
-#    "וְאִישׁ בְּמָעוֹן וּמַעֲשֵׂהוּ בַכַּרְמֶל, וְהָאִישׁ גָּדוֹל מְאֹד, וְלוֹ צֹאן שְׁלֹשֶׁת-אֲלָפִים"
+#    "וְאִישׁ בְּמָעוֹן וּמַעֲשֵׂהוּ בַכַּרְמֶל, וְהָאִישׁ גָּדוֹל מְאֹד, וְלוֹ צֹאן שְׁלֹשֶׁת-אֲלָפִים"
 }
 
 
@@ -251,7 +261,9 @@ def preprocess_token(token: str, letters: Iterable[ConjugateLetter] = ConjugateL
                 return result, [letter]
             if result in expected_nouns:
                 return result, [letter]
-            rec_token, rec_letters = preprocess_token(result, letters, expected_nouns)
+            # a conjugate letter is never repeated (e.g., the 'מְמַ' of 'מְמַשֵּׁשׁ' is not two prefixes)
+            other_letters = [other for other in letters if other != letter]
+            rec_token, rec_letters = preprocess_token(result, other_letters, expected_nouns)
             if rec_token in expected_nouns:
                 return rec_token, rec_letters + [letter]
     return token, []
@@ -261,16 +273,59 @@ class ConjWord(NamedTuple):
     raw_word: str = None
     word: str = None
     conjugate_letters: List[ConjugateLetter] = None
+    category: int = 0  # lexicon Category flags
+    value: Optional[int] = None
 
     @classmethod
-    def from_raw_word(cls, raw_word: str, expected_nouns: Iterable[str] = None):
-        expected_nouns = expected_nouns or ALL_WORDS
-        word, conjugate_letters = preprocess_token(raw_word, expected_nouns=expected_nouns)
-        return cls(raw_word, word, conjugate_letters)
+    def from_raw_word(cls, raw_word: str):
+        entry = lookup(raw_word)
+        if entry is None:
+            return cls(raw_word, raw_word, [])
+        return cls(raw_word, entry.word, list(entry.conjugate_letters), entry.category, entry.value)
+
+    def is_(self, category: int) -> bool:
+        return bool(self.category & category)
+
+
+class Ambiguity(NamedTuple):
+    """The constructs of a verse that the parser resolves by a rule of thumb (see GetHebrewNumbers.get_ambiguity)."""
+    exceptions: int = 0  # a number word that the exception lists do not read as a number (e.g. בְּאֵר שֶׁבַע)
+    adjacent_phrases: int = 0  # phrases that touch, where the parser had to choose where one number ends
+    fractions: int = 0
+    unresolved_shnei: int = 0  # a lone שְׁנֵי read as two (two of), which may also be years of
+    mixed_units: int = 0  # a time of more than one unit (years, months and days)
+    the_one: int = 0  # a lone אֶחָד or אַחַת, which is often "a" or "one of" rather than a count
+    missing_numbers: int = 0  # numbers that the maleh extractor finds and the parser does not (see routing.py)
+
+    @property
+    def score(self) -> float:
+        return sum(weight * count for weight, count in zip(AMBIGUITY_WEIGHTS, self))
+
+
+AMBIGUITY_WEIGHTS = Ambiguity(exceptions=1, adjacent_phrases=1, fractions=1, unresolved_shnei=0.5, mixed_units=0.5,
+                              the_one=0.5, missing_numbers=1)
+
+
+# Memos of the parsing of whole verse texts, and of runs of lexicon words (see GetHebrewNumbers._iter_segments)
+VERSE_MEMO = LRUCache(maxsize=4096)
+SEGMENT_MEMO = LRUCache(maxsize=16384)
+
+
+def get_memo_stats() -> dict:
+    return {'verse': VERSE_MEMO.stats, 'segment': SEGMENT_MEMO.stats}
+
+
+def clear_memos():
+    VERSE_MEMO.clear()
+    SEGMENT_MEMO.clear()
 
 
 @dataclass
 class GetHebrewNumbers:
+    """
+    The numbers of a verse. The words are looked up NFC-normalized, but the quotes and the spans of the results are
+    of the verse as given (normalization only reorders the marks of a word, so its words are the same).
+    """
     verse: str
 
     numeric_hebrews_indices_and_total: List[Tuple[int, int, Union[int, float, Time]]] = field(default_factory=list)
@@ -291,7 +346,7 @@ class GetHebrewNumbers:
         return self.current_phrase_first_index is None
 
     def _tokenze(self):
-        verse = self.verse
+        verse = normalize_vowels(self.verse)
         for cut in CUT_AT:
             verse = verse.replace(cut, cut + '|')
         is_word_and_raw_tokens = tokenize_words_and_punctuations(verse)
@@ -359,7 +414,8 @@ class GetHebrewNumbers:
         end = end if end is not None else self.current_phrase_last_index
         if self.current_phrase_first_index is None:
             return
-        is_all_time = all(self.conj_words[i].word in ALL_TIME_WORDS - {'שְׁנֵי'} for i in range(self.current_phrase_first_index, end + 1, 2))
+        is_all_time = all(self.conj_words[i].is_(Category.ALL_TIME) and self.conj_words[i].word != 'שְׁנֵי'
+                          for i in range(self.current_phrase_first_index, end + 1, 2))
         if is_all_time:
             self.reset_phrase()
             return
@@ -383,19 +439,19 @@ class GetHebrewNumbers:
             following_conj_word = self.conj_words[end + 2] if end + 2 < len(self.conj_words) else ConjWord()
             last_conj_word = self.conj_words[end]
             if not isinstance(total, Time):
-                if preceding_conj_word.word in DAY_WORDS:
+                if preceding_conj_word.is_(Category.DAY):
                     total = Time(days=total)
                     if can_add_previous:
                         start -= 2
-                elif preceding_conj_word.word in MONTH_WORDS:
+                elif preceding_conj_word.is_(Category.MONTH):
                     total = Time(months=total, is_date=True)
                     if can_add_previous:
                         start -= 2
             if not isinstance(total, Time) or total.is_day_only() and not total.is_date:
-                if following_conj_word.raw_word in TO_MONTH | {"בַּחֹדֶשׁ"} \
-                        and last_conj_word.word not in ORDINAL_MAP_F:
+                if (following_conj_word.is_(Category.TO_MONTH) or following_conj_word.raw_word == "בַּחֹדֶשׁ") \
+                        and not last_conj_word.is_(Category.ORDINAL_F):
                     if isinstance(total, Time):
-                        total.is_date = True
+                        total = replace(total, is_date=True)
                     else:
                         total = Time(days=total, is_date=True)
                     if can_add_next:
@@ -404,7 +460,72 @@ class GetHebrewNumbers:
         self.numeric_hebrews_indices_and_total = new_numeric_hebrews_indices_and_total
 
     def get(self):
-        self._tokenze()
+        cached = VERSE_MEMO.get(self.verse)
+        if cached is None:
+            self._tokenze()
+            self.numeric_hebrews_indices_and_total = self._get_totals_by_segments()
+            VERSE_MEMO.put(self.verse, (tuple(self.conj_words), tuple(self.numeric_hebrews_indices_and_total)))
+        else:
+            conj_words, totals = cached
+            self.conj_words = list(conj_words)
+            self.numeric_hebrews_indices_and_total = list(totals)
+        return self._get_numeric_hebrew()
+
+    def get_ambiguity(self) -> Ambiguity:
+        """The ambiguity of the verse, from its words and the numbers found (call after `get`)."""
+        conj_words = self.conj_words
+        totals = self.numeric_hebrews_indices_and_total
+        exceptions = 0
+        for j in range(0, len(conj_words), 2):
+            conj_word = conj_words[j]
+            if not conj_word.category:
+                continue
+            previous_conj_word = conj_words[j - 2] if j - 2 >= 0 else ConjWord()
+            next_conj_word = conj_words[j + 2] if j + 2 < len(conj_words) else ConjWord()
+            exceptions += (previous_conj_word.word, conj_word.raw_word) in EXCEPTION_BECAUSE_OF_PREVIOUS_WORD \
+                or (previous_conj_word.raw_word, conj_word.raw_word) in EXCEPTION_BECAUSE_OF_PREVIOUS_WORD \
+                or (conj_word.word, next_conj_word.raw_word) in EXCEPTIONS_BECAUSE_OF_NEXT_WORD
+        lone_words = [conj_words[start] for start, end, _ in totals if start == end]
+        return Ambiguity(
+            exceptions=exceptions,
+            adjacent_phrases=sum(next_start <= end + 2 for (_, end, _), (next_start, _, _) in zip(totals, totals[1:])),
+            fractions=sum(isinstance(total, float) and not total.is_integer() for _, _, total in totals),
+            unresolved_shnei=sum(conj_word.word == 'שְׁנֵי' for conj_word in lone_words),
+            mixed_units=sum(isinstance(total, Time) and sum(map(bool, (total.years, total.months, total.days))) > 1
+                            for _, _, total in totals),
+            the_one=sum(conj_word.is_(Category.THE_ONE) for conj_word in lone_words),
+        )
+
+    def _iter_segments(self):
+        """
+        Yield (offset, conj_words) of the runs of lexicon words, each with one word of context on either side.
+        A word that is not in the lexicon terminates any phrase, so each run is parsed the same on its own.
+        """
+        conj_words = self.conj_words
+        j = 0
+        while j < len(conj_words):
+            if not conj_words[j].category:
+                j += 2
+                continue
+            start = max(j - 2, 0)
+            while j < len(conj_words) and conj_words[j].category:
+                j += 2
+            yield start, conj_words[start:j + 1]
+
+    def _get_totals_by_segments(self):
+        totals = []
+        for offset, conj_words in self._iter_segments():
+            key = ''.join(conj_word.raw_word for conj_word in conj_words)
+            segment_totals = SEGMENT_MEMO.get(key)
+            if segment_totals is None:
+                parser = GetHebrewNumbers(key, conj_words=conj_words)
+                parser._parse()
+                segment_totals = parser.numeric_hebrews_indices_and_total
+                SEGMENT_MEMO.put(key, tuple(segment_totals))
+            totals.extend((start + offset, end + offset, total) for start, end, total in segment_totals)
+        return totals
+
+    def _parse(self):
         conj_words = self.conj_words
         j = -2
         while j <= len(conj_words) - 3:
@@ -412,25 +533,25 @@ class GetHebrewNumbers:
             current_conj_word = conj_words[j]
             previous_conj_word = conj_words[j - 2] if j - 2 >= 0 else ConjWord()
             next_conj_word = conj_words[j + 2] if j + 2 < len(conj_words) else ConjWord()
-            raw_word, word, conjugate_letters = current_conj_word
+            raw_word, word, conjugate_letters, category, value = current_conj_word
 
             next_punctuation = conj_words[j + 1].word if j + 1 < len(conj_words) else ''
             previous_punctuation = conj_words[j - 1].word if j - 1 >= 0 else ''
 
             # Should we terminate the current phrase before adding the current word?
             if conjugate_letters not in [[], [ConjugateLetter.VAV]] \
-                    and previous_conj_word.word not in STARTER_TIME_WORDS and current_conj_word.raw_word not in TO_MONTH:
+                    and not previous_conj_word.is_(Category.STARTER_TIME) and not category & Category.TO_MONTH:
                 self.terminate_phrase()
             elif previous_punctuation.startswith(':') or '|' in previous_punctuation:
                 self.terminate_phrase()
-            elif word in STARTER_TIME_WORDS and word not in TIME_WORDS:
+            elif category & Category.STARTER_TIME and not category & Category.TIME:
                 self.terminate_phrase()
             elif previous_conj_word.raw_word == raw_word:
                 self.terminate_phrase()
-            elif raw_word == 'מֵאָה' and next_conj_word.word not in ALL_TIME_WORDS \
+            elif raw_word == 'מֵאָה' and not next_conj_word.is_(Category.ALL_TIME) \
                 and self.current_phrase_first_index is not None \
                     and not any(
-                conj_words[t].word in ALL_PLURAL_MAP | COUPLE_MAP for t in range(self.current_phrase_first_index, j)):
+                conj_words[t].is_(Category.ALL_PLURAL | Category.COUPLE) for t in range(self.current_phrase_first_index, j)):
                 self.terminate_phrase()
 
             if (previous_conj_word.word, raw_word) in EXCEPTION_BECAUSE_OF_PREVIOUS_WORD \
@@ -438,48 +559,46 @@ class GetHebrewNumbers:
                 self.terminate_phrase()
             elif (word, next_conj_word.raw_word) in EXCEPTIONS_BECAUSE_OF_NEXT_WORD:
                 self.terminate_phrase()
-            elif word in THE_ONE and self.is_first \
-                    and next_conj_word.raw_word not in ["עֶשְׂרֵה", "לַחֹדֶשׁ"] \
+            elif category & Category.THE_ONE and self.is_first \
+                    and next_conj_word.raw_word not in ["עֶשְׂרֵה", "לַחֹדֶשׁ"] \
                     and (conjugate_letters == [ConjugateLetter.HEY] or
                     next_conj_word.conjugate_letters != [ConjugateLetter.VAV]):
                 self.add_number(j, 1)
                 self.terminate_phrase()
-            elif self.is_first and word in SHANA_STARTER:
+            elif self.is_first and category & Category.SHANA_STARTER:
                 self.multiply_all_thus_far(j, Time(0, is_date=True))
-            elif self.is_first and word in MONTH_STARTER:
+            elif self.is_first and category & Category.MONTH_STARTER:
                 self.multiply_all_thus_far(j, Time(months=0, is_date=True))
-            elif self.is_first and word in DAY_STARTER:
+            elif self.is_first and category & Category.DAY_STARTER:
                 self.multiply_all_thus_far(j, Time(days=0, is_date=True))
-            elif word in SHANA_WORDS and not (word == 'שְׁנֵי' and len(self.segment_parts) == 0) and not self.is_first:
+            elif category & Category.SHANA and not (word == 'שְׁנֵי' and len(self.segment_parts) == 0) and not self.is_first:
                 self.multiply_all_thus_far(j, Time(1))
-            elif raw_word in TO_MONTH and not self.is_first:
+            elif category & Category.TO_MONTH and not self.is_first:
                 if not isinstance(self.total, Time):
                     self.multiply_all_thus_far(j, Time(days=1))
                 else:
                     self._append_phrase(j)
-                self.total.is_date = True
-            elif word in MONTH_WORDS and not self.is_first:
+                self.total = replace(self.total, is_date=True)
+            elif category & Category.MONTH and not self.is_first:
                 self.multiply_all_thus_far(j, Time(months=1))
-            elif word in DAY_WORDS and not self.is_first:
+            elif category & Category.DAY and not self.is_first:
                 self.multiply_all_thus_far(j, Time(days=1))
-            elif word in NIGHT_WORDS and not self.is_first:
+            elif category & Category.NIGHT and not self.is_first:
                 self.multiply_all_thus_far(j, Time(days=0))
-            elif word in FIXED_MAP:
+            elif category & Category.FIXED:
                 if self.is_first:
-                    if previous_conj_word.word in ["לַחֹדֶשׁ"] and conjugate_letters == [ConjugateLetter.HEY]:
+                    if previous_conj_word.word == "לַחֹדֶשׁ" and conjugate_letters == [ConjugateLetter.HEY]:
                         self.multiply_all_thus_far(None, Time(months=0, is_date=True))
-                value = FIXED_MAP[word]
-                if word in ORDINAL_MAP_F:
+                if category & Category.ORDINAL_F:
                     if next_conj_word.raw_word and next_conj_word.raw_word.startswith('ה') and ConjugateLetter.HEY not in conjugate_letters:
                         value = 1 / value
-                if next_conj_word.word in HUNDREDS_PLURAL_MAP:
+                if next_conj_word.is_(Category.HUNDREDS_PLURAL):
                     self.add_number(j, value * 100)
                     j += 2
                     self._append_phrase(j)
                 else:
                     self.add_number(j, value)
-            elif word in ALL_PLURAL_MAP:
-                value = ALL_PLURAL_MAP[word]
+            elif category & Category.ALL_PLURAL:
                 if conjugate_letters:
                     self.add_number(j, value)
                 else:
@@ -488,17 +607,30 @@ class GetHebrewNumbers:
                 self.terminate_phrase()
         self.terminate_phrase()
         self._adjust_dates_retroactively()
-        return self._get_numeric_hebrew()
+
+    def _get_char_offsets(self) -> List[int]:
+        """The character offset of each token in the verse (as given), and the length of the verse."""
+        if unicodedata.is_normalized('NFC', self.verse):
+            tokens = [conj_word.raw_word for conj_word in self.conj_words]
+        else:
+            tokens = [token for _, token in tokenize_words_and_punctuations(self.verse)]
+        offsets = [0]
+        for token in tokens:
+            offsets.append(offsets[-1] + len(token))
+        return offsets
 
     def _get_numeric_hebrew(self):
+        offsets = self._get_char_offsets()
         return [
             NumericHebrew(
                 book='',
                 chapter='',
                 letter='',
-                quote=''.join(conj_word.raw_word for conj_word in self.conj_words[start:end + 1]),
+                quote=self.verse[offsets[start]:offsets[end + 1]],
                 number=total,
                 entity='',
+                start=offsets[start],
+                end=offsets[end + 1],
             ) for start, end, total in self.numeric_hebrews_indices_and_total]
 
 
@@ -508,7 +640,8 @@ def iter_hebrew_numbers(with_hatayot: bool = True):
 
 
 def is_word_in_hebrew_numbers(word: str) -> bool:
-    return word in iter_hebrew_numbers() or preprocess_token(word, expected_nouns=ALL_WORDS)[0] in iter_hebrew_numbers()
+    entry = lookup(word)
+    return entry is not None and entry.is_number
 
 
 def is_numbers_in_verse(verse) -> bool:
@@ -518,9 +651,4 @@ def is_numbers_in_verse(verse) -> bool:
 
 
 def get_verses_with_numbers(with_nikud: bool = True, remove_punctuations: bool = True) -> list:
-    verses = []
-    for verse in get_bible(with_nikud=with_nikud, remove_punctuations=remove_punctuations):
-        if is_numbers_in_verse(verse.text):
-            verses.append(verse)
-
-    return verses
+    return get_verses_with_category(Category.NUMBER, with_nikud=with_nikud, remove_punctuations=remove_punctuations)
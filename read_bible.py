@@ -5,9 +5,13 @@ from typing import List
 from bs4 import BeautifulSoup
 
 from bible_types import Verse, Verses
+from utils import get_fingerprint, load_or_create_pickle, normalize_vowels
 
 ROOT_DIRECTORY = Path(__file__).parent
 
+# Bump when the parsing of the html books changes, to invalidate the cached corpus
+CORPUS_VERSION = 1
+
 BIBLES = dict()
 
 
@@ -68,6 +72,8 @@ def get_book_from_html(html_content: str, remove_punctuations: bool = True) -> V
                 verse_text = clean_text(verse_text)
             else:
                 verse_text = verse_text.strip()
+            # canonical (NFC) order of the nikud marks, the same as in the word tables
+            verse_text = normalize_vowels(verse_text)
             fixed_book_name = book_name + book_letter
             if fixed_book_name == 'עזרא / נחמיה ע':
                 fixed_book_name = 'עזרא'
@@ -85,17 +91,35 @@ def get_bible(with_nikud: bool = False, remove_punctuations: bool = True) -> Ver
         name = "books_maleh"
 
     if (name, remove_punctuations) not in BIBLES:
-        verse = []
-        for file_name in get_all_html_files(name):
-            html = get_html(file_name)
-            book = get_book_from_html(html, remove_punctuations)
-            verse.extend(book)
-
-        BIBLES[(name, remove_punctuations)] = verse
+        BIBLES[(name, remove_punctuations)] = load_or_create_pickle(
+            f'{name}_{"clean" if remove_punctuations else "raw"}.pkl',
+            get_books_fingerprint(name),
+            lambda: _read_books(name, remove_punctuations),
+        )
 
     return BIBLES[(name, remove_punctuations)]
 
 
+def _read_books(name: str, remove_punctuations: bool) -> Verses:
+    verses = []
+    for file_name in get_all_html_files(name):
+        html = get_html(file_name)
+        book = get_book_from_html(html, remove_punctuations)
+        verses.extend(book)
+    return verses
+
+
+def get_books_fingerprint(name: str) -> str:
+    """
+    Fingerprint of the html books, so the cached corpus is re-created when any of them changes.
+    """
+    contents = []
+    for file_name in get_all_html_files(name):
+        with open(file_name, 'rb') as file:
+            contents.append(get_fingerprint(Path(file_name).name, file.read()))
+    return get_fingerprint(CORPUS_VERSION, contents)
+
+
 def get_bible_as_one_text(with_nikud: bool = False, remove_punctuations: bool = True) -> str:
     return '\n'.join([verse.text for verse in get_bible(with_nikud, remove_punctuations)])
 
@@ -0,0 +1,75 @@
+"""
+An on-disk cache of the rendered rows, so that a build only renders the verses whose results changed.
+
+A fragment is keyed by a fingerprint of the verse, its numeric hebrews, RENDER_VERSION and the lexicon tables, and
+by its format.
+The cache is bounded to `maxsize` fragments (least recently used are evicted), and is saved in the cache directory.
+"""
+from __future__ import annotations
+
+import pickle
+from typing import Dict, Iterable
+
+from bible_types import FORMATS, RENDER_VERSION, VerseAndNumericHebrews
+from lexicon import get_tables_fingerprint
+from utils import CACHE_DIRECTORY, CacheStats, LRUCache, get_fingerprint, write_atomically
+
+RENDER_CACHE_FILE_NAME = 'render_cache.pkl'
+RENDER_CACHE_MAXSIZE = 30000  # fragments: all the formats of ~10000 verses
+
+
+def get_render_key(verse_and_numeric_hebrews: VerseAndNumericHebrews, tables_fingerprint: str = None) -> str:
+    # the repr of a NumericHebrew has all its fields (including the span); the rendering maps the numeric hebrews
+    # with lexicon lookups, so the key is of the lexicon tables as well
+    if tables_fingerprint is None:
+        tables_fingerprint = get_tables_fingerprint()
+    return get_fingerprint(RENDER_VERSION, tables_fingerprint, verse_and_numeric_hebrews.verse,
+                           verse_and_numeric_hebrews.numeric_hebrews)
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = RENDER_CACHE_MAXSIZE, file_name: str = RENDER_CACHE_FILE_NAME):
+        self.fragments = LRUCache(maxsize)
+        self.file_name = file_name
+        self.tables_fingerprint = get_tables_fingerprint()
+
+    @classmethod
+    def load(cls, maxsize: int = RENDER_CACHE_MAXSIZE, file_name: str = RENDER_CACHE_FILE_NAME) -> RenderCache:
+        render_cache = cls(maxsize, file_name)
+        path = CACHE_DIRECTORY / file_name
+        if path.exists():
+            try:
+                with open(path, 'rb') as file:
+                    items = pickle.load(file)
+            except Exception:  # unreadable, or pickled by an older version of the code
+                items = []
+            for key, fragment in items:
+                render_cache.fragments.put(key, fragment)
+            render_cache.fragments.evictions = 0
+        return render_cache
+
+    def save(self):
+        write_atomically(CACHE_DIRECTORY / self.file_name,
+                         pickle.dumps(self.fragments.items(), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def render(self, verse_and_numeric_hebrews: VerseAndNumericHebrews, formats: Iterable[str] = FORMATS) \
+            -> Dict[str, str]:
+        """
+        As VerseAndNumericHebrews.render; the formats that are not cached are rendered in one pass.
+        """
+        key = get_render_key(verse_and_numeric_hebrews, self.tables_fingerprint)
+        rendered = {}
+        for format in formats:
+            fragment = self.fragments.get((key, format))
+            if fragment is not None:
+                rendered[format] = fragment
+        missing_formats = [format for format in formats if format not in rendered]
+        if missing_formats:
+            for format, fragment in verse_and_numeric_hebrews.render(missing_formats).items():
+                self.fragments.put((key, format), fragment)
+                rendered[format] = fragment
+        return rendered
+
+    @property
+    def stats(self) -> CacheStats:
+        return self.fragments.stats
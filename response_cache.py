@@ -0,0 +1,93 @@
+"""
+An on-disk cache of the responses of the LLM, so that re-runs (after a crash, or of unchanged prompts) do not call
+the API again.
+
+A response is keyed by a hash of the model, the system prompt, the user prompt and the json schema of the response
+format, and is saved in its own json file (named by the key), with the latency of the call that got it.
+The cache is bounded to `max_bytes` (the least recently used responses are evicted).
+In replay mode, a miss raises ResponseCacheMiss instead of calling the API, so runs are offline and reproducible.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Type
+
+from pydantic import BaseModel
+
+from utils import CACHE_DIRECTORY, CacheStats, get_fingerprint, write_atomically
+
+RESPONSE_CACHE_DIRECTORY = CACHE_DIRECTORY / 'llm_responses'
+RESPONSE_CACHE_MAX_BYTES = 200 * 2 ** 20
+
+
+class ResponseCacheMiss(KeyError):
+    pass
+
+
+def get_response_key(model: str, system_prompt: str, user_prompt: str,
+                     response_format: Optional[Type[BaseModel]] = None) -> str:
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True) if response_format else None
+    return get_fingerprint(model, system_prompt, user_prompt, schema)
+
+
+class ResponseCache:
+    def __init__(self, directory: Path = RESPONSE_CACHE_DIRECTORY, max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+                 replay: bool = False):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.replay = replay
+        self.hits = self.misses = self.evictions = 0
+        self.saved_latency = 0.  # seconds: the latency of the calls that got the responses of the hits
+        self.sizes = {path.stem: path.stat().st_size for path in self.directory.glob('*.json')}
+
+    def _get_path(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    def __contains__(self, key: str):
+        return key in self.sizes
+
+    def get(self, key: str, response_format: Optional[Type[BaseModel]] = None):
+        """The cached response (parsed into `response_format`), None (or ResponseCacheMiss in replay) if missing."""
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):  # not cached (or evicted by another process), or a corrupt file
+            self.misses += 1
+            if self.replay:
+                raise ResponseCacheMiss(key)
+            return None
+        os.utime(path)  # recently used
+        self.hits += 1
+        self.saved_latency += entry['latency']
+        response = entry['response']
+        return response_format.model_validate(response) if response_format else response
+
+    def put(self, key: str, response, latency: float):
+        content = json.dumps(dict(
+            response=response.model_dump(mode='json') if isinstance(response, BaseModel) else response,
+            latency=latency,
+        ), ensure_ascii=False).encode('utf-8')
+        write_atomically(self._get_path(key), content)
+        self.sizes[key] = len(content)
+        self._evict()
+
+    def _evict(self):
+        total = sum(self.sizes.values())
+        if total <= self.max_bytes:
+            return
+        paths = sorted(self.directory.glob('*.json'), key=lambda path: path.stat().st_mtime_ns)
+        for path in paths:
+            if total <= self.max_bytes:
+                break
+            total -= self.sizes.pop(path.stem, 0)
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+
+    @property
+    def stats(self) -> CacheStats:
+        """The size is in bytes."""
+        return CacheStats(self.hits, self.misses, self.evictions, sum(self.sizes.values()), self.max_bytes)
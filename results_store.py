@@ -0,0 +1,185 @@
+"""
+A compact binary store of the extraction results (verses_to_numerics), read lazily.
+
+    header    magic, version, number of verses, offset of the index
+    records   per verse: a uint32 length, and the verse with its numeric hebrews as a compact json array
+    index     json: the source the store was converted from, and the (book, chapter, letter) and offset of each record
+
+Opening reads only the header and the index; a verse is decoded when it is looked up, and iterating decodes the
+records in order, from a memory-mapped file.
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bible_types import NumericHebrew, Time, Verse
+from utils import CACHE_DIRECTORY, write_atomically
+from verses_to_matches import FILE_NAME, JOURNAL_FILE_NAME, dump_verses_to_numerics, load_or_create_verses_to_numerics
+
+STORE_FILE_NAME = CACHE_DIRECTORY / 'verses_to_numerics.bin'  # derived from the json (and the journal)
+STORE_MAGIC = b'BNRS'
+STORE_VERSION = 1
+
+HEADER = struct.Struct('<4sIIQ')  # magic, version, number of verses, offset of the index
+RECORD_LENGTH = struct.Struct('<I')
+ITERATION_CHUNK_SIZE = 1000  # records
+
+VerseReference = Tuple[str, str, str]  # book, chapter, letter
+
+
+def _encode_record(verse: Verse, numeric_hebrews: List[NumericHebrew]) -> bytes:
+    encoded_numeric_hebrews = []
+    for numeric_hebrew in numeric_hebrews:
+        number = dataclasses.asdict(numeric_hebrew.number) if isinstance(numeric_hebrew.number, Time) \
+            else numeric_hebrew.number
+        encoded = [numeric_hebrew.quote, number, numeric_hebrew.entity, numeric_hebrew.start, numeric_hebrew.end]
+        location = [numeric_hebrew.book, numeric_hebrew.chapter, numeric_hebrew.letter]
+        if location != [verse.book, verse.chapter, verse.letter]:
+            encoded += location
+        encoded_numeric_hebrews.append(encoded)
+    record = json.dumps([verse.book, verse.chapter, verse.letter, verse.text, encoded_numeric_hebrews],
+                        ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return RECORD_LENGTH.pack(len(record)) + record
+
+
+def _decode_record(record: bytes) -> Tuple[Verse, List[NumericHebrew]]:
+    return _decode_record_obj(json.loads(record))
+
+
+def _decode_record_obj(record_obj: list) -> Tuple[Verse, List[NumericHebrew]]:
+    book, chapter, letter, text, encoded_numeric_hebrews = record_obj
+    numeric_hebrews = []
+    for encoded in encoded_numeric_hebrews:
+        quote, number, entity, start, end = encoded[:5]
+        if isinstance(number, dict):
+            number = Time(**number)
+        location = encoded[5:] or (book, chapter, letter)
+        numeric_hebrews.append(NumericHebrew(*location, quote, number, entity, start, end))
+    return Verse(book, chapter, letter, text), numeric_hebrews
+
+
+def write_results_store(file_name: str, verses_to_numerics: Dict[Verse, List[NumericHebrew]], source: str = ''):
+    chunks = []
+    index = []
+    offset = HEADER.size
+    for verse, numeric_hebrews in verses_to_numerics.items():
+        record = _encode_record(verse, numeric_hebrews)
+        index.append([verse.book, verse.chapter, verse.letter, offset])
+        chunks.append(record)
+        offset += len(record)
+    index_bytes = json.dumps(dict(source=source, verses=index), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header = HEADER.pack(STORE_MAGIC, STORE_VERSION, len(index), offset)
+    write_atomically(file_name, b''.join([header] + chunks + [index_bytes]))
+
+
+class ResultsStore:
+    """
+    A read-only view of a store file. Maps (book, chapter, letter) to (Verse, [NumericHebrew, ...]).
+    """
+
+    def __init__(self, file_name: str = STORE_FILE_NAME):
+        with open(file_name, 'rb') as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_verses, index_offset = HEADER.unpack_from(self._buffer)
+        if magic != STORE_MAGIC or version != STORE_VERSION:
+            self._buffer.close()
+            raise ValueError(f"{file_name} is not a results store of version {STORE_VERSION}")
+        index = json.loads(self._buffer[index_offset:])
+        self.source = index['source']
+        self._offsets = {(book, chapter, letter): offset for book, chapter, letter, offset in index['verses']}
+        self._records_end = index_offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._buffer.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, reference: VerseReference):
+        return tuple(reference) in self._offsets
+
+    def references(self) -> List[VerseReference]:
+        return list(self._offsets)
+
+    def _read_record(self, offset: int) -> Tuple[bytes, int]:
+        """The record at offset, and the offset of the next record."""
+        length, = RECORD_LENGTH.unpack_from(self._buffer, offset)
+        start = offset + RECORD_LENGTH.size
+        return self._buffer[start:start + length], start + length
+
+    def get(self, book: str, chapter: str, letter: str) -> Optional[Tuple[Verse, List[NumericHebrew]]]:
+        offset = self._offsets.get((book, chapter, letter))
+        if offset is None:
+            return None
+        return _decode_record(self._read_record(offset)[0])
+
+    def __getitem__(self, reference: VerseReference) -> Tuple[Verse, List[NumericHebrew]]:
+        item = self.get(*reference)
+        if item is None:
+            raise KeyError(reference)
+        return item
+
+    def __iter__(self) -> Iterator[Tuple[Verse, List[NumericHebrew]]]:
+        # the records are parsed in chunks, as one json array each (one json.loads per record is slower than the json)
+        records = []
+        offset = HEADER.size
+        while offset < self._records_end:
+            record, offset = self._read_record(offset)
+            records.append(record)
+            if len(records) == ITERATION_CHUNK_SIZE or offset >= self._records_end:
+                yield from map(_decode_record_obj, json.loads(b'[' + b','.join(records) + b']'))
+                records = []
+
+    def to_dict(self) -> Dict[Verse, List[NumericHebrew]]:
+        return dict(iter(self))
+
+
+def _get_source_signature(file_name: str, journal_file_name: str) -> str:
+    """The size and modification time of the json (and of the journal), to tell if the store is up to date."""
+    def signature(name):
+        if not os.path.exists(name):
+            return '-'
+        stat = os.stat(name)
+        return f'{stat.st_size}:{stat.st_mtime_ns}'
+    return f'{signature(file_name)}|{signature(journal_file_name)}'
+
+
+def convert_json_to_store(file_name: str = FILE_NAME, store_file_name: str = STORE_FILE_NAME,
+                          journal_file_name: str = JOURNAL_FILE_NAME):
+    write_results_store(store_file_name, load_or_create_verses_to_numerics(file_name, journal_file_name),
+                        source=_get_source_signature(file_name, journal_file_name))
+
+
+def convert_store_to_json(store_file_name: str = STORE_FILE_NAME, file_name: str = FILE_NAME):
+    with ResultsStore(store_file_name) as store:
+        dump_verses_to_numerics(file_name, store.to_dict())
+
+
+def open_results_store(file_name: str = FILE_NAME, store_file_name: str = STORE_FILE_NAME,
+                       journal_file_name: str = JOURNAL_FILE_NAME) -> ResultsStore:
+    """
+    The store of the results of the json (and the journal), converted when it is missing or out of date.
+    """
+    source = _get_source_signature(file_name, journal_file_name)
+    if os.path.exists(store_file_name):
+        try:
+            store = ResultsStore(store_file_name)
+        except (OSError, ValueError, struct.error):  # an unreadable or old store
+            pass
+        else:
+            if store.source == source:
+                return store
+            store.close()
+    convert_json_to_store(file_name, store_file_name, journal_file_name)
+    return ResultsStore(store_file_name)
@@ -0,0 +1,156 @@
+"""
+The extracted numbers as a columnar table (NumPy arrays), for statistics and plots without re-running the extraction.
+
+One row per numeric hebrew. Saved to .npz (the columns as they are) or to CSV.
+"""
+from __future__ import annotations
+
+import csv
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from bible_types import DAYS, MONTHS, TIME_DTYPE, YEARS, Time, TimeArray, VerseAndNumericHebrews
+from utils import CACHE_DIRECTORY
+
+RESULTS_FILE_NAME = CACHE_DIRECTORY / 'results_programmatic.npz'  # of find_programmatic
+NO_SPAN = -1
+
+# The columns of the table, one value per numeric hebrew
+COLUMNS = (
+    'verse_index',  # int32: the index of the verse in the verses the table was created from
+    'book',  # int16: index into book_names
+    'chapter',  # str
+    'letter',  # str
+    'value',  # float64: the number (a time in its dominant unit, see TimeArray.to_number)
+    'is_time',  # bool
+    'years',  # int64 (0 if not set)
+    'months',  # int64
+    'days',  # int64
+    'units',  # uint8: the YEARS/MONTHS/DAYS mask of the set time fields (0 if not a time)
+    'unit',  # uint8: the dominant unit of a time (0 if not a time)
+    'is_date',  # bool
+    'start',  # int32: the span of the quote in the verse text (NO_SPAN if unknown)
+    'end',  # int32
+)
+
+UNIT_NAMES = {0: '', YEARS: 'years', MONTHS: 'months', DAYS: 'days'}
+
+
+class ResultsTable:
+    def __init__(self, columns: Dict[str, np.ndarray], book_names: np.ndarray):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+        self.book_names = book_names
+
+    @classmethod
+    def from_verses_and_numeric_hebrews(cls, verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews]) \
+            -> ResultsTable:
+        book_codes = {}
+        verse_indices, books, chapters, letters, numbers, spans = [], [], [], [], [], []
+        for verse_index, verse_and_numeric_hebrews in enumerate(verses_and_numeric_hebrews):
+            verse = verse_and_numeric_hebrews.verse
+            book = book_codes.setdefault(verse.book, len(book_codes))
+            for numeric_hebrew in verse_and_numeric_hebrews.numeric_hebrews:
+                verse_indices.append(verse_index)
+                books.append(book)
+                chapters.append(verse.chapter)
+                letters.append(verse.letter)
+                numbers.append(numeric_hebrew.number)
+                spans.append((numeric_hebrew.start, numeric_hebrew.end) if numeric_hebrew.has_span
+                             else (NO_SPAN, NO_SPAN))
+
+        is_time = np.array([isinstance(number, Time) for number in numbers], dtype=bool)
+        times = TimeArray(np.zeros(len(numbers), dtype=TIME_DTYPE))
+        times.packed[is_time] = TimeArray.from_times(number for number in numbers if isinstance(number, Time)).packed
+        value = np.array([0 if isinstance(number, Time) else number for number in numbers], dtype=np.float64)
+        value[is_time] = times.to_number()[is_time]
+        spans = np.array(spans, dtype=np.int32).reshape(-1, 2)
+        return cls(dict(
+            verse_index=np.array(verse_indices, dtype=np.int32),
+            book=np.array(books, dtype=np.int16),
+            chapter=np.array(chapters, dtype=str),
+            letter=np.array(letters, dtype=str),
+            value=value,
+            is_time=is_time,
+            years=times.packed['years'],
+            months=times.packed['months'],
+            days=times.packed['days'],
+            units=times.packed['units'],
+            unit=np.where(is_time, times.dominant_unit(), 0).astype(np.uint8),
+            is_date=times.packed['is_date'],
+            start=spans[:, 0],
+            end=spans[:, 1],
+        ), np.array(list(book_codes), dtype=str))
+
+    def __len__(self):
+        return len(self.value)
+
+    @property
+    def times(self) -> TimeArray:
+        packed = np.zeros(len(self), dtype=TIME_DTYPE)
+        for name in TIME_DTYPE.names:
+            packed[name] = getattr(self, name)
+        return TimeArray(packed[self.is_time])
+
+    def save_npz(self, file_name):
+        np.savez(file_name, book_names=self.book_names, **{name: getattr(self, name) for name in COLUMNS})
+
+    @classmethod
+    def load_npz(cls, file_name) -> ResultsTable:
+        with np.load(file_name) as data:
+            return cls({name: data[name] for name in COLUMNS}, data['book_names'])
+
+    def to_csv(self, file_name):
+        columns = [getattr(self, name).tolist() for name in COLUMNS]
+        columns[COLUMNS.index('book')] = self.book_names[self.book].tolist()
+        columns[COLUMNS.index('unit')] = [UNIT_NAMES[unit] for unit in columns[COLUMNS.index('unit')]]
+        with open(file_name, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(COLUMNS)
+            writer.writerows(zip(*columns))
+
+    def group_by_book(self) -> Dict[str, np.ndarray]:
+        """The row indices of each book (in the order of the books)."""
+        order = np.argsort(self.book, kind='stable')
+        books, starts = np.unique(self.book[order], return_index=True)
+        return {str(self.book_names[book]): rows for book, rows in zip(books, np.split(order, starts[1:]))}
+
+    def count_by_book(self, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        books = self.book if mask is None else self.book[mask]
+        counts = np.bincount(books, minlength=len(self.book_names))
+        return {str(book_name): int(count) for book_name, count in zip(self.book_names, counts)}
+
+    def sum_by_book(self, mask: Optional[np.ndarray] = None) -> Dict[str, float]:
+        mask = np.ones(len(self), dtype=bool) if mask is None else mask
+        sums = np.bincount(self.book[mask], weights=self.value[mask], minlength=len(self.book_names))
+        return {str(book_name): float(total) for book_name, total in zip(self.book_names, sums)}
+
+
+def get_cdf(values: np.ndarray, normalize: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """The sorted values, and the (fraction of) values below each of them."""
+    x = np.sort(values)
+    y = np.arange(len(x), dtype=np.float64)
+    if normalize and len(x) > 1:
+        y /= y[-1]
+    return x, y
+
+
+def get_log_histogram(values: np.ndarray, bins_per_decade: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """Counts of the positive values in logarithmic bins, and the bin edges."""
+    values = values[values > 0]
+    if not len(values):
+        return np.zeros(0, dtype=np.int64), np.zeros(1)
+    low, high = np.floor(np.log10(values.min())), np.ceil(np.log10(values.max()))
+    edges = np.logspace(low, high, int(max(high - low, 1) * bins_per_decade) + 1)
+    counts, edges = np.histogram(values, bins=edges)
+    return counts, edges
+
+
+if __name__ == "__main__":
+    import sys
+
+    table = ResultsTable.load_npz(sys.argv[1] if len(sys.argv) > 1 else RESULTS_FILE_NAME)
+    print(f"{len(table)} numbers ({int(table.is_time.sum())} times) in {len(table.book_names)} books")
+    for book, count in table.count_by_book().items():
+        print(f"{book}: {count}")
@@ -0,0 +1,99 @@
+"""
+Routing between the programmatic parser and the LLM: only the verses that the (nikud) parser finds ambiguous (see
+programmatic_nikud.Ambiguity) go to the LLM, the rest keep the numbers of the parser.
+
+The ambiguity of a verse is that of its nikud edition, by reference, so the verses to route can be of either edition
+(find_by_llm sends the maleh verses). A verse that is not in the nikud edition cannot be scored and goes to the LLM.
+The parser is also checked against the maleh extractor (programmatic): a verse where the parser finds fewer numbers,
+or none in a verse with number words, is ambiguous (Ambiguity.missing_numbers).
+
+    python routing.py  # the routed fraction, and the agreement with the existing LLM results
+"""
+from typing import Dict, Iterable, List, Tuple
+
+from bible_types import NumericHebrew, Verse
+from diff_results import VerseReference, get_reference
+from programmatic import extract_number_phrases, is_numbers_in_verse
+from programmatic_nikud import Ambiguity, GetHebrewNumbers
+from read_bible import get_bible
+
+AMBIGUITY_THRESHOLD = 0.5  # verses with an ambiguity score of at least this go to the LLM
+
+
+def count_missing_numbers(maleh_text: str, numeric_hebrews: List[NumericHebrew]) -> int:
+    """
+    How many fewer numbers the parser finds than the maleh extractor, and at least one if the parser finds none in a
+    verse with number words.
+    """
+    missing = len(extract_number_phrases(maleh_text)) - len(numeric_hebrews)
+    return max(missing, int(not numeric_hebrews and is_numbers_in_verse(maleh_text)))
+
+
+def parse_verses(references: Iterable[VerseReference]) \
+        -> Dict[VerseReference, Tuple[Verse, List[NumericHebrew], Ambiguity]]:
+    """The nikud verse of each reference, with the numbers the parser finds in it and its ambiguity."""
+    references = set(references)
+    maleh_texts = {get_reference(verse): verse.text for verse in get_bible()}
+    parsed = {}
+    for verse in get_bible(with_nikud=True):
+        reference = get_reference(verse)
+        if reference in references:
+            parser = GetHebrewNumbers(verse.text)
+            numeric_hebrews = parser.get()
+            missing_numbers = count_missing_numbers(maleh_texts.get(reference, ''), numeric_hebrews)
+            parsed[reference] = verse, numeric_hebrews, parser.get_ambiguity()._replace(missing_numbers=missing_numbers)
+    return parsed
+
+
+def route_verses(verses: List[Verse], threshold: float = AMBIGUITY_THRESHOLD) \
+        -> Tuple[List[Verse], Dict[Verse, List[NumericHebrew]]]:
+    """
+    The verses for the LLM (in order), and the results of the parser for the other verses (keyed by their nikud
+    verses).
+    """
+    parsed = parse_verses(map(get_reference, verses))
+    to_llm, programmatic_results = [], {}
+    for verse in verses:
+        reference = get_reference(verse)
+        if reference not in parsed or parsed[reference][2].score >= threshold:
+            to_llm.append(verse)
+        else:
+            nikud_verse, numeric_hebrews, _ = parsed[reference]
+            programmatic_results[nikud_verse] = numeric_hebrews
+    return to_llm, programmatic_results
+
+
+if __name__ == "__main__":
+    import time
+    from diff_results import ResultsDiff
+    from find_by_llm import get_batches
+    from programmatic import get_verses_with_numbers
+    from results_store import open_results_store
+
+    verses = get_verses_with_numbers()
+    start = time.perf_counter()
+    to_llm, _ = route_verses(verses)
+    route_time = time.perf_counter() - start
+    print(f"{len(verses)} verses with numbers: {len(to_llm)} ({len(to_llm) / len(verses):.1%}) routed to the LLM, "
+          f"in {len(get_batches(to_llm))} requests instead of {len(get_batches(verses))} (routing {route_time:.2f}s)")
+
+    # On the existing LLM results (of the verses that are in the nikud edition): the parser against the LLM on the
+    # verses that are not routed, on those that are, and the hybrid (LLM on the routed verses only) against the LLM.
+    with open_results_store() as store:
+        llm_results = store.to_dict()
+    parsed = parse_verses(map(get_reference, llm_results))
+    llm_results = {verse: numeric_hebrews for verse, numeric_hebrews in llm_results.items()
+                   if get_reference(verse) in parsed}
+    is_routed = {verse: parsed[get_reference(verse)][2].score >= AMBIGUITY_THRESHOLD for verse in llm_results}
+    print(f"{len(llm_results)} verses with LLM results: {sum(is_routed.values()) / len(is_routed):.1%} routed")
+    for name, routed in [('not routed', False), ('routed', True)]:
+        reference = {verse: numeric_hebrews for verse, numeric_hebrews in llm_results.items()
+                     if is_routed[verse] == routed}
+        candidate = {parsed[get_reference(verse)][0]: parsed[get_reference(verse)][1] for verse in reference}
+        diff = ResultsDiff.from_results(reference, candidate)
+        print(f"parser vs LLM, {name}: {diff.count_by_category()}, agreement {diff.agreement_rate:.1%}")
+    hybrid = {verse if is_routed[verse] else parsed[get_reference(verse)][0]:
+              numeric_hebrews if is_routed[verse] else parsed[get_reference(verse)][1]
+              for verse, numeric_hebrews in llm_results.items()}
+    diff = ResultsDiff.from_results(llm_results, hybrid)
+    print(f"hybrid vs LLM: {diff.count_by_category()}, agreement {diff.agreement_rate:.1%}")
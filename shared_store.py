@@ -0,0 +1,198 @@
+"""
+A read-only store of the corpus, its encoding, the extracted numbers and the search postings, in one file that is
+memory-mapped by its readers, so that several processes share its pages (through the OS page cache) instead of each
+loading its own copy.
+
+    header    magic, version, length of the manifest
+    manifest  json: the dtype, shape and offset of each array
+    arrays    the raw arrays, each aligned to ARRAY_ALIGNMENT bytes
+
+Opening parses only the header and the manifest (a fixed number of arrays), so it takes the same time for any corpus.
+The arrays are views into the mapped file; nothing is copied until it is used.
+The file is replaced atomically, so readers that opened the previous file keep reading it.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from bible_types import Verse, VerseAndNumericHebrews
+from corpus_encoding import ARRAY_NAMES, CorpusEncoding, get_corpus_encoding
+from read_bible import get_bible
+from results_table import COLUMNS, ResultsTable
+from utils import CACHE_DIRECTORY, write_atomically
+
+SHARED_STORE_FILE_NAME = CACHE_DIRECTORY / 'shared_store.bin'
+SHARED_STORE_MAGIC = b'BNSS'
+SHARED_STORE_VERSION = 1
+HEADER = struct.Struct('<4sII')  # magic, version, length of the manifest
+ARRAY_ALIGNMENT = 64
+
+NO_VERSE = -1  # the corpus verse index of a result whose verse is not in the corpus
+
+# The arrays of the store, besides those of the encoding ('encoding.<name>') and of the results ('results.<name>')
+CORPUS_ARRAY_NAMES = (
+    'text',  # uint8: the utf-8 text of all the verses
+    'text_offsets',  # int64, per verse + 1: the text of verse i is text[text_offsets[i]:text_offsets[i+1]]
+    'book_names',  # str
+    'verse_books',  # int16, per verse: index into book_names
+    'verse_chapters',  # str, per verse
+    'verse_letters',  # str, per verse
+    'sorted_words',  # str: the vocabulary of the encoding, sorted
+    'sorted_word_ids',  # int32: the word id of each of sorted_words
+    'posting_offsets',  # int64, per word id + 1: the verses of word w are postings[posting_offsets[w]:...[w+1]]
+    'postings',  # int32: the (sorted, unique) indices of the verses containing each word
+    'value_order',  # int64: the rows of the results, by value
+    'sorted_values',  # float64: the values of the results, sorted
+)
+
+
+def _align(size: int) -> int:
+    return -(-size // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def _get_postings(encoding: CorpusEncoding):
+    """The verses of each word of the encoding, as offsets into the concatenated (sorted, unique) verse indices."""
+    token_verses = np.repeat(np.arange(encoding.num_verses, dtype=np.int64), np.diff(encoding.verse_offsets))
+    word_verses = np.unique(encoding.token_ids.astype(np.int64) * encoding.num_verses + token_verses)
+    words, verses = np.divmod(word_verses, encoding.num_verses)
+    posting_offsets = np.zeros(len(encoding.vocabulary) + 1, dtype=np.int64)
+    posting_offsets[1:] = np.cumsum(np.bincount(words, minlength=len(encoding.vocabulary)))
+    return posting_offsets, verses.astype(np.int32)
+
+
+def _get_arrays(verses: List[Verse], encoding: CorpusEncoding, results: ResultsTable,
+                result_verses: List[Verse]) -> Dict[str, np.ndarray]:
+    texts = [verse.text.encode('utf-8') for verse in verses]
+    text_offsets = np.zeros(len(verses) + 1, dtype=np.int64)
+    text_offsets[1:] = np.cumsum([len(text) for text in texts])
+    book_codes = {}
+    verse_books = np.array([book_codes.setdefault(verse.book, len(book_codes)) for verse in verses], dtype=np.int16)
+    sorted_word_ids = np.argsort(encoding.vocabulary).astype(np.int32)
+    posting_offsets, postings = _get_postings(encoding)
+    value_order = np.argsort(results.value, kind='stable')
+
+    # the verse indices of the results are re-mapped from the result verses to the verses of the corpus
+    corpus_indices = {(verse.book, verse.chapter, verse.letter): i for i, verse in enumerate(verses)}
+    result_corpus_indices = np.array([corpus_indices.get((verse.book, verse.chapter, verse.letter), NO_VERSE)
+                                      for verse in result_verses], dtype=np.int32)
+    results_columns = {name: getattr(results, name) for name in COLUMNS}
+    results_columns['verse_index'] = result_corpus_indices[results.verse_index]
+
+    arrays = dict(
+        text=np.frombuffer(b''.join(texts), dtype=np.uint8),
+        text_offsets=text_offsets,
+        book_names=np.array(list(book_codes), dtype=str),
+        verse_books=verse_books,
+        verse_chapters=np.array([verse.chapter for verse in verses], dtype=str),
+        verse_letters=np.array([verse.letter for verse in verses], dtype=str),
+        sorted_words=encoding.vocabulary[sorted_word_ids],
+        sorted_word_ids=sorted_word_ids,
+        posting_offsets=posting_offsets,
+        postings=postings,
+        value_order=value_order,
+        sorted_values=results.value[value_order],
+    )
+    arrays.update({f'encoding.{name}': np.asarray(getattr(encoding, name)) for name in ARRAY_NAMES})
+    arrays.update({f'results.{name}': column for name, column in results_columns.items()})
+    arrays['results.book_names'] = results.book_names
+    return arrays
+
+
+def write_shared_store(verses_and_numeric_hebrews: Iterable[VerseAndNumericHebrews],
+                       with_nikud: bool = False, remove_punctuations: bool = True,
+                       file_name=SHARED_STORE_FILE_NAME):
+    """
+    Write the store of an edition of the Bible (see `get_bible`) and of the numbers extracted from its verses.
+    """
+    verses_and_numeric_hebrews = list(verses_and_numeric_hebrews)
+    arrays = _get_arrays(get_bible(with_nikud=with_nikud, remove_punctuations=remove_punctuations),
+                         get_corpus_encoding(with_nikud, remove_punctuations),
+                         ResultsTable.from_verses_and_numeric_hebrews(verses_and_numeric_hebrews),
+                         [item.verse for item in verses_and_numeric_hebrews])
+    manifest = dict(arrays={})
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        manifest['arrays'][name] = [array.dtype.str, array.shape, offset]
+        offset += _align(array.nbytes)
+    manifest_bytes = json.dumps(manifest).encode('utf-8')
+    start = _align(HEADER.size + len(manifest_bytes))
+
+    content = bytearray(start + offset)
+    HEADER.pack_into(content, 0, SHARED_STORE_MAGIC, SHARED_STORE_VERSION, len(manifest_bytes))
+    content[HEADER.size:HEADER.size + len(manifest_bytes)] = manifest_bytes
+    for name, array in arrays.items():
+        array_offset = start + manifest['arrays'][name][2]
+        content[array_offset:array_offset + array.nbytes] = np.ascontiguousarray(array).tobytes()
+    write_atomically(file_name, bytes(content), sync=True)
+
+
+class SharedStore:
+    """
+    The arrays of a store file, memory-mapped (read-only).
+    `encoding` is the CorpusEncoding of the corpus and `results` the ResultsTable of the numbers (whose verse_index
+    is the index of the verse in the corpus, NO_VERSE if it is not in the corpus).
+    """
+
+    def __init__(self, file_name=SHARED_STORE_FILE_NAME):
+        with open(file_name, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, manifest_length = HEADER.unpack_from(buffer)
+        if magic != SHARED_STORE_MAGIC or version != SHARED_STORE_VERSION:
+            raise ValueError(f"{file_name} is not a shared store of version {SHARED_STORE_VERSION}")
+        manifest = json.loads(buffer[HEADER.size:HEADER.size + manifest_length])
+        start = _align(HEADER.size + manifest_length)
+        self.file_name = Path(file_name)
+        self.arrays = {name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=start + offset)
+                       for name, (dtype, shape, offset) in manifest['arrays'].items()}
+        for name in CORPUS_ARRAY_NAMES:
+            setattr(self, name, self.arrays[name])
+        self.encoding = CorpusEncoding({name: self.arrays[f'encoding.{name}'] for name in ARRAY_NAMES})
+        self.results = ResultsTable({name: self.arrays[f'results.{name}'] for name in COLUMNS},
+                                    self.arrays['results.book_names'])
+
+    @property
+    def num_verses(self) -> int:
+        return len(self.text_offsets) - 1
+
+    def get_verse(self, verse_index: int) -> Verse:
+        text = self.text[self.text_offsets[verse_index]:self.text_offsets[verse_index + 1]].tobytes().decode('utf-8')
+        return Verse(str(self.book_names[self.verse_books[verse_index]]), str(self.verse_chapters[verse_index]),
+                     str(self.verse_letters[verse_index]), text)
+
+    def get_word_id(self, word: str) -> int:
+        index = np.searchsorted(self.sorted_words, word)
+        if index == len(self.sorted_words) or self.sorted_words[index] != word:
+            return -1
+        return int(self.sorted_word_ids[index])
+
+    def find_word(self, word: str) -> np.ndarray:
+        """The (sorted) indices of the verses containing the word."""
+        word_id = self.get_word_id(word)
+        if word_id < 0:
+            return np.empty(0, dtype=np.int32)
+        return self.postings[self.posting_offsets[word_id]:self.posting_offsets[word_id + 1]]
+
+    def find_value(self, low: float, high: float = None) -> np.ndarray:
+        """The rows of the results with a value in [low, high] (the value `low` if no `high`), by value."""
+        high = low if high is None else high
+        return self.value_order[np.searchsorted(self.sorted_values, low, side='left'):
+                                np.searchsorted(self.sorted_values, high, side='right')]
+
+
+if __name__ == "__main__":
+    import time
+    from verses_to_matches import load_or_create_verses_to_numerics
+
+    write_shared_store(VerseAndNumericHebrews(verse, numeric_hebrews)
+                       for verse, numeric_hebrews in load_or_create_verses_to_numerics().items())
+    start = time.perf_counter()
+    store = SharedStore()
+    print(f"{SHARED_STORE_FILE_NAME}: {SHARED_STORE_FILE_NAME.stat().st_size:,} bytes, {store.num_verses} verses, "
+          f"{len(store.results)} numbers, opened in {(time.perf_counter() - start) * 1000:.2f}ms")
@@ -0,0 +1,31 @@
+import time
+
+from benchmarks.suite import IMPROVEMENT, NEW, OK, REGRESSION, Timing, compare, load_baseline, measure, \
+    save_baseline
+
+
+def test_measure():
+    calls, setups = [], []
+    timing = measure(lambda: calls.append(1), repeats=5, min_sample_time=0.001)
+    assert timing.number > 1 and timing.repeats == 5
+    assert len(calls) >= 1 + 5 * timing.number
+    assert timing.q1 <= timing.median <= timing.q3
+
+    timing = measure(lambda: time.sleep(0.002), setup=lambda: setups.append(1), repeats=3)
+    assert (timing.number, len(setups)) == (1, 1 + 3)
+    assert 0.002 <= timing.median < 0.05
+
+
+def test_compare_and_baseline(tmp_path):
+    baseline = {'same': Timing(1.0, 0.9, 1.1, 5, 1), 'slower': Timing(1.0, 0.9, 1.1, 5, 1),
+                'noisy': Timing(1.0, 0.5, 2.0, 5, 1), 'faster': Timing(1.0, 0.9, 1.1, 5, 1)}
+    save_baseline(baseline, tmp_path / 'baseline.json')
+    assert load_baseline(tmp_path / 'baseline.json') == baseline
+
+    timings = {'same': Timing(1.1, 1.0, 1.2, 5, 1), 'slower': Timing(1.5, 1.4, 1.6, 5, 1),
+               'noisy': Timing(1.5, 1.4, 1.6, 5, 1), 'faster': Timing(0.5, 0.4, 0.6, 5, 1),
+               'new': Timing(1.0, 0.9, 1.1, 5, 1)}
+    comparisons = compare(timings, baseline, dict.fromkeys(timings, 0.25))
+    assert {comparison.name: comparison.status for comparison in comparisons} == \
+           dict(same=OK, slower=REGRESSION, noisy=OK, faster=IMPROVEMENT, new=NEW)
+    assert compare({'slower': timings['slower']}, baseline, {'slower': 0.6})[0].status == OK
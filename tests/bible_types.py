@@ -0,0 +1,75 @@
+import dataclasses
+import pickle
+
+import pytest
+
+from bible_types import CoveredSpans, NumericHebrew, Time, TimeArray, Verse, VerseAndNumericHebrews, YEARS, MONTHS, DAYS
+
+
+def _numeric_hebrew(quote: str, start: int = None) -> NumericHebrew:
+    return NumericHebrew(book='', chapter='', letter='', quote=quote, number=1, entity='',
+                         start=start, end=None if start is None else start + len(quote))
+
+
+def test_covered_spans():
+    covered = CoveredSpans()
+    assert covered.add_if_free(5, 10)
+    assert not covered.add_if_free(8, 12)
+    assert not covered.add_if_free(0, 6)
+    assert covered.add_if_free(0, 5)
+    assert covered.add_if_free(10, 12)
+    assert covered.is_free(7, 7)
+    assert covered.starts == [0, 5, 10]
+
+
+def test_map_numeric_hebrews_skips_covered_matches():
+    first, second = _numeric_hebrew('א ב'), _numeric_hebrew('ב א')
+    verse_and_numeric_hebrews = VerseAndNumericHebrews(Verse('', '', '', 'א ב א ב א'), [first, second])
+    for show_only_one_match in [True, False]:
+        assert dict(verse_and_numeric_hebrews.map_numeric_hebrews(show_only_one_match)) == {first: [0], second: [6]}
+
+
+def test_map_numeric_hebrews_all_matches_and_keywords():
+    three = _numeric_hebrew('ושלוש')
+    verse_and_numeric_hebrews = VerseAndNumericHebrews(Verse('', '', '', 'שלוש ושלוש ושלוש'), [three])
+    assert dict(verse_and_numeric_hebrews.map_numeric_hebrews(True)) == {three: [5], 'שלוש': [0], 'ושלוש': [11]}
+    assert dict(verse_and_numeric_hebrews.map_numeric_hebrews(False)) == {three: [5, 11], 'שלוש': [0]}
+
+
+def test_map_numeric_hebrews_uses_spans():
+    two = _numeric_hebrew('לשני', start=11)
+    verse_and_numeric_hebrews = VerseAndNumericHebrews(Verse('', '', '', 'לשניהם אל, לשני הצדדים'), [two])
+    assert dict(verse_and_numeric_hebrews.map_numeric_hebrews()) == {two: [11]}
+
+
+def test_render_all_formats_in_one_pass():
+    three = _numeric_hebrew('ושלוש', start=5)
+    verse_and_numeric_hebrews = VerseAndNumericHebrews(Verse('בראשית', 'א', 'א', 'שלוש ושלוש ושלוש'), [three])
+    rendered = verse_and_numeric_hebrews.render()
+    assert rendered['text'].strip() == '(שלוש) (ושלוש) [1] (ושלוש)'
+    assert rendered['html'] == verse_and_numeric_hebrews.to_html()[0]
+    assert rendered['color_text'] == verse_and_numeric_hebrews.to_colored_text()
+
+
+def test_numeric_hebrew_value_equality_and_round_trip():
+    numeric_hebrew = NumericHebrew(book='ב', chapter='ג', letter='ד', quote='שלוש שנים', number=Time(years=3),
+                                   entity='שנים', start=4, end=13)
+    same = NumericHebrew.from_dict(numeric_hebrew.to_dict())
+    assert same == numeric_hebrew
+    assert len({numeric_hebrew, same}) == 1
+    with pytest.raises(AttributeError):
+        numeric_hebrew.quote = 'ארבע שנים'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        numeric_hebrew.number.is_date = True
+    assert pickle.loads(pickle.dumps(numeric_hebrew)) == numeric_hebrew
+    assert NumericHebrew.from_model(_numeric_hebrew('שלוש').to_model()) == _numeric_hebrew('שלוש')
+    assert 'start' not in _numeric_hebrew('שלוש').to_dict()
+
+
+def test_time_array_matches_time():
+    times = [Time(years=930), Time(years=1, months=6), Time(months=2), Time(days=7, is_date=True), Time(0, is_date=True)]
+    time_array = TimeArray.from_times(times)
+    assert list(time_array) == times
+    assert time_array.to_number().tolist() == [time.to_number() for time in times]
+    assert time_array.to_days().tolist() == [time.to_number(in_days=True) for time in times]
+    assert time_array.dominant_unit().tolist() == [YEARS, YEARS, MONTHS, DAYS, DAYS]
@@ -0,0 +1,32 @@
+import gzip
+import json
+
+from build_output import MANIFEST_FILE_NAME, BuildOutput, get_hashed_name
+
+
+def test_get_hashed_name():
+    assert get_hashed_name('data/index.json', b'a') == get_hashed_name('data/index.json', b'a')
+    assert get_hashed_name('data/index.json', b'a') != get_hashed_name('data/index.json', b'b')
+    assert get_hashed_name('data/index.json', b'a').startswith('data/index.')
+
+
+def test_build_output_skips_unchanged_and_removes_stale_files(tmp_path):
+    content = b'{"rows": []}' * 100
+    with BuildOutput(tmp_path) as output:
+        file = output.write('data/0.json', content, hashed=True)
+        output.write('index.html', b'<html></html>')
+    assert gzip.decompress((tmp_path / (file + '.gz')).read_bytes()) == content
+    assert not (tmp_path / 'index.html.gz').exists()  # not smaller than the file
+    assert json.loads((tmp_path / MANIFEST_FILE_NAME).read_text())['data/0.json']['file'] == file
+
+    with BuildOutput(tmp_path) as output:
+        assert output.write('data/0.json', content, hashed=True) == file
+        new_file = output.write('data/1.json', content + b' ', hashed=True)
+    assert not output.artifacts['data/0.json'].is_written
+    assert output.artifacts['data/1.json'].is_written
+    assert (tmp_path / 'index.html').exists()  # not hashed, so not removed
+
+    with BuildOutput(tmp_path) as output:
+        output.write('data/0.json', content + b'  ', hashed=True)
+    assert not (tmp_path / file).exists() and not (tmp_path / (file + '.gz')).exists()
+    assert not (tmp_path / new_file).exists()
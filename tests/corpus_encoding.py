@@ -0,0 +1,42 @@
+import numpy as np
+
+from corpus_encoding import NO_VALUE, get_corpus_encoding
+from lexicon import Category, lookup
+from programmatic_nikud import is_numbers_in_verse
+from read_bible import get_bible
+
+
+def test_encoding_reconstructs_the_words():
+    verses = get_bible(with_nikud=True, remove_punctuations=False)
+    encoding = get_corpus_encoding(with_nikud=True, remove_punctuations=False)
+    assert encoding.num_verses == len(verses)
+    for verse_index in [0, 100, len(verses) - 1]:
+        text = verses[verse_index].text
+        token_indices = range(encoding.verse_offsets[verse_index], encoding.verse_offsets[verse_index + 1])
+        words = [text[encoding.char_starts[i]:encoding.char_ends[i]] for i in token_indices]
+        assert words == encoding.get_verse_words(verse_index)
+
+
+def test_category_lookup_agrees_with_is_numbers_in_verse():
+    verses = get_bible(with_nikud=True, remove_punctuations=True)
+    encoding = get_corpus_encoding(with_nikud=True, remove_punctuations=True)
+    expected = [i for i, verse in enumerate(verses) if is_numbers_in_verse(verse.text)]
+    assert encoding.get_verse_indices_with_category(Category.NUMBER).tolist() == expected
+
+
+def test_find_phrase():
+    verses = get_bible(with_nikud=False, remove_punctuations=True)
+    encoding = get_corpus_encoding(with_nikud=False, remove_punctuations=True)
+    verse_indices = encoding.find_phrase('ויהיו כל ימי אדם'.split())
+    assert len(verse_indices) == 1
+    assert 'ויהיו כל ימי אדם' in verses[verse_indices[0]].text
+    assert len(encoding.find_phrase(['לא-מילה'])) == 0
+
+
+def test_attributes_of_number_words():
+    encoding = get_corpus_encoding(with_nikud=True, remove_punctuations=True)
+    assert isinstance(encoding.token_ids, np.memmap)
+    for word_id in np.flatnonzero(encoding.values != NO_VALUE):
+        entry = lookup(str(encoding.vocabulary[word_id]))
+        assert (entry.value, entry.category) == (encoding.values[word_id], encoding.categories[word_id])
+        assert len(entry.conjugate_letters) == encoding.prefix_lengths[word_id]
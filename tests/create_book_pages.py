@@ -0,0 +1,50 @@
+from bible_types import NumericHebrew, Verse, VerseAndNumericHebrews
+from create_book_pages import PAGES_INDEX_FILE_NAME, split_into_pages, write_book_pages
+from render_cache import RenderCache
+
+
+def _verse_and_numeric_hebrews(book: str, chapter: str, text: str) -> VerseAndNumericHebrews:
+    numeric_hebrew = NumericHebrew(book=book, chapter=chapter, letter='א', quote='שלושה', number=3, entity='')
+    return VerseAndNumericHebrews(Verse(book, chapter, 'א', text), [numeric_hebrew])
+
+
+ITEMS = [
+    _verse_and_numeric_hebrews('בראשית', 'א', 'שלושה'),
+    _verse_and_numeric_hebrews('בראשית', 'ב', 'שלושה בנים'),
+    _verse_and_numeric_hebrews('שמות', 'א', 'שלושה ימים'),
+]
+
+
+def test_split_into_pages():
+    assert [(page.file_name, len(page.verses_and_numeric_hebrews)) for page in split_into_pages(ITEMS)] == \
+           [('book_01.html', 2), ('book_02.html', 1)]
+    assert [page.file_name for page in split_into_pages(ITEMS, by_chapter=True)] == \
+           ['book_01_001.html', 'book_01_002.html', 'book_02_001.html']
+
+
+def test_write_book_pages_renders_only_changed_pages(tmp_path):
+    assert write_book_pages(ITEMS, tmp_path, max_workers=2).num_rendered == 2
+    assert 'שמות' in (tmp_path / PAGES_INDEX_FILE_NAME).read_text()
+    assert write_book_pages(ITEMS, tmp_path).num_rendered == 0
+
+    changed = ITEMS[:2] + [_verse_and_numeric_hebrews('שמות', 'א', 'שלושה ימים ושלושה לילות')]
+    report = write_book_pages(changed, tmp_path)
+    assert report.num_rendered == 1
+    assert 'לילות' in (tmp_path / 'book_02.html').read_text()
+
+    report = write_book_pages(ITEMS[:2], tmp_path)
+    assert report.num_removed == 1 and not (tmp_path / 'book_02.html').exists()
+
+
+def test_page_fingerprint_is_of_the_lexicon_tables():
+    page = split_into_pages(ITEMS)[0]
+    assert page.get_fingerprint('tables') != page.get_fingerprint('other tables')
+
+
+def test_write_book_pages_with_the_render_cache(tmp_path):
+    render_cache = RenderCache()
+    write_book_pages(ITEMS, tmp_path / 'first', render_cache=render_cache)
+    assert (render_cache.stats.hits, render_cache.stats.misses) == (0, 3)
+    assert write_book_pages(ITEMS, tmp_path / 'second', render_cache=render_cache).num_rendered == 2
+    assert render_cache.stats.hits == 3
+    assert (tmp_path / 'second' / 'book_01.html').read_text() == (tmp_path / 'first' / 'book_01.html').read_text()
@@ -0,0 +1,35 @@
+import json
+
+from bible_types import NumericHebrew, Time, Verse, VerseAndNumericHebrews
+from create_docs_data import DATA_DIRECTORY, INDEX_FILE_NAME, get_searchable_numbers, write_docs_data
+
+
+def test_get_searchable_numbers():
+    verse_html = "<span style='color:blue'>שבע</span><span style='color:green'> [7]</span> " \
+                 "<span style='color:blue'>ביום השני</span><span style='color:green'> [יום מספר 2]</span>"
+    assert get_searchable_numbers(verse_html) == [7, 2]
+
+
+def test_write_docs_data(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # the script is copied from the source tree, not from the current directory
+
+    def verse_and_numeric_hebrews(book, text, quote, number):
+        numeric_hebrew = NumericHebrew(book=book, chapter='א', letter='א', quote=quote, number=number, entity='')
+        return VerseAndNumericHebrews(Verse(book, 'א', 'א', text), [numeric_hebrew])
+    output = write_docs_data([
+        verse_and_numeric_hebrews('בראשית', 'שבעה ימים', 'שבעה ימים', Time(days=7)),
+        verse_and_numeric_hebrews('בראשית', 'שלושה', 'שלושה', 3),
+        verse_and_numeric_hebrews('בראשית', 'ארבעים', 'ארבעים', 40),
+        verse_and_numeric_hebrews('שמות', 'שלושה', 'שלושה', 3),
+    ], tmp_path, max_rows_per_shard=2)
+    index = json.loads((tmp_path / output.artifacts[f'{DATA_DIRECTORY}/{INDEX_FILE_NAME}'].file).read_text())
+    assert [(shard['book'], shard['first_row'], shard['num_rows']) for shard in index['shards']] == \
+           [('בראשית', 0, 2), ('בראשית', 2, 1), ('שמות', 3, 1)]
+    assert index['values'] == [3, 3, 7, 40]
+    assert index['rows'] == [1, 3, 0, 2]
+    shard = json.loads((tmp_path / index['shards'][1]['file']).read_text())
+    assert 'ארבעים' in shard['rows'][0][1]
+    shell = (tmp_path / 'index.html').read_text()
+    assert 'class="row"' not in shell
+    assert f'<script src="{output.artifacts["search.js"].file}" data-index="{output.artifacts["data/index.json"].file}">' \
+           in shell
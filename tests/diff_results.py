@@ -0,0 +1,41 @@
+from bible_types import NumericHebrew, Time, Verse
+from diff_results import AGREE, EXTRA, MISSING, VALUE_MISMATCH, ResultsDiff, get_reference
+
+MALEH = Verse('בראשית', 'ה', 'ה', 'ויהיו כל ימי אדם אשר חי תשע מאות שנה ושלושים שנה וימות')
+NIKUD = Verse('בראשית', 'ה', 'ה', 'וַיִּהְיוּ כָּל-יְמֵי אָדָם אֲשֶׁר-חַי תְּשַׁע מֵאוֹת שָׁנָה וּשְׁלֹשִׁים שָׁנָה וַיָּמֹת')
+OTHER = Verse('בראשית', 'א', 'ה', 'ויהי ערב ויהי בוקר יום אחד')
+
+
+def test_diff_aligns_by_verse_and_words():
+    reference = {
+        MALEH: [NumericHebrew(*MALEH[:3], 'תשע מאות שנה ושלושים שנה', 930, 'שנה'),
+                NumericHebrew(*MALEH[:3], 'כל', 1, '')],
+        OTHER: [NumericHebrew(*OTHER[:3], 'יום אחד', 1, 'יום')],
+    }
+    start = NIKUD.text.index('מֵאוֹת')  # a span that starts a word later, and ends at the same word
+    candidate = {
+        NIKUD: [NumericHebrew('', '', '', 'מֵאוֹת שָׁנָה וּשְׁלֹשִׁים שָׁנָה', Time(years=930), '', start,
+                              NIKUD.text.index(' וַיָּמֹת')),
+                NumericHebrew('', '', '', 'אָדָם', 1, '', NIKUD.text.index('אָדָם'), NIKUD.text.index(' אֲשֶׁר'))],
+        Verse(*OTHER[:3], 'וַיְהִי-עֶרֶב וַיְהִי-בֹקֶר, יוֹם אֶחָד'): [NumericHebrew('', '', '', 'יוֹם אֶחָד', 2, '', 29, 38)],
+    }
+    diff = ResultsDiff.from_results(reference, candidate)
+    assert diff.count_by_category() == {'agree': 1, 'value mismatch': 1, 'missing': 1, 'extra': 1}
+    rows = {(diff.references[verse], word_start): category
+            for verse, word_start, category in zip(diff.verse, diff.word_start, diff.category)}
+    assert rows == {(tuple(MALEH[:3]), 6): AGREE, (tuple(MALEH[:3]), 1): MISSING, (tuple(MALEH[:3]), 3): EXTRA,
+                    (tuple(OTHER[:3]), 4): VALUE_MISMATCH}
+    assert diff.agreement_rate == 0.25
+    assert diff.sort(('category',)).category.tolist() == [AGREE, VALUE_MISMATCH, MISSING, EXTRA]
+    assert diff.filter(EXTRA).candidate_quote.tolist() == ['אָדָם']
+
+
+def test_legacy_references_are_aligned():
+    assert get_reference(Verse('שמואל', 'א\xa0ג', 'ד', '')) == ('שמואל א', 'ג', 'ד')
+    assert get_reference(Verse('עזרא / נחמיה', 'נ\xa0ב', 'יא', '')) == ('נחמיה', 'ב', 'יא')
+    legacy = Verse('מלכים', 'ב\xa0א', 'יד', 'הנה ירדה אש מן השמיים ותאכל את שני שרי החמישים')
+    current = Verse('מלכים ב', 'א', 'יד', legacy.text)
+    diff = ResultsDiff.from_results({legacy: [NumericHebrew(*legacy[:3], 'שני', 2, '')]},
+                                    {current: [NumericHebrew(*current[:3], 'שני', 2, '')]})
+    assert diff.count_by_category() == {'agree': 1, 'value mismatch': 0, 'missing': 0, 'extra': 0}
+    assert diff.references == [('מלכים ב', 'א', 'יד')]
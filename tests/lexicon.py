@@ -0,0 +1,77 @@
+import pytest
+
+from lexicon import Category, Form, lookup, get_lexicon
+from utils import canonicalize
+from programmatic_nikud import ALL_WORDS, ConjugateLetter, TENS_NUM_MAP, UNITS_MAP_CONSTRUCT, SHANA_WORDS, \
+    preprocess_token
+
+
+def test_base_words_are_all_the_words():
+    assert set(get_lexicon().base_entries) == ALL_WORDS
+
+
+def test_lookup_prefixed_word():
+    thirty = next(word for word, value in TENS_NUM_MAP.items() if value == 30)
+    entry = lookup('וּ' + thirty)
+    assert entry.word == thirty
+    assert entry.conjugate_letters == (ConjugateLetter.VAV, )
+    assert entry.category & Category.TENS
+    assert entry.value == 30
+
+
+def test_lookup_word_with_several_categories():
+    for word in set(UNITS_MAP_CONSTRUCT) & SHANA_WORDS:
+        entry = lookup(word)
+        assert entry.category & Category.UNIT and entry.category & Category.SHANA
+        assert entry.form == Form.CONSTRUCT
+
+
+def test_lookup_non_number_word():
+    assert lookup('בְּרֵאשִׁית') is None
+
+
+def test_lookup_agrees_with_preprocess_token():
+    for surface, entry in get_lexicon().surfaces.items():
+        word, conjugate_letters = preprocess_token(surface, expected_nouns=ALL_WORDS)
+        if word in ALL_WORDS:
+            assert (entry.word, list(entry.conjugate_letters)) == (word, conjugate_letters)
+        elif entry is not None and entry.category & ~(Category.TO_MONTH | Category.MALEH_NUMBER):
+            if entry.conjugate_letters:  # a prefixed word that lost its dagesh lene to the prefix
+                word, _ = preprocess_token(surface, expected_nouns=get_lexicon().lenited_entries)
+            else:  # a bare variant of a listed word, resolved through its canonical key
+                word = surface
+            assert canonicalize(word) == canonicalize(entry.word)
+
+
+def test_lookup_variant_with_dagesh():
+    entry = lookup('תִשְׁעָה')
+    assert entry.word == 'תִּשְׁעָה'
+    assert entry.conjugate_letters == ()
+    assert entry.value == 9
+
+
+def test_lookup_prefixed_word_without_dagesh_lene():
+    entry = lookup('וּבַשָּׁנָה')
+    assert entry.word == 'בַּשָּׁנָה'
+    assert entry.conjugate_letters == (ConjugateLetter.VAV, )
+
+
+@pytest.mark.parametrize("surface, value", [
+    ('הַשְּׁלִישִׁי', 3),  # the dagesh forte after the article (Genesis 22:4)
+    ('הַשֵּׁנִי', 2),  # Numbers 1:1
+    ('הַשִּׁשִּׁי', 6),  # Genesis 1:31
+])
+def test_lookup_ordinal_after_the_article(surface, value):
+    entry = lookup(surface)
+    assert entry.conjugate_letters == (ConjugateLetter.HEY, )
+    assert entry.value == value
+
+
+@pytest.mark.parametrize("surface", [
+    'הַשָּׁבֻעִים',  # the weeks (Daniel 9:26), not seventy
+    'מְמַשֵּׁשׁ',  # groping (Deuteronomy 28:29), not 'מ' + 'מ' + six
+    'שֵׁנִית',  # again, not second
+    'הַמֵּאוֹת',  # (captains of) the hundreds
+])
+def test_lookup_non_number_variant(surface):
+    assert lookup(surface) is None
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+
+from bible_types import Verse
+from llm_metrics import Histogram, LLMMetrics, get_cost
+from llm_pipeline import RateLimiter
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 2, 5))
+    for value in [0.5, 1, 1.5, 3, 10]:
+        histogram.observe(value)
+    assert histogram.get_cumulative_counts() == [2, 3, 4, 5]
+    assert (histogram.quantile(0.4), histogram.quantile(0.5), histogram.quantile(1)) == (1, 2, float('inf'))
+    assert histogram.to_dict()['buckets'] == {'1': 2, '2': 3, '5': 4, '+Inf': 5}
+
+
+def test_metrics_of_a_batch(tmp_path):
+    metrics = LLMMetrics([tmp_path / 'metrics.json', tmp_path / 'metrics.prom'], tmp_path / 'batches.jsonl')
+    record = metrics.start_batch(0, [Verse('בראשית', 'א', letter, 'text') for letter in 'אבג'])
+    record.observe_request('gpt-4o', 0.3, error='RateLimitError')
+    record.observe_request('gpt-4o', 0.7, prompt_tokens=1000, completion_tokens=100, parse_failure=True)
+    record.observe_request('gpt-4o', 0.2, prompt_tokens=1000, completion_tokens=200)
+    metrics.commit_batch(record, num_numbers=4, num_unmatched=1)
+
+    saved = json.loads((tmp_path / 'metrics.json').read_text())
+    assert {name: saved[name] for name in ['requests', 'errors', 'parse_failures', 'retries', 'batches', 'verses',
+                                           'numbers', 'unmatched_numbers', 'prompt_tokens', 'completion_tokens']} \
+        == dict(requests=3, errors=1, parse_failures=1, retries=2, batches=1, verses=3, numbers=4,
+                unmatched_numbers=1, prompt_tokens=2000, completion_tokens=300)
+    assert saved['cost_usd'] == pytest.approx(get_cost('gpt-4o', 2000, 300)) == pytest.approx(0.008)
+    assert saved['errors_by_type'] == {'RateLimitError': 1}
+    assert saved['request_latency_seconds']['count'] == 3
+    prometheus = (tmp_path / 'metrics.prom').read_text().splitlines()
+    assert 'llm_errors_total{type="RateLimitError"} 1' in prometheus
+    assert 'llm_request_latency_seconds_bucket{le="0.25"} 1' in prometheus
+    assert 'llm_request_latency_seconds_count 3' in prometheus
+    [line] = (tmp_path / 'batches.jsonl').read_text().splitlines()
+    line = json.loads(line)
+    assert (line['first_verse'], line['attempts'], line['errors'], line['parse_failures'], line['latency']) == \
+           ('בראשית א א', 3, ['RateLimitError'], 1, pytest.approx(1.2))
+
+
+def test_metrics_against_the_stub_server(tmp_path):
+    pytest.importorskip('openai')
+    from find_by_llm import find_numbers_of_verses_with_client
+    from llm_stub import StubServer
+    from programmatic import get_verses_with_numbers
+    from verses_to_matches import VersesToNumericsJournal
+
+    verses = get_verses_with_numbers()[:45]
+    metrics = LLMMetrics(log_file_name=tmp_path / 'batches.jsonl')
+    with StubServer(latency=0.01, error_rate=0.3, parse_failure_rate=0.3, seed=1) as server:
+        with VersesToNumericsJournal(tmp_path / 'results.json', tmp_path / 'results.jsonl') as journal:
+            asyncio.run(find_numbers_of_verses_with_client(verses, journal, server.base_url, 'stub', concurrency=4,
+                                                           rate_limiter=RateLimiter(10 ** 6), base_delay=0.001,
+                                                           token_budget=1000, metrics=metrics))
+    counters = metrics.counters
+    assert server.num_errors > 0 and server.num_parse_failures > 0
+    assert (counters['requests'], counters['errors'], counters['parse_failures']) == \
+           (server.num_requests, server.num_errors, server.num_parse_failures)
+    assert counters['retries'] == server.num_errors + server.num_parse_failures
+    assert (counters['prompt_tokens'], counters['completion_tokens']) == \
+           (server.prompt_tokens, server.completion_tokens)
+    assert (counters['verses'], counters['numbers']) == (len(verses), len(verses))
+    lines = [json.loads(line) for line in (tmp_path / 'batches.jsonl').read_text().splitlines()]
+    assert [line['batch'] for line in lines] == list(range(counters['batches']))
+    assert sum(line['attempts'] for line in lines) == server.num_requests
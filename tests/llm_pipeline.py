@@ -0,0 +1,123 @@
+import asyncio
+import random
+import time
+
+import pytest
+
+from llm_pipeline import RateLimiter, pack_batches, run_pipeline, split_into_batches
+
+
+class FlakyError(Exception):
+    pass
+
+
+def test_pipeline_commits_in_order_with_bounded_concurrency():
+    batches = split_into_batches(list(range(95)), 10)
+    failed, committed = set(), []
+    in_flight = max_in_flight = 0
+
+    async def request(batch):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(random.uniform(0, 0.02))
+        in_flight -= 1
+        if batch[0] % 20 == 0 and batch[0] not in failed:  # the first attempt of every other batch fails
+            failed.add(batch[0])
+            raise FlakyError()
+        return [x * 2 for x in batch]
+
+    asyncio.run(run_pipeline(batches, request, lambda batch, result: committed.append((batch, result)),
+                             concurrency=3, retry_on=(FlakyError,), base_delay=0.001))
+    assert committed == [(batch, [x * 2 for x in batch]) for batch in batches]
+    assert max_in_flight == 3
+    assert failed == {0, 20, 40, 60, 80}
+
+
+def test_pipeline_commits_the_completed_batches_of_a_failed_run():
+    batches = split_into_batches(list(range(50)), 10)
+    committed = []
+
+    async def request(batch):
+        if batch[0] == 10:
+            await asyncio.sleep(0.05)  # fails after the later batches completed
+            raise ValueError()
+        return batch
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_pipeline(batches, request, lambda batch, result: committed.append(batch), concurrency=5,
+                                 retry_on=(FlakyError,), base_delay=0.001))
+    assert committed == [batch for batch in batches if batch[0] != 10]
+
+
+def test_pack_batches():
+    assert pack_batches([3, 4, 2, 9, 1, 1, 5], lambda tokens: tokens, 7) == [[3, 4], [2], [9], [1, 1, 5]]
+    assert pack_batches([], len, 7) == []
+
+
+def test_rate_limiter():
+    async def acquire_all():
+        rate_limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+        start = time.monotonic()
+        for _ in range(600 + 3):  # a full bucket, then 10 requests a second
+            await rate_limiter.acquire()
+        for _ in range(3):  # 1000 tokens a second
+            await rate_limiter.acquire(100)
+        return time.monotonic() - start
+
+    assert 0.55 < asyncio.run(acquire_all()) < 1.0
+
+
+def test_find_numbers_against_the_stub_server(tmp_path):
+    pytest.importorskip('openai')
+    from find_by_llm import find_numbers_of_verses_with_client
+    from llm_stub import StubServer
+    from programmatic import get_verses_with_numbers
+    from verses_to_matches import VersesToNumericsJournal
+
+    verses = get_verses_with_numbers()[:45]
+    with StubServer(latency=0.01, error_rate=0.5) as server:
+        with VersesToNumericsJournal(tmp_path / 'results.json', tmp_path / 'results.jsonl') as journal:
+            asyncio.run(find_numbers_of_verses_with_client(verses, journal, server.base_url, 'stub', concurrency=4,
+                                                           rate_limiter=RateLimiter(10 ** 6), base_delay=0.001,
+                                                           token_budget=1000))
+    assert server.num_errors > 0
+    assert server.max_in_flight <= 4
+    assert list(journal.verses_to_numerics) == verses
+    assert all(len(numeric_hebrews) == 1 for numeric_hebrews in journal.verses_to_numerics.values())
+
+
+def test_routed_run_has_results_of_all_verses(tmp_path):
+    pytest.importorskip('openai')
+    from find_by_llm import commit_programmatic_results, find_numbers_of_verses_with_client
+    from llm_stub import StubServer
+    from programmatic import get_verses_with_numbers
+    from routing import get_reference, route_verses
+    from verses_to_matches import VersesToNumericsJournal, load_or_create_verses_to_numerics
+
+    verses = get_verses_with_numbers()[:45]
+    to_llm, programmatic_results = route_verses(verses)
+    assert 0 < len(to_llm) < len(verses)
+    with StubServer(latency=0.01) as server:
+        with VersesToNumericsJournal(tmp_path / 'results.json', tmp_path / 'results.jsonl') as journal:
+            with VersesToNumericsJournal(tmp_path / 'programmatic.json', tmp_path / 'programmatic.jsonl') \
+                    as programmatic_journal:
+                commit_programmatic_results(programmatic_results, journal, programmatic_journal)
+            asyncio.run(find_numbers_of_verses_with_client(to_llm, journal, server.base_url, 'stub',
+                                                           rate_limiter=RateLimiter(10 ** 6), token_budget=1000))
+    llm_results = load_or_create_verses_to_numerics(tmp_path / 'results.json', tmp_path / 'results.jsonl')
+    results = load_or_create_verses_to_numerics(tmp_path / 'programmatic.json', tmp_path / 'programmatic.jsonl')
+    assert list(llm_results) == to_llm
+    assert results == programmatic_results
+    assert {get_reference(verse) for verse in llm_results | results} == {get_reference(verse) for verse in verses}
+
+
+def test_only_transient_errors_are_retried():
+    openai = pytest.importorskip('openai')
+    from find_by_llm import RETRY_ON
+
+    assert not issubclass(openai.AuthenticationError, RETRY_ON)
+    assert not issubclass(openai.BadRequestError, RETRY_ON)
+    for error_type in [openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError,
+                       openai.InternalServerError]:
+        assert issubclass(error_type, RETRY_ON)
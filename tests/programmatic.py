@@ -1,6 +1,7 @@
 import pytest
 
-from programmatic import hebrew_num_to_int, extract_number_phrases
+from programmatic import hebrew_num_to_int, extract_number_phrases, extract_number_phrases_and_values, \
+    get_verses_with_numbers
 
 
 @pytest.mark.parametrize("hebrew, expected", [
@@ -140,3 +141,30 @@ def test_hebrew_num_to_int(hebrew, expected):
 def test_extract_number_phrases(verse, expected):
     result = extract_number_phrases(verse)
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    "verse,expected",
+    [
+        (
+            "ויהיו כל ימי שת שתים עשרה שנה ותשע מאות שנה וימות",
+            [("שתים עשרה שנה ותשע מאות שנה", 912)]
+        ),
+        (
+            "ואלה שני חיי ישמעאל מאת שנה ושלושים שנה ושבע שנים ויגווע וימת וייאסף אל עמיו",
+            [("מאת שנה ושלושים שנה ושבע שנים", 137)]
+        ),
+        (
+            "וקמו שבע שני רעב אחריהן ונשכח כל השבע בארץ מצריים וכילה הרעב את הארץ",
+            [("שבע שני", 7)]
+        ),
+    ]
+)
+def test_extract_number_phrases_and_values(verse, expected):
+    assert extract_number_phrases_and_values(verse) == expected
+
+
+def test_extracted_values_match_hebrew_num_to_int():
+    for verse in get_verses_with_numbers():
+        for phrase, value in extract_number_phrases_and_values(verse.text):
+            assert value == hebrew_num_to_int(phrase), verse
@@ -0,0 +1,38 @@
+import render_cache
+from bible_types import NumericHebrew, Verse, VerseAndNumericHebrews
+from lexicon import get_tables_fingerprint
+from render_cache import RenderCache, get_render_key
+
+
+def _verse_and_numeric_hebrews(number: int) -> VerseAndNumericHebrews:
+    numeric_hebrew = NumericHebrew(book='בראשית', chapter='א', letter='א', quote='שלושה', number=number, entity='',
+                                   start=5, end=10)
+    return VerseAndNumericHebrews(Verse('בראשית', 'א', 'א', 'ויהי שלושה ימים'), [numeric_hebrew])
+
+
+def test_render_cache_returns_the_rendered_fragments():
+    cache = RenderCache()
+    item = _verse_and_numeric_hebrews(3)
+    assert cache.render(item, ('html', 'text')) == item.render(('html', 'text'))
+    assert cache.render(item) == item.render()
+    assert (cache.stats.hits, cache.stats.misses) == (2, 3)
+    assert get_render_key(item) != get_render_key(_verse_and_numeric_hebrews(4))
+
+
+def test_render_cache_is_saved_and_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_cache, 'CACHE_DIRECTORY', tmp_path)
+    cache = RenderCache(maxsize=2)
+    for number in [1, 2, 3]:
+        cache.render(_verse_and_numeric_hebrews(number), ('html',))
+    assert cache.stats.evictions == 1
+    cache.save()
+    loaded = RenderCache.load(maxsize=2)
+    loaded.render(_verse_and_numeric_hebrews(3), ('html',))
+    loaded.render(_verse_and_numeric_hebrews(1), ('html',))
+    assert (loaded.stats.hits, loaded.stats.misses) == (1, 1)
+
+
+def test_render_key_is_of_the_lexicon_tables():
+    item = _verse_and_numeric_hebrews(3)
+    assert get_render_key(item) == get_render_key(item, get_tables_fingerprint())
+    assert get_render_key(item) != get_render_key(item, 'other tables')
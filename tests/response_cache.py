@@ -0,0 +1,37 @@
+import pytest
+
+from bible_types import ListOfNumericHebrew, NumericHebrewModel
+from response_cache import ResponseCache, ResponseCacheMiss, get_response_key
+
+RESPONSE = ListOfNumericHebrew(all_numbers=[
+    NumericHebrewModel(book='בראשית', chapter='א', letter='ה', quote='יום אחד', number=1, entity='יום')])
+
+
+def test_response_key():
+    key = get_response_key('model', 'system', 'user', ListOfNumericHebrew)
+    assert key == get_response_key('model', 'system', 'user', ListOfNumericHebrew)
+    assert key != get_response_key('model', 'system', 'user ', ListOfNumericHebrew)
+    assert key != get_response_key('other model', 'system', 'user', ListOfNumericHebrew)
+    assert key != get_response_key('model', 'system', 'user', NumericHebrewModel)
+    assert key != get_response_key('model', 'system', 'user')
+
+
+def test_cache_round_trip_eviction_and_replay(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10 ** 6)
+    assert cache.get('a', ListOfNumericHebrew) is None
+    cache.put('a', RESPONSE, latency=2.5)
+    assert ResponseCache(tmp_path).get('a', ListOfNumericHebrew) == RESPONSE  # from disk
+    assert cache.get('a', ListOfNumericHebrew) == RESPONSE
+    assert (cache.stats.hits, cache.stats.misses, cache.saved_latency) == (1, 1, 2.5)
+
+    entry_size = cache.stats.size
+    small_cache = ResponseCache(tmp_path, max_bytes=2 * entry_size)
+    for key in 'bc':
+        small_cache.put(key, RESPONSE, latency=1)
+    assert small_cache.stats.evictions == 1
+    assert 'a' not in small_cache and 'b' in small_cache and 'c' in small_cache
+
+    replay_cache = ResponseCache(tmp_path, replay=True)
+    assert replay_cache.get('c', ListOfNumericHebrew) == RESPONSE
+    with pytest.raises(ResponseCacheMiss):
+        replay_cache.get('a', ListOfNumericHebrew)
@@ -0,0 +1,37 @@
+from bible_types import NumericHebrew, Time, Verse
+from results_store import ResultsStore, convert_json_to_store, convert_store_to_json, open_results_store
+from verses_to_matches import dump_verses_to_numerics
+
+VERSE = Verse('בראשית', 'א', 'ה', 'ויהי ערב ויהי בוקר יום אחד')
+NUMERIC_HEBREW = NumericHebrew('בראשית', 'א', 'ה', 'יום אחד', 1, 'יום', 19, 26)
+OTHER_VERSE = Verse('בראשית', 'ז', 'יא', 'בשנת שש מאות שנה לחיי נח')
+TIME = NumericHebrew('בראשית', 'ז', 'יא', 'שש מאות שנה', Time(years=600), 'שנה')
+ELSEWHERE = NumericHebrew('בראשית', 'ז', 'יב', 'ארבעים יום', 40, 'יום')
+VERSES_TO_NUMERICS = {VERSE: [NUMERIC_HEBREW], OTHER_VERSE: [TIME, ELSEWHERE], Verse('בראשית', 'א', 'א', 'x'): []}
+
+
+def test_store_round_trip(tmp_path):
+    file_name, store_file_name = tmp_path / 'results.json', tmp_path / 'results.bin'
+    dump_verses_to_numerics(file_name, VERSES_TO_NUMERICS)
+    convert_json_to_store(file_name, store_file_name, tmp_path / 'results.jsonl')
+    with ResultsStore(store_file_name) as store:
+        assert len(store) == 3
+        assert ('בראשית', 'ז', 'יא') in store
+        assert store['בראשית', 'ז', 'יא'] == (OTHER_VERSE, [TIME, ELSEWHERE])
+        assert store.get('בראשית', 'ב', 'א') is None
+        assert store.to_dict() == VERSES_TO_NUMERICS
+    original = file_name.read_bytes()
+    file_name.unlink()
+    convert_store_to_json(store_file_name, file_name)
+    assert file_name.read_bytes() == original
+
+
+def test_open_results_store_converts_when_stale(tmp_path):
+    file_name, store_file_name, journal_file_name = \
+        tmp_path / 'results.json', tmp_path / 'results.bin', tmp_path / 'results.jsonl'
+    dump_verses_to_numerics(file_name, {VERSE: [NUMERIC_HEBREW]})
+    with open_results_store(file_name, store_file_name, journal_file_name) as store:
+        assert len(store) == 1
+    dump_verses_to_numerics(file_name, VERSES_TO_NUMERICS)
+    with open_results_store(file_name, store_file_name, journal_file_name) as store:
+        assert store.to_dict() == VERSES_TO_NUMERICS
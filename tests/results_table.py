@@ -0,0 +1,54 @@
+import numpy as np
+
+from bible_types import NumericHebrew, Time, Verse, VerseAndNumericHebrews, YEARS, DAYS
+from results_table import NO_SPAN, ResultsTable, get_cdf
+
+
+def _get_table() -> ResultsTable:
+    def numeric_hebrew(quote, number, start=None):
+        return NumericHebrew(book='', chapter='', letter='', quote=quote, number=number, entity='',
+                             start=start, end=None if start is None else start + len(quote))
+    return ResultsTable.from_verses_and_numeric_hebrews([
+        VerseAndNumericHebrews(Verse('בראשית', 'א', 'ה', 'יום אחד'), [numeric_hebrew('יום אחד', Time(days=1), 0)]),
+        VerseAndNumericHebrews(Verse('שמות', 'ב', 'ג', 'שלוש שנים ושבעה'),
+                               [numeric_hebrew('שלוש שנים', Time(years=3)), numeric_hebrew('ושבעה', 7, 10)]),
+        VerseAndNumericHebrews(Verse('בראשית', 'ג', 'ד', 'שנים'), [numeric_hebrew('שנים', 2, 0)]),
+    ])
+
+
+def test_results_table_columns():
+    table = _get_table()
+    assert len(table) == 4
+    assert table.book_names.tolist() == ['בראשית', 'שמות']
+    assert table.verse_index.tolist() == [0, 1, 1, 2]
+    assert table.value.tolist() == [1, 3, 7, 2]
+    assert table.is_time.tolist() == [True, True, False, False]
+    assert table.unit.tolist() == [DAYS, YEARS, 0, 0]
+    assert table.start.tolist() == [0, NO_SPAN, 10, 0]
+    assert list(table.times) == [Time(days=1), Time(years=3)]
+
+
+def test_results_table_group_by_book():
+    table = _get_table()
+    assert {book: rows.tolist() for book, rows in table.group_by_book().items()} == {'בראשית': [0, 3], 'שמות': [1, 2]}
+    assert table.count_by_book() == {'בראשית': 2, 'שמות': 2}
+    assert table.sum_by_book(~table.is_time) == {'בראשית': 2, 'שמות': 7}
+
+
+def test_results_table_save_and_load(tmp_path):
+    table = _get_table()
+    table.save_npz(tmp_path / 'results.npz')
+    loaded = ResultsTable.load_npz(tmp_path / 'results.npz')
+    assert loaded.book_names.tolist() == table.book_names.tolist()
+    assert loaded.chapter.tolist() == table.chapter.tolist()
+    assert np.array_equal(loaded.value, table.value)
+    table.to_csv(tmp_path / 'results.csv')
+    lines = (tmp_path / 'results.csv').read_text().splitlines()
+    assert len(lines) == 5
+    assert lines[1] == '0,בראשית,א,ה,1.0,True,0,0,1,4,days,False,0,7'
+
+
+def test_get_cdf():
+    x, y = get_cdf(np.array([3., 1., 2.]))
+    assert x.tolist() == [1, 2, 3]
+    assert y.tolist() == [0, 0.5, 1]
@@ -0,0 +1,45 @@
+from bible_types import Verse
+from programmatic import get_numeric_hebrews
+from programmatic_nikud import Ambiguity, GetHebrewNumbers
+from read_bible import get_bible
+from routing import count_missing_numbers, get_reference, route_verses
+
+
+def get_ambiguity(text: str) -> Ambiguity:
+    parser = GetHebrewNumbers(text)
+    parser.get()
+    return parser.get_ambiguity()
+
+
+def test_ambiguity():
+    assert get_ambiguity("תְּשַׁע מֵאוֹת שָׁנָה וּשְׁלֹשִׁים שָׁנָה").score == 0
+    assert get_ambiguity("וַיָּבֹא אַבְרָהָם אֶל בְּאֵר שֶׁבַע") == Ambiguity(exceptions=1)
+    assert get_ambiguity("יְמֵי שְׁנֵי חַיַּי") == Ambiguity(exceptions=1)
+    assert get_ambiguity("וַיְהִי אִישׁ אֶחָד") == Ambiguity(the_one=1)
+    assert get_ambiguity("וַיִּקַּח שְׁנֵי הָאֲנָשִׁים") == Ambiguity(unresolved_shnei=1)
+    assert get_ambiguity("שְׁלֹשָׁה חֳדָשִׁים וַחֲמִשָּׁה יָמִים") == Ambiguity(mixed_units=1)
+
+
+def test_route_verses():
+    bible = {get_reference(verse): verse for verse in get_bible(with_nikud=True)}
+    clear = Verse('בראשית', 'ה', 'ה', 'ויהיו כל ימי אדם אשר חי תשע מאות שנה ושלושים שנה וימות')
+    ambiguous = Verse('בראשית', 'כו', 'לג', 'ויקרא אותה שבעה על כן שם העיר באר שבע עד היום הזה')
+    unknown = Verse('ספר', 'א', 'א', 'שבע')
+    to_llm, programmatic_results = route_verses([clear, ambiguous, unknown])
+    assert to_llm == [ambiguous, unknown]
+    assert [numeric_hebrew.number.years for numeric_hebrew in programmatic_results[bible['בראשית', 'ה', 'ה']]] \
+        == [930]
+
+
+def test_missing_numbers():
+    seven = get_numeric_hebrews(Verse('', '', '', 'שבע'))
+    assert count_missing_numbers('ויהי שבע שנים', seven) == 0
+    assert count_missing_numbers('ויהי שבע שנים ושלושה ימים', seven) == 1
+    assert count_missing_numbers('ויהי כל הארץ שפה אחת', []) == 1
+    assert count_missing_numbers('ויהי כל הארץ', []) == 0
+
+
+def test_verses_without_results_go_to_the_llm():
+    one_language = Verse('בראשית', 'יא', 'א', 'ויהי כל הארץ שפה אחת ודברים אחדים')
+    to_llm, programmatic_results = route_verses([one_language])
+    assert to_llm == [one_language] and programmatic_results == {}
@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from bible_types import NumericHebrew, Time, Verse, VerseAndNumericHebrews
+from corpus_encoding import get_corpus_encoding
+from read_bible import get_bible
+from shared_store import NO_VERSE, SharedStore, write_shared_store
+
+NUM_READERS = 4
+
+
+def get_verses_and_numeric_hebrews():
+    verses = get_bible()
+    return [
+        VerseAndNumericHebrews(verses[5], [NumericHebrew(*verses[5][:3], 'x', 2, '')]),
+        VerseAndNumericHebrews(verses[100], [NumericHebrew(*verses[100][:3], 'y', Time(years=600), 'שנה'),
+                                             NumericHebrew(*verses[100][:3], 'z', 2, '')]),
+        VerseAndNumericHebrews(Verse('ספר', 'א', 'א', ''), [NumericHebrew('ספר', 'א', 'א', 'w', 7, '')]),
+    ]
+
+
+@pytest.fixture(scope='module')
+def store_file_name(tmp_path_factory):
+    file_name = tmp_path_factory.mktemp('shared_store') / 'store.bin'
+    write_shared_store(get_verses_and_numeric_hebrews(), file_name=file_name)
+    return file_name
+
+
+def test_store_agrees_with_the_corpus(store_file_name):
+    verses, encoding = get_bible(), get_corpus_encoding()
+    store = SharedStore(store_file_name)
+    assert store.num_verses == len(verses)
+    for verse_index in [0, 100, len(verses) - 1]:
+        assert store.get_verse(verse_index) == verses[verse_index]
+        assert store.encoding.get_verse_words(verse_index) == encoding.get_verse_words(verse_index)
+    for word in ['אדם', 'שנה', 'לא-מילה']:
+        assert store.find_word(word).tolist() == encoding.find_phrase([word]).tolist()
+    assert store.results.verse_index.tolist() == [5, 100, 100, NO_VERSE]
+    assert sorted(store.find_value(2).tolist()) == [0, 2]
+    assert store.find_value(3, 1000).tolist() == [3, 1]
+
+
+def read_store(file_name, barrier, queue):
+    store = SharedStore(file_name)
+    for array in store.arrays.values():
+        np.frombuffer(array, dtype=np.uint8).sum()  # touches all the pages
+    barrier.wait()  # all the readers have mapped the store
+    mapping = {'Rss': 0, 'Pss': 0, 'Private_Dirty': 0}
+    is_store = False
+    with open('/proc/self/smaps') as file:
+        for line in file:
+            fields = line.split()
+            if '-' in fields[0] and not fields[0].endswith(':'):  # the first line of a mapping
+                is_store = fields[-1] == str(file_name)
+            elif is_store and fields[0][:-1] in mapping:
+                mapping[fields[0][:-1]] += int(fields[1]) * 1024
+    queue.put(mapping)
+    barrier.wait()  # until all the readers have measured
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/smaps'), reason="measures the memory with /proc/self/smaps")
+def test_readers_share_the_memory_of_the_store(store_file_name):
+    context = multiprocessing.get_context('spawn')
+    barrier, queue = context.Barrier(NUM_READERS), context.Queue()
+    readers = [context.Process(target=read_store, args=(store_file_name, barrier, queue))
+               for _ in range(NUM_READERS)]
+    for reader in readers:
+        reader.start()
+    mappings = [queue.get(timeout=60) for _ in readers]
+    for reader in readers:
+        reader.join()
+    size = os.path.getsize(store_file_name)
+    for mapping in mappings:
+        assert mapping['Rss'] >= 0.9 * size  # each reader sees all the store
+        assert mapping['Private_Dirty'] == 0  # but no page is its own copy
+        assert mapping['Pss'] <= 1.1 * size / NUM_READERS  # the pages are shared by the readers
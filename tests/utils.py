@@ -1,5 +1,5 @@
 from bible_utils import tokenize_words_and_punctuations, reconstruct
-from utils import search_nikud_text_for_non_nikud_query
+from utils import search_nikud_text_for_non_nikud_query, canonicalize
 
 
 def test_search_nikud_text_for_non_nikud_query():
@@ -21,3 +21,8 @@ def test_tokenize():
     assert reconstructed == s
     assert words == ["הוּא", "וַאֲנָשִׁים", "מִיהוּדָה"]
     assert separators == [" ", "--"]
+
+
+def test_canonicalize():
+    # shin + dagesh + shin-dot + sheva, in two different mark orders
+    assert canonicalize('\u05e9\u05bc\u05c1\u05b0') == canonicalize('\u05e9\u05b0\u05c1\u05bc') == '\u05e9\u05b0\u05c1'
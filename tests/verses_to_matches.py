@@ -0,0 +1,25 @@
+from bible_types import NumericHebrew, Verse
+from verses_to_matches import VersesToNumericsJournal, load_or_create_verses_to_numerics
+
+VERSE = Verse('בראשית', 'א', 'ה', 'ויהי ערב ויהי בוקר יום אחד')
+NUMERIC_HEBREW = NumericHebrew(book='בראשית', chapter='א', letter='ה', quote='יום אחד', number=1, entity='יום')
+OTHER_VERSE = Verse('בראשית', 'א', 'ח', 'ויהי ערב ויהי בוקר יום שני')
+
+
+def test_journal_recovers_and_compacts(tmp_path):
+    file_name, journal_file_name = tmp_path / 'results.json', tmp_path / 'results.jsonl'
+    journal = VersesToNumericsJournal(file_name, journal_file_name, sync_every=1)
+    journal.append(VERSE, [NUMERIC_HEBREW])
+    journal.append(OTHER_VERSE, [])
+    journal.close(compact=False)  # as after a crash
+    with open(journal_file_name, 'ab') as file:
+        file.write(b'[{"book": "torn')
+
+    expected = {VERSE: [NUMERIC_HEBREW], OTHER_VERSE: []}
+    assert load_or_create_verses_to_numerics(file_name, journal_file_name) == expected
+    with VersesToNumericsJournal(file_name, journal_file_name) as journal:
+        assert journal.verses_to_numerics == expected
+        journal.append(OTHER_VERSE, [NUMERIC_HEBREW])
+    assert journal_file_name.read_bytes() == b''
+    assert load_or_create_verses_to_numerics(file_name, journal_file_name) == \
+           {VERSE: [NUMERIC_HEBREW], OTHER_VERSE: [NUMERIC_HEBREW]}
@@ -1,5 +1,14 @@
+import functools
+import hashlib
+import os
+import pickle
 import re
 import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import NamedTuple
+
+CACHE_DIRECTORY = Path(__file__).parent / '.cache'
 
 
 def search_nikud_text_for_non_nikud_query(text: str, query: str):
@@ -83,3 +92,136 @@ def normalize_vowels(text):
     if isinstance(text, str):
         return unicodedata.normalize('NFC', text)
 
+
+# Marks that are dropped from lookup keys, so that spelling variants that differ only by them are the same word.
+FOLD_MARKS = '\u05BC'  # dagesh (or mapiq)
+
+
+@functools.lru_cache()
+def _get_fold_table(marks: str) -> dict:
+    return str.maketrans('', '', marks)
+
+
+def fold_marks(text: str, marks: str = FOLD_MARKS) -> str:
+    return text.translate(_get_fold_table(marks))
+
+
+def canonicalize(text: str, marks: str = FOLD_MARKS) -> str:
+    """
+    The canonical lookup key of a (voweled) word: NFC-normalized, with the `marks` removed.
+    """
+    return fold_marks(normalize_vowels(text), marks)
+
+
+def get_fingerprint(*items) -> str:
+    """
+    A stable hash of the given items (bytes, or anything with a deterministic repr).
+    """
+    hasher = hashlib.sha1()
+    for item in items:
+        hasher.update(item if isinstance(item, bytes) else repr(item).encode('utf-8'))
+        hasher.update(b'\0')
+    return hasher.hexdigest()
+
+
+def write_atomically(file_name, content: bytes, sync: bool = False):
+    """
+    Write to a temporary file and rename it over the target, so readers never see a partial file.
+    If `sync`, the content is on disk when we return.
+    """
+    file_name = Path(file_name)
+    file_name.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_name = file_name.with_name(f'.{file_name.name}.{os.getpid()}.tmp')
+    with open(temp_file_name, 'wb') as file:
+        file.write(content)
+        if sync:
+            file.flush()
+            os.fsync(file.fileno())
+    os.replace(temp_file_name, file_name)
+    if sync and hasattr(os, 'O_DIRECTORY'):
+        directory = os.open(file_name.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+def load_or_create_pickle(file_name: str, fingerprint: str, create):
+    """
+    Load an object pickled in the cache directory.
+    If it is missing, or was created from different inputs (fingerprint), create it and cache it.
+    """
+    path = CACHE_DIRECTORY / file_name
+    if path.exists():
+        try:
+            with open(path, 'rb') as file:
+                cached_fingerprint, obj = pickle.load(file)
+            if cached_fingerprint == fingerprint:
+                return obj
+        except Exception:  # unreadable, or pickled by an older version of the code
+            pass
+    obj = create()
+    write_atomically(path, pickle.dumps((fingerprint, obj), protocol=pickle.HIGHEST_PROTOCOL))
+    return obj
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.
+
+
+class LRUCache:
+    """
+    A dict bounded to `maxsize` items, evicting the least recently used. Counts its hits, misses and evictions.
+    A maxsize of 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, default=None):
+        try:
+            value = self._items[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._items.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def items(self) -> list:
+        """The (key, value) pairs, from the least to the most recently used."""
+        return list(self._items.items())
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._items), self.maxsize)
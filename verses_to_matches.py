@@ -3,31 +3,127 @@ import os
 from typing import Dict, List, Set
 
 from bible_types import Verse, NumericHebrew
+from utils import write_atomically
 
 FILE_NAME = 'verses_to_numerics.json'
+JOURNAL_FILE_NAME = 'verses_to_numerics.jsonl'
+# The results of the parser for the verses that a routed run does not send to the LLM (see find_by_llm), kept apart
+# from the results of the LLM
+PROGRAMMATIC_FILE_NAME = 'verses_to_numerics_programmatic.json'
+PROGRAMMATIC_JOURNAL_FILE_NAME = 'verses_to_numerics_programmatic.jsonl'
+SYNC_EVERY = 10  # journal entries (verses) between fsyncs
 
 
-def dump_verses_to_numerics(file_name: str = FILE_NAME, verses_to_numerics: Dict[Verse, List[NumericHebrew]] = None):
+def _to_json_entry(verse: Verse, numeric_hebrews: List[NumericHebrew]) -> list:
+    return [verse._asdict()] + [x.to_dict() for x in numeric_hebrews]
+
+
+def _from_json_entry(kv: list):
+    return Verse(**kv[0]), [NumericHebrew.from_dict(x) for x in kv[1:]]
+
+
+def dump_verses_to_numerics(file_name: str = FILE_NAME, verses_to_numerics: Dict[Verse, List[NumericHebrew]] = None,
+                            sync: bool = False):
     """to json"""
     json_obj = []
     for k, v in verses_to_numerics.items():
-        json_obj.append([k._asdict()] + [x.dict() for x in v])
+        json_obj.append(_to_json_entry(k, v))
+
+    write_atomically(file_name, json.dumps(json_obj, ensure_ascii=False, indent=4).encode('utf-8'), sync=sync)
 
-    with open(file_name, 'w') as file:
-        json.dump(json_obj, file, ensure_ascii=False, indent=4)
 
+def load_or_create_verses_to_numerics(file_name: str = FILE_NAME, journal_file_name: str = JOURNAL_FILE_NAME) \
+        -> Dict[Verse, List[NumericHebrew]]:
+    """from the json snapshot, updated by the entries of the journal (if any)"""
+    verses_to_numerics = _load_snapshot(file_name)
+    for verse, numeric_hebrews in _read_journal(journal_file_name)[0]:
+        verses_to_numerics[verse] = numeric_hebrews
+    return verses_to_numerics
 
-def load_or_create_verses_to_numerics(file_name: str = FILE_NAME) -> Dict[Verse, List[NumericHebrew]]:
-    """from pickle"""
-    import pickle
+
+def _load_snapshot(file_name: str) -> Dict[Verse, List[NumericHebrew]]:
     if not os.path.exists(file_name):
         return {}
-
     with open(file_name, 'r') as file:
         json_obj = json.load(file)
-        verses_to_numerics = dict()
-        for kv in json_obj:
-            k = kv[0]
-            v = kv[1:]
-            verses_to_numerics[Verse(**k)] = [NumericHebrew(**x) for x in v]
-        return verses_to_numerics
+    return dict(_from_json_entry(kv) for kv in json_obj)
+
+
+def _read_journal(journal_file_name: str):
+    """
+    The entries of the journal, and the length of its valid part.
+    A torn last line (of a write interrupted by a crash) is not part of the journal.
+    """
+    entries = []
+    valid_length = 0
+    if not os.path.exists(journal_file_name):
+        return entries, valid_length
+    with open(journal_file_name, 'rb') as file:
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entries.append(_from_json_entry(json.loads(line)))
+            except ValueError:
+                break
+            valid_length += len(line)
+    return entries, valid_length
+
+
+class VersesToNumericsJournal:
+    """
+    Append-only storage of the results of verses: each result is appended to the journal as one json line
+    (fsync'ed every `sync_every` entries), instead of re-writing the whole snapshot.
+    `compact` writes the snapshot (the json file) and empties the journal.
+    On opening, the results are recovered from the snapshot and the journal.
+    """
+
+    def __init__(self, file_name: str = FILE_NAME, journal_file_name: str = JOURNAL_FILE_NAME,
+                 sync_every: int = SYNC_EVERY):
+        self.file_name = file_name
+        self.journal_file_name = journal_file_name
+        self.sync_every = sync_every
+        self.verses_to_numerics = _load_snapshot(file_name)
+        entries, valid_length = _read_journal(journal_file_name)
+        for verse, numeric_hebrews in entries:
+            self.verses_to_numerics[verse] = numeric_hebrews
+        self.journal = open(journal_file_name, 'ab')
+        self.journal.truncate(valid_length)
+        self.num_unsynced = 0
+        self.bytes_written = 0
+
+    def __enter__(self):
+        return self
+
+    def append(self, verse: Verse, numeric_hebrews: List[NumericHebrew]):
+        self.verses_to_numerics[verse] = numeric_hebrews
+        line = json.dumps(_to_json_entry(verse, numeric_hebrews), ensure_ascii=False).encode('utf-8') + b'\n'
+        self.journal.write(line)
+        self.bytes_written += len(line)
+        self.num_unsynced += 1
+        if self.num_unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+        self.num_unsynced = 0
+
+    def compact(self):
+        # the snapshot is replaced atomically (and synced) before the journal is emptied; replaying the journal over
+        # the new snapshot (if we crash in between) gives the same results
+        self.sync()
+        dump_verses_to_numerics(self.file_name, self.verses_to_numerics, sync=True)
+        self.bytes_written += os.path.getsize(self.file_name)
+        self.journal.truncate(0)
+        self.sync()
+
+    def close(self, compact: bool = True):
+        if compact:
+            self.compact()
+        else:
+            self.sync()
+        self.journal.close()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close(compact=exc_type is None)
@@ -1,8 +1,10 @@
 from typing import List
 
 from bible_types import VerseAndNumericHebrews
-from create_verses_html import create_html_of_verses_with_numbers
-from verses_to_matches import load_or_create_verses_to_numerics
+from create_book_pages import write_book_pages
+from create_docs_data import write_docs_data
+from render_cache import RenderCache
+from results_store import open_results_store
 import matplotlib.pyplot as plt
 
 
@@ -12,11 +14,16 @@ def print_verses_with_numbers(verses_and_numeric_hebrews: List[VerseAndNumericHe
 
 
 def main():
-    verses_to_matches = load_or_create_verses_to_numerics()
+    with open_results_store() as store:
+        verses_to_matches = store.to_dict()
     verses_and_numeric_hebrews = []
     for verse, numeric_hebrews in verses_to_matches.items():
         verses_and_numeric_hebrews.append(VerseAndNumericHebrews(verse, numeric_hebrews))
-    create_html_of_verses_with_numbers(verses_and_numeric_hebrews)
+    render_cache = RenderCache.load()
+    print(write_docs_data(verses_and_numeric_hebrews, render_cache=render_cache).get_size_report())
+    print(write_book_pages(verses_and_numeric_hebrews, render_cache=render_cache))
+    render_cache.save()
+    print(f"Render cache: {render_cache.stats}, hit rate {render_cache.stats.hit_rate:.0%}")
     print_verses_with_numbers(verses_and_numeric_hebrews)
 
     all_numbers = [numeric_hebrew.number for numeric_hebrews in verses_to_matches.values() for numeric_hebrew in numeric_hebrews]